@@ -1,35 +1,57 @@
-from flask import Flask, render_template, Blueprint, redirect, url_for, flash, request
+import time
+
+_import_started = time.perf_counter()
+
+from flask import Flask, render_template
 from .database import db, init_db
-from flask_migrate import Migrate
-from flask_login import LoginManager
-from dotenv import load_dotenv
+from .cache import cache
+from .assets import init_assets
+from .auth import init_auth
+from .changes import init_changes
+from .compression import init_compression
+from .instrumentation import init_instrumentation
+from .jobs import init_jobs
+from .passwords import init_passwords
+from .serve import init_serve
+from .startup import StartupProfile, load_env, migrate_cli, startup_profile_command
 import os
 
-load_dotenv()  # loads .env if present
+_import_seconds = time.perf_counter() - _import_started
+
 
 def create_app():
+    profile = StartupProfile()
+    profile.add('import app', _import_seconds)
+    load_env()  # .env, if present; the only place it is read
     app = Flask(__name__, template_folder='templates', static_folder='static')
     # config
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'postgresql://localhost/flaskdemo'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or 'dev-secret-key'
 
-    init_db(app)
-    migrate = Migrate(app, db)
-
-    # auth
-    login_manager = LoginManager()
-    login_manager.login_view = 'user.login'
-    login_manager.init_app(app)
+    with profile.phase('database'):
+        init_db(app)
+    # Flask-Migrate (and Alembic) load only when a `flask db` command runs
+    app.cli.add_command(migrate_cli(app, db))
+    app.cli.add_command(startup_profile_command)
+    with profile.phase('extensions'):
+        cache.init_app(app)
+        init_instrumentation(app)
+        init_compression(app)
+        init_assets(app)
+        init_jobs(app)
+        init_changes(app)
+        init_serve(app)
 
-    from .models import User
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
+    # auth (Flask-Login with a cached user loader)
+    with profile.phase('auth'):
+        init_auth(app)
+        init_passwords(app)
 
     # register blueprints
-    from .user import bp as user_bp
-    app.register_blueprint(user_bp, url_prefix='/user')
+    with profile.phase('blueprints'):
+        from .user import bp as user_bp
+        app.register_blueprint(user_bp, url_prefix='/user')
 
     # root route
     @app.route('/')
@@ -39,4 +61,5 @@ def create_app():
         # Render the template located at app/templates/layouts/index.html instead.
         return render_template('layouts/index.html')
 
+    profile.finish(app)
     return app
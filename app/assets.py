@@ -0,0 +1,67 @@
+# app/assets.py
+"""Content-hash fingerprints for static files.
+
+init_assets(app) makes url_for('static', filename=...) add `v=<hash>`, the
+first 12 hex digits of the file's SHA-1. A file's URL therefore changes
+exactly when its content does. Requests that carry the current hash are
+answered with `Cache-Control: public, max-age=STATIC_MAX_AGE, immutable`,
+so repeat page loads do not even revalidate them. Requests without a hash,
+or with an outdated one, keep Flask's default revalidation headers.
+
+Hashes are remembered per (mtime, size), so an edited file gets a new URL
+without a restart.
+
+Config (app.config, falling back to the env var): STATIC_MAX_AGE
+(seconds, default one year)
+"""
+import hashlib
+import os
+
+from flask import request
+from werkzeug.security import safe_join
+
+FINGERPRINT_LENGTH = 12
+
+
+def fingerprint(app, filename):
+    """Hash of static `filename`'s content, or None if there is no such file."""
+    path = safe_join(app.static_folder, filename) if app.static_folder else None
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    known = app.extensions['static_fingerprints']
+    version = (st.st_mtime_ns, st.st_size)
+    entry = known.get(filename)
+    if entry is None or entry[0] != version:
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:FINGERPRINT_LENGTH]
+        entry = known[filename] = (version, digest)
+    return entry[1]
+
+
+def init_assets(app):
+    """Fingerprint static URLs and cache fingerprinted responses as immutable."""
+    app.config.setdefault('STATIC_MAX_AGE', int(os.getenv('STATIC_MAX_AGE', 365 * 24 * 3600)))
+    app.extensions['static_fingerprints'] = {}
+
+    @app.url_defaults
+    def _add_fingerprint(endpoint, values):
+        if endpoint == 'static' and 'v' not in values and 'filename' in values:
+            digest = fingerprint(app, values['filename'])
+            if digest:
+                values['v'] = digest
+
+    @app.after_request
+    def _immutable(response):
+        if request.endpoint != 'static' or response.status_code not in (200, 304):
+            return response
+        version = request.args.get('v')
+        if version and version == fingerprint(app, request.view_args['filename']):
+            response.cache_control.public = True
+            response.cache_control.no_cache = None
+            response.cache_control.max_age = app.config['STATIC_MAX_AGE']
+            response.cache_control.immutable = True
+        return response
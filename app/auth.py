@@ -0,0 +1,190 @@
+# app/auth.py
+"""Flask-Login setup with a query-free path to the current user.
+
+Flask-Login calls the user loader on every request that touches
+current_user. Before this module that meant one SELECT per authenticated
+request. Now the loader resolves an id in this order:
+
+    1. a per-process TTL cache of Identity objects (AUTH_USER_CACHE_TTL)
+    2. identity claims signed into the session cookie, when
+       AUTH_IDENTITY_CLAIMS is on and they are younger than
+       AUTH_CLAIMS_MAX_AGE
+    3. the database, which also refreshes both of the above
+
+Identity is a plain UserMixin holding the user's id, username and email.
+It is not an ORM row, so it is safe to share between requests. Views that
+need the User row load it themselves.
+
+Committed changes to User rows (ORM flushes or bulk statements) drop those
+users from this process's cache. They also revoke any claims issued before
+the change, so updates take effect at once in this process. Other
+processes pick them up within AUTH_USER_CACHE_TTL for cached identities and
+AUTH_CLAIMS_MAX_AGE for cookie claims.
+
+Config (app.config, falling back to env vars of the same name):
+    AUTH_USER_CACHE_TTL (60 s), AUTH_USER_CACHE_SIZE (1024),
+    AUTH_IDENTITY_CLAIMS (off), AUTH_CLAIMS_MAX_AGE (300 s)
+"""
+import os
+import threading
+import time
+
+from flask import current_app, has_app_context, session
+from flask_login import LoginManager, UserMixin, user_logged_in, user_logged_out
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from .cache import LRUBackend
+from .database import db
+from .models import User
+
+CLAIMS_KEY = '_identity'
+_INFO_KEY = 'changed_users'
+_ALL = '*'
+
+
+class Identity(UserMixin):
+    """The logged-in user's identity fields, detached from any session."""
+
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.username, user.email)
+
+    def claims(self):
+        return {'id': self.id, 'username': self.username, 'email': self.email, 'iat': time.time()}
+
+    def __repr__(self):
+        return f'<Identity {self.username}>'
+
+
+class AuthState:
+    """Per-app identity cache, revocation times and counters."""
+
+    def __init__(self, maxsize):
+        self.users = LRUBackend(maxsize=maxsize)
+        self.revoked = {}
+        self.revoked_all = 0.0
+        self.stats = {'cache_hits': 0, 'claims_hits': 0, 'db_loads': 0}
+        self._lock = threading.Lock()
+
+    def count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def invalidate(self, user_ids):
+        now = time.time()
+        if _ALL in user_ids:
+            self.users.clear()
+            self.revoked_all = now
+            return
+        self.users.delete(*user_ids)
+        for user_id in user_ids:
+            self.revoked[user_id] = now
+
+
+def _state():
+    return current_app.extensions['auth']
+
+
+def _identity_from_claims(user_id, state):
+    config = current_app.config
+    if not config['AUTH_IDENTITY_CLAIMS']:
+        return None
+    claims = session.get(CLAIMS_KEY)
+    if not claims or claims.get('id') != user_id:
+        return None
+    issued = claims.get('iat', 0)
+    if (issued < time.time() - config['AUTH_CLAIMS_MAX_AGE']
+            or issued <= state.revoked_all or issued <= state.revoked.get(user_id, 0)):
+        return None
+    return Identity(user_id, claims['username'], claims['email'])
+
+
+def load_user(user_id):
+    """Flask-Login user loader: cache, then cookie claims, then one SELECT."""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    state = _state()
+    identity = state.users.get(user_id)
+    if identity is not None:
+        state.count('cache_hits')
+        return identity
+    identity = _identity_from_claims(user_id, state)
+    if identity is not None:
+        state.count('claims_hits')
+    else:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        state.count('db_loads')
+        identity = Identity.from_user(user)
+        if current_app.config['AUTH_IDENTITY_CLAIMS']:
+            session[CLAIMS_KEY] = identity.claims()
+    state.users.set(user_id, identity, current_app.config['AUTH_USER_CACHE_TTL'])
+    return identity
+
+
+def _issue_claims(sender, user, **extra):
+    if sender.config['AUTH_IDENTITY_CLAIMS']:
+        session[CLAIMS_KEY] = Identity.from_user(user).claims()
+
+
+def _drop_claims(sender, user, **extra):
+    session.pop(CLAIMS_KEY, None)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed(db_session, flush_context):
+    changed = {obj.id for obj in list(db_session.dirty) + list(db_session.deleted) if isinstance(obj, User)}
+    if changed:
+        db_session.info.setdefault(_INFO_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if getattr(table, 'name', None) == User.__tablename__:
+            orm_execute_state.session.info.setdefault(_INFO_KEY, set()).add(_ALL)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(db_session):
+    changed = db_session.info.pop(_INFO_KEY, None)
+    if changed and has_app_context() and 'auth' in current_app.extensions:
+        _state().invalidate(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(db_session):
+    db_session.info.pop(_INFO_KEY, None)
+
+
+def init_auth(app):
+    """Set up Flask-Login with the cached loader; returns the LoginManager."""
+    app.config.setdefault('AUTH_USER_CACHE_TTL', float(os.getenv('AUTH_USER_CACHE_TTL', 60)))
+    app.config.setdefault('AUTH_USER_CACHE_SIZE', int(os.getenv('AUTH_USER_CACHE_SIZE', 1024)))
+    app.config.setdefault('AUTH_IDENTITY_CLAIMS',
+                          os.getenv('AUTH_IDENTITY_CLAIMS', '').lower() in ('1', 'true', 'yes'))
+    app.config.setdefault('AUTH_CLAIMS_MAX_AGE', float(os.getenv('AUTH_CLAIMS_MAX_AGE', 300)))
+    state = app.extensions['auth'] = AuthState(app.config['AUTH_USER_CACHE_SIZE'])
+
+    login_manager = LoginManager()
+    login_manager.login_view = 'user.login'
+    login_manager.init_app(app)
+    login_manager.user_loader(load_user)
+    user_logged_in.connect(_issue_claims, app)
+    user_logged_out.connect(_drop_claims, app)
+
+    metrics = app.extensions.get('perf_metrics')
+    if metrics is not None:
+        metrics.add_collector(lambda: [(f'sis_auth_{name}', 'User loader outcome counter.', {}, value)
+                                       for name, value in state.stats.items()])
+    return login_manager
@@ -0,0 +1,159 @@
+# app/cache.py
+"""Small cache for reference data (college and program lists).
+
+Backends:
+    - LRUBackend: in-process, bounded, the default
+    - RedisBackend: any client with redis-py's get/set/delete/scan_iter
+      (tests pass a stand-in object). Every key is written under
+      CACHE_KEY_PREFIX with a TTL; clear() removes all keys under the prefix,
+      whichever process wrote them
+
+Callers put the table revisions (app.revisions) in the key, see
+app/user/queries.py. A write in any process then moves every reader to a
+new key, and the old entries just age out: LRU eviction, or CACHE_TTL
+seconds. `cache.invalidate(...)` drops keys early.
+
+Config (app.config, falling back to env vars of the same name):
+    CACHE_BACKEND (lru|redis), CACHE_REDIS_URL, CACHE_TTL, CACHE_MAXSIZE,
+    CACHE_KEY_PREFIX
+"""
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+_SCAN_BATCH = 500
+
+
+class LRUBackend:
+    """Thread-safe in-process LRU with per-entry expiry."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Stores JSON-encoded values in a Redis-compatible client."""
+
+    def __init__(self, client, prefix='sis:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + k for k in keys))
+
+    def clear(self):
+        """Delete every key under the prefix, whichever process wrote it."""
+        # SCAN walks the keyspace in steps, so a large cache never blocks the server
+        pattern = re.sub(r'([*?[\]\\])', r'\\\1', self.prefix) + '*'
+        batch = []
+        for name in self.client.scan_iter(match=pattern, count=_SCAN_BATCH):
+            batch.append(name)
+            if len(batch) >= _SCAN_BATCH:
+                self.client.delete(*batch)
+                batch = []
+        if batch:
+            self.client.delete(*batch)
+
+
+class _CacheState:
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self.lock = threading.Lock()
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.stats[name] += n
+
+
+class ReferenceCache:
+    """Flask extension; state lives in app.extensions['reference_cache']."""
+
+    def init_app(self, app, backend=None):
+        def setting(name, default):
+            return app.config.get(name) or os.getenv(name) or default
+
+        if backend is None:
+            if setting('CACHE_BACKEND', 'lru') == 'redis':
+                import redis  # optional dependency, only needed for this backend
+                client = redis.Redis.from_url(setting('CACHE_REDIS_URL', 'redis://localhost:6379/0'))
+                backend = RedisBackend(client, prefix=setting('CACHE_KEY_PREFIX', 'sis:'))
+            else:
+                backend = LRUBackend(maxsize=int(setting('CACHE_MAXSIZE', 256)))
+        app.extensions['reference_cache'] = _CacheState(backend, float(setting('CACHE_TTL', 300)))
+
+    @property
+    def _state(self):
+        return current_app.extensions['reference_cache']
+
+    def get_or_set(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` on a miss."""
+        state = self._state
+        value = state.backend.get(key)
+        if value is not None:
+            state.count('hits')
+            return value
+        state.count('misses')
+        value = loader()
+        state.backend.set(key, value, state.ttl)
+        return value
+
+    def invalidate(self, *keys):
+        state = self._state
+        state.backend.delete(*keys)
+        state.count('invalidations', len(keys))
+
+    def clear(self):
+        self._state.backend.clear()
+
+    def stats(self):
+        state = self._state
+        with state.lock:
+            return dict(state.stats, backend=type(state.backend).__name__, ttl=state.ttl)
+
+
+cache = ReferenceCache()
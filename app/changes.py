@@ -0,0 +1,115 @@
+# app/changes.py
+"""Append-only change log behind the live changes feed (/user/api/changes).
+
+The create, update and delete handlers report which rows they touched:
+
+    changes.record(db.session, 'student', 'update', [student_id])
+    changes.record(db.session, 'student', 'reset')   # too many rows to list
+
+The entries are held in session.info and written right before commit, in
+one INSERT, so a rolled-back request logs nothing. The change_log primary
+key `seq` numbers them, and readers page forward with `seq > since`.
+
+A reader must never see seq 11 committed while seq 10 is still in flight.
+It would skip 10 for good. So record() also marks the `change_log` counter
+in table_revision. app.revisions bumps it in the same UPDATE as the table
+counters. Its before_commit hook is registered first (this module imports
+it), so the bump runs before the INSERT here. That row stays locked until
+COMMIT, which makes logging transactions take their seqs and commit one
+at a time. The lock is only held from the before_commit hooks to COMMIT.
+
+Entries older than CHANGE_LOG_MAX_AGE seconds are pruned every
+PRUNE_EVERY logging commits, but the newest entry is always kept. A
+reader whose `since` is older than what is left has missed entries;
+gap() tells it to reload.
+"""
+import itertools
+import os
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session
+
+from .models import ChangeLog
+from .revisions import TRACKED_TABLES, touch
+
+OPS = ('insert', 'update', 'delete', 'reset')
+PRUNE_EVERY = 200
+_INFO_KEY = 'change_log_entries'
+_logged_commits = itertools.count(1)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def record(session, table, op, ids=None):
+    """Log `op` on rows `ids` of `table` when the session commits.
+
+    Without ids (or for an id of None) a reset entry is logged instead:
+    readers reload the table rather than patch rows.
+    """
+    if table not in TRACKED_TABLES or op not in OPS:
+        raise ValueError(f'cannot log {op!r} on {table!r}')
+    touch(session, 'change_log')
+    entries = session.info.setdefault(_INFO_KEY, [])
+    if ids is None or op == 'reset':
+        entries.append((table, None, 'reset'))
+        return
+    entries.extend((table, row_id, op) if row_id is not None else (table, None, 'reset') for row_id in ids)
+
+
+@event.listens_for(Session, 'before_commit')
+def _write_before_commit(session):
+    entries = session.info.pop(_INFO_KEY, None)
+    if not entries:
+        return
+    now = _utcnow()
+    session.execute(insert(ChangeLog), [{'table_name': table, 'row_id': row_id, 'op': op, 'created_at': now}
+                                        for table, row_id, op in dict.fromkeys(entries)])
+    if next(_logged_commits) % PRUNE_EVERY == 0:
+        max_age = current_app.config['CHANGE_LOG_MAX_AGE'] if has_app_context() else None
+        if max_age:
+            prune(session, max_age)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+
+
+def prune(session, max_age):
+    """Delete entries older than `max_age` seconds, keeping the newest one."""
+    newest = select(func.max(ChangeLog.seq)).scalar_subquery()
+    return session.execute(delete(ChangeLog).where(ChangeLog.created_at < _utcnow() - timedelta(seconds=max_age),
+                                                   ChangeLog.seq < newest)).rowcount
+
+
+def bounds(session):
+    """(oldest seq, newest seq) still in the log; (None, None) when empty."""
+    return tuple(session.execute(select(func.min(ChangeLog.seq), func.max(ChangeLog.seq))).one())
+
+
+def gap(since, oldest, newest):
+    """True if a reader at `since` missed pruned entries (or the log was reset)."""
+    if newest is None:
+        return since > 0
+    return since < oldest - 1 or since > newest
+
+
+def read(session, since, tables, limit):
+    """Up to `limit` entries after `since` for `tables`, oldest first."""
+    return session.execute(select(ChangeLog.seq, ChangeLog.table_name, ChangeLog.row_id, ChangeLog.op)
+                           .where(ChangeLog.seq > since, ChangeLog.table_name.in_(tables))
+                           .order_by(ChangeLog.seq).limit(limit)).all()
+
+
+def init_changes(app):
+    """Read the CHANGES_* / CHANGE_LOG_* settings."""
+    app.config.setdefault('CHANGE_LOG_MAX_AGE', float(os.getenv('CHANGE_LOG_MAX_AGE', 24 * 3600)))
+    app.config.setdefault('CHANGES_POLL_INTERVAL', float(os.getenv('CHANGES_POLL_INTERVAL', 1)))
+    app.config.setdefault('CHANGES_STREAM_SECONDS', float(os.getenv('CHANGES_STREAM_SECONDS', 30)))
+    app.config.setdefault('CHANGES_HEARTBEAT', float(os.getenv('CHANGES_HEARTBEAT', 15)))
+    app.config.setdefault('CHANGES_RETRY_MS', int(os.getenv('CHANGES_RETRY_MS', 2000)))
+    app.config.setdefault('CHANGES_BATCH', int(os.getenv('CHANGES_BATCH', 500)))
@@ -0,0 +1,96 @@
+# app/compression.py
+"""gzip / brotli compression of text responses.
+
+init_compression(app) adds an after_request hook. A 200 response is
+compressed when all of these hold:
+    - the client accepts the encoding
+    - its mimetype is in COMPRESS_MIMETYPES
+    - the body is at least COMPRESS_MIN_SIZE bytes
+Brotli is used when the optional `brotli` package is installed and the
+client accepts it; gzip otherwise.
+
+Streamed responses (CSV exports) and file downloads pass through
+untouched. Static files are the exception: they are compressed once per
+file version and served from an LRU after that.
+
+A strong ETag becomes weak on a compressed response. If-None-Match still
+matches it, since that comparison is weak.
+
+Config (app.config, falling back to env vars of the same name):
+    COMPRESS_MIN_SIZE (500 bytes), COMPRESS_LEVEL (gzip, 6),
+    COMPRESS_BR_QUALITY (4)
+"""
+import gzip
+import os
+
+from flask import request
+
+from .cache import LRUBackend
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESS_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/javascript', 'application/json', 'image/svg+xml',
+})
+STATIC_CACHE_SIZE = 128
+STATIC_CACHE_TTL = 24 * 3600
+
+
+def encodings():
+    """Encodings this process can produce, in order of preference."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BR_QUALITY'])
+    # mtime=0 keeps the output (and so any cached copy) deterministic
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def init_compression(app):
+    """Register the compression hook and read the COMPRESS_* settings."""
+    app.config.setdefault('COMPRESS_MIN_SIZE', int(os.getenv('COMPRESS_MIN_SIZE', 500)))
+    app.config.setdefault('COMPRESS_LEVEL', int(os.getenv('COMPRESS_LEVEL', 6)))
+    app.config.setdefault('COMPRESS_BR_QUALITY', int(os.getenv('COMPRESS_BR_QUALITY', 4)))
+    static_cache = app.extensions['compressed_static'] = LRUBackend(maxsize=STATIC_CACHE_SIZE)
+
+    @app.after_request
+    def _compress(response):
+        if response.mimetype not in COMPRESS_MIMETYPES:
+            return response
+        # the body depends on Accept-Encoding even when this one goes out plain
+        response.vary.add('Accept-Encoding')
+        if response.status_code != 200 or 'Content-Encoding' in response.headers:
+            return response
+        static = request.endpoint == 'static'
+        if response.direct_passthrough and not static:
+            return response
+        if response.is_streamed and not static:
+            return response
+        encoding = request.accept_encodings.best_match(encodings())
+        if encoding is None:
+            return response
+
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+        etag, weak = response.get_etag()
+        if static:
+            key = f'{request.path}|{etag}|{encoding}'
+            body = static_cache.get(key)
+            if body is None:
+                body = compress(data, encoding, app.config)
+                static_cache.set(key, body, STATIC_CACHE_TTL)
+        else:
+            body = compress(data, encoding, app.config)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,11 +1,66 @@
 # app/database.py
 from flask_sqlalchemy import SQLAlchemy
-from dotenv import load_dotenv
+from sqlalchemy.pool import NullPool
 import os
 
-load_dotenv()
+from .pool_metrics import InstrumentedQueuePool, instrument_engine
+from .replicas import RoutingSession, configure_replicas
+
+# RoutingSession sends GET-request reads to read replicas when configured
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def dialect_insert(session, model):
+    """INSERT for `model` with on_conflict_do_nothing(); None if the dialect has no ON CONFLICT."""
+    dialect = session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model)
+
+
+def engine_options_from_env():
+    """Build SQLALCHEMY_ENGINE_OPTIONS for PostgreSQL from env vars.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT (s), DB_POOL_RECYCLE (s),
+    DB_POOL_PRE_PING, DB_CONNECT_TIMEOUT (s), DB_STATEMENT_TIMEOUT (ms).
+
+    DB_PGBOUNCER=1 is for a PgBouncer running in transaction mode. PgBouncer
+    already pools connections, so the app uses NullPool and sends no startup
+    `options`, which PgBouncer rejects. In that mode, set statement_timeout
+    on the database role instead.
+    """
+    connect_args = {}
+    connect_timeout = os.getenv('DB_CONNECT_TIMEOUT')
+    if connect_timeout:
+        connect_args['connect_timeout'] = int(connect_timeout)
+
+    if _env_bool('DB_PGBOUNCER', False):
+        return {'poolclass': NullPool, 'connect_args': connect_args}
+
+    statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT')
+    if statement_timeout:
+        connect_args['options'] = f'-c statement_timeout={int(statement_timeout)}'
+    return {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        'connect_args': connect_args,
+    }
 
-db = SQLAlchemy()
 
 def init_db(app):
     user = os.getenv('DB_USERNAME')
@@ -14,7 +69,22 @@ def init_db(app):
     port = os.getenv('DB_PORT', 5432)
     name = os.getenv('DB_NAME')
 
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql://{user}:{password}@{host}:{port}/{name}'
+    # DB_* vars win; without DB_NAME keep the URI create_app() took from DATABASE_URL
+    if name or not app.config.get('SQLALCHEMY_DATABASE_URI'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql://{user}:{password}@{host}:{port}/{name}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        options = engine_options_from_env()
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    configure_replicas(app)
     db.init_app(app)
+    init_pool_metrics(app)
+
 
+def init_pool_metrics(app):
+    """Instrument every engine of `app`; stats go to app.extensions['pool_stats']."""
+    with app.app_context():
+        app.extensions['pool_stats'] = {
+            key or 'default': instrument_engine(engine) for key, engine in db.engines.items()
+        }
@@ -0,0 +1,232 @@
+# app/instrumentation.py
+"""Per-request performance instrumentation and a Prometheus-style /metrics.
+
+For every request this records:
+    - total latency, by method, route rule and status
+    - SQL statement count and time (SQLAlchemy cursor events)
+    - template render time (Flask's template signals)
+    - JSON serialization time (a timing JSON provider)
+
+Login attempts and password KDF calls (app.passwords) get histograms of
+their own.
+
+The same numbers go out in a Server-Timing header, which browser dev tools
+show. Statements slower than SLOW_QUERY_MS (default 200) are logged with
+their SQL on the `app.slow_query` logger.
+
+Metrics live in process memory, so each worker process reports its own.
+"""
+import logging
+import os
+import threading
+import time
+
+from flask import Response, current_app, g, has_app_context, has_request_context, request
+from flask import before_render_template, template_rendered
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_logger = logging.getLogger('app.slow_query')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+
+    def observe(self, label_values, value):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        series[1] += 1
+        series[2] += value
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for label_values, (counts, total, value_sum) in sorted(self._series.items()):
+            base = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            sep = ',' if base else ''
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {total}')
+            lines.append(f'{self.name}_count{{{base}}} {total}')
+            lines.append(f'{self.name}_sum{{{base}}} {value_sum:.6f}')
+        return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Thread-safe registry of the request histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        labels = ('method', 'route', 'status')
+        self.request_seconds = Histogram('sis_request_duration_seconds', 'Request latency.', labels)
+        self.sql_statements = Histogram('sis_request_sql_statements', 'SQL statements per request.',
+                                        labels, COUNT_BUCKETS)
+        self.sql_seconds = Histogram('sis_request_sql_seconds', 'SQL time per request.', labels)
+        self.template_seconds = Histogram('sis_request_template_seconds', 'Template render time per request.',
+                                          labels)
+        self.json_seconds = Histogram('sis_request_json_seconds', 'JSON serialization time per request.', labels)
+        # app.passwords
+        self.login_seconds = Histogram('sis_login_duration_seconds', 'Login attempt latency.', ('outcome',))
+        self.password_hash_seconds = Histogram('sis_password_hash_seconds',
+                                               'Password hash/verify time, including the wait for a KDF thread.',
+                                               ('operation',))
+        self.slow_queries = 0
+        self._extra = []
+
+    def observe_request(self, labels, total, sql_count, sql_time, template_time, json_time):
+        with self._lock:
+            self.request_seconds.observe(labels, total)
+            self.sql_statements.observe(labels, sql_count)
+            self.sql_seconds.observe(labels, sql_time)
+            self.template_seconds.observe(labels, template_time)
+            self.json_seconds.observe(labels, json_time)
+
+    def observe(self, histogram, labels, value):
+        with self._lock:
+            histogram.observe(labels, value)
+
+    def count_slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def add_collector(self, collect):
+        """Register `collect() -> [(name, help, labels, value), ...]` rendered as gauges."""
+        self._extra.append(collect)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for hist in (self.request_seconds, self.sql_statements, self.sql_seconds,
+                         self.template_seconds, self.json_seconds, self.login_seconds,
+                         self.password_hash_seconds):
+                lines += hist.render()
+            lines += ['# HELP sis_slow_queries_total Statements slower than SLOW_QUERY_MS.',
+                      '# TYPE sis_slow_queries_total counter',
+                      f'sis_slow_queries_total {self.slow_queries}']
+        gauges = {}
+        for collect in self._extra:
+            for name, help_text, labels, value in collect():
+                gauges.setdefault(name, (help_text, []))[1].append((labels, value))
+        for name, (help_text, samples) in gauges.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+            for labels, value in samples:
+                base = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f'{name}{{{base}}} {value}' if base else f'{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider that adds its encode time to the current request."""
+
+    def dumps(self, obj, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            if has_request_context():
+                g.perf_json_time = g.get('perf_json_time', 0.0) + time.perf_counter() - start
+
+
+# the start time lives on the statement's execution context, which is
+# dropped with the statement; a statement that raises (and so never reaches
+# after_cursor_execute) leaves nothing behind on the pooled connection
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._perf_start = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, '_perf_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    if has_request_context():
+        g.perf_sql_count = g.get('perf_sql_count', 0) + 1
+        g.perf_sql_time = g.get('perf_sql_time', 0.0) + elapsed
+    if has_app_context() and 'perf_metrics' in current_app.extensions:
+        threshold = current_app.config['SLOW_QUERY_MS'] / 1000.0
+        if elapsed >= threshold:
+            current_app.extensions['perf_metrics'].count_slow_query()
+            route = request.path if has_request_context() else '-'
+            slow_query_logger.warning('slow query (%.1f ms) during %s: %s', elapsed * 1000, route, statement)
+
+
+def _before_render(sender, template, context, **extra):
+    if has_request_context():
+        g.perf_template_start = time.perf_counter()
+
+
+def _after_render(sender, template, context, **extra):
+    if has_request_context() and g.get('perf_template_start') is not None:
+        g.perf_template_time = g.get('perf_template_time', 0.0) + time.perf_counter() - g.perf_template_start
+        g.perf_template_start = None
+
+
+def init_instrumentation(app):
+    """Install the request hooks and the /metrics endpoint on `app`."""
+    metrics = Metrics()
+    app.extensions['perf_metrics'] = metrics
+    app.config.setdefault('SLOW_QUERY_MS', float(os.getenv('SLOW_QUERY_MS', 200)))
+    app.json = TimedJSONProvider(app)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def _start_timer():
+        g.perf_start = time.perf_counter()
+
+    @app.after_request
+    def _record(response):
+        start = g.get('perf_start')
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        sql_count, sql_time = g.get('perf_sql_count', 0), g.get('perf_sql_time', 0.0)
+        template_time, json_time = g.get('perf_template_time', 0.0), g.get('perf_json_time', 0.0)
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.observe_request((request.method, route, str(response.status_code)),
+                                total, sql_count, sql_time, template_time, json_time)
+        response.headers['Server-Timing'] = (
+            f'db;dur={sql_time * 1000:.1f};desc="{sql_count} queries", '
+            f'tpl;dur={template_time * 1000:.1f}, json;dur={json_time * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}')
+        return response
+
+    def _collect_pool():
+        for key, stats in app.extensions.get('pool_stats', {}).items():
+            for name, value in stats.snapshot().items():
+                yield f'sis_pool_{name}', 'Connection pool statistic.', {'engine': key}, value
+
+    def _collect_cache():
+        state = app.extensions.get('reference_cache')
+        if state is not None:
+            for name, value in state.stats.items():
+                yield f'sis_cache_{name}', 'Reference-data cache counter.', {}, value
+
+    metrics.add_collector(_collect_pool)
+    metrics.add_collector(_collect_cache)
+
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    return metrics
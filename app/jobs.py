@@ -0,0 +1,327 @@
+# app/jobs.py
+"""Database-backed background jobs with no external broker.
+
+Views enqueue work with enqueue(kind, **params) and return the job id at
+once. `flask jobs worker` claims queued rows from the `job` table and runs
+the handler registered for `kind` with @task(kind). Use --threads for a
+thread pool and --processes for several worker processes.
+
+Claiming is a conditional UPDATE (... WHERE id = ? AND status = 'queued').
+It works the same on PostgreSQL and SQLite, and any number of workers can
+poll the same table: a row is claimed by exactly one of them.
+
+A handler gets (params, progress). Calling progress(done, total=None)
+records progress and refreshes the heartbeat. It commits the session, so
+call it between units of work. A job whose heartbeat is older than
+JOBS_STALE_SECONDS (default 600) is treated as abandoned by a dead worker
+and is claimed again, up to JOBS_MAX_ATTEMPTS (default 3) runs in total.
+
+Handlers that cannot call progress() while they run (an export holding a
+streamed query, a stats rebuild or a set-based bulk edit in one statement)
+are still kept alive. While any handler runs, a side thread refreshes the
+heartbeat every JOBS_HEARTBEAT_SECONDS (default 60) on its own connection.
+
+A claim is identified by (worker, attempts). Heartbeats, progress and the
+final status are all written with WHERE worker = ? AND attempts = ?. So a
+run whose job was claimed again (it stalled past JOBS_STALE_SECONDS) cannot
+overwrite the new run's progress or outcome. Its progress() raises JobLost
+and its result is dropped.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, or_, select, update
+
+from .database import db
+from .models import Job
+
+logger = logging.getLogger('app.jobs')
+
+STATUSES = ('queued', 'running', 'done', 'failed')
+PROGRESS_INTERVAL = 0.5
+
+_handlers = {}
+
+
+def task(kind):
+    """Register the decorated function as the handler for jobs of `kind`."""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+class JobLost(Exception):
+    """The job was claimed again by another run; this run must stop."""
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def job_dir():
+    """Directory for job input/output files (JOBS_DIR), created on demand."""
+    path = current_app.config.get('JOBS_DIR') or os.path.join(current_app.instance_path, 'jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def enqueue(kind, **params):
+    """Queue a job and commit; returns the new job id."""
+    if kind not in _handlers:
+        raise ValueError(f'unknown job kind {kind!r}')
+    job = Job(kind=kind, status='queued', params=json.dumps(params), created_at=_utcnow())
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def job_dict(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': {'done': job.progress_done, 'total': job.progress_total},
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'attempts': job.attempts,
+        'created_at': job.created_at.isoformat() + 'Z' if job.created_at else None,
+        'started_at': job.started_at.isoformat() + 'Z' if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() + 'Z' if job.finished_at else None,
+    }
+
+
+def claim(worker):
+    """Mark the oldest runnable job as running for `worker`; returns its id or None."""
+    config = current_app.config
+    stale = and_(Job.status == 'running', Job.heartbeat_at < _utcnow() - timedelta(
+        seconds=config['JOBS_STALE_SECONDS']))
+    # abandoned too often: give up instead of retrying forever
+    db.session.execute(update(Job).where(stale, Job.attempts >= config['JOBS_MAX_ATTEMPTS'])
+                       .values(status='failed', error='abandoned by its worker', finished_at=_utcnow())
+                       .execution_options(synchronize_session=False))
+    # a few candidates, so a worker that loses a race can try the next one
+    candidates = db.session.execute(select(Job.id, Job.status, Job.heartbeat_at)
+                                    .where(or_(Job.status == 'queued', stale))
+                                    .order_by(Job.id).limit(5)).all()
+    db.session.commit()
+    for job_id, status, heartbeat in candidates:
+        unchanged = Job.heartbeat_at.is_(None) if heartbeat is None else Job.heartbeat_at == heartbeat
+        now = _utcnow()
+        result = db.session.execute(
+            update(Job).where(Job.id == job_id, Job.status == status, unchanged)
+            .values(status='running', worker=worker, attempts=Job.attempts + 1, started_at=now, heartbeat_at=now)
+            .execution_options(synchronize_session=False))
+        db.session.commit()
+        if result.rowcount == 1:
+            return job_id
+    return None
+
+
+def _owned(claim):
+    """WHERE criteria matching job claim (id, worker, attempts) while it still runs."""
+    job_id, worker, attempts = claim
+    return [Job.id == job_id, Job.status == 'running', Job.worker == worker, Job.attempts == attempts]
+
+
+class _Heartbeat(threading.Thread):
+    """Refreshes a running job's heartbeat on its own connection until stopped."""
+
+    def __init__(self, engine, claim, interval):
+        super().__init__(name=f'job-heartbeat-{claim[0]}', daemon=True)
+        self.engine = engine
+        self.claim = claim
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                with self.engine.begin() as conn:
+                    beat = conn.execute(update(Job).where(*_owned(self.claim)).values(heartbeat_at=_utcnow()))
+                if beat.rowcount != 1:
+                    return  # claimed again; run() drops this run's outcome
+            except Exception:
+                logger.exception('job %s: heartbeat failed', self.claim[0])
+
+
+class Progress:
+    """Callable handed to handlers; writes at most every PROGRESS_INTERVAL seconds.
+
+    Raises JobLost when the job has been claimed again.
+    """
+
+    def __init__(self, claim):
+        self.claim = claim
+        self._last = 0.0
+
+    def __call__(self, done, total=None, force=False):
+        now = time.monotonic()
+        if not force and now - self._last < PROGRESS_INTERVAL:
+            return
+        self._last = now
+        result = db.session.execute(update(Job).where(*_owned(self.claim))
+                                    .values(progress_done=done, progress_total=total, heartbeat_at=_utcnow())
+                                    .execution_options(synchronize_session=False))
+        db.session.commit()
+        if result.rowcount != 1:
+            raise JobLost()
+
+
+def run(job_id):
+    """Run a claimed job in the current app context and record the outcome.
+
+    Returns the final status, or 'lost' when the job was claimed again
+    meanwhile (the newer run records the outcome).
+    """
+    job = db.session.get(Job, job_id)
+    claim = (job_id, job.worker, job.attempts)
+    handler = _handlers.get(job.kind)
+    params = json.loads(job.params or '{}')
+    db.session.commit()
+    heartbeat = _Heartbeat(db.engine, claim, current_app.config['JOBS_HEARTBEAT_SECONDS'])
+    heartbeat.start()
+    try:
+        if handler is None:
+            raise LookupError(f'no handler registered for {job.kind!r}')
+        result = handler(params, Progress(claim))
+        values = {'status': 'done', 'result': json.dumps(result)}
+    except JobLost:
+        db.session.rollback()
+        values = None
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('job %s (%s) failed', job_id, job.kind)
+        values = {'status': 'failed',
+                  'error': ''.join(traceback.format_exception_only(type(e), e)).strip()}
+    finally:
+        heartbeat.stopped.set()
+    if values is not None:
+        values['finished_at'] = _utcnow()
+        finished = db.session.execute(update(Job).where(*_owned(claim)).values(**values)
+                                      .execution_options(synchronize_session=False))
+        db.session.commit()
+        if finished.rowcount == 1:
+            return values['status']
+    logger.warning('job %s was claimed again by another worker; dropping this run', job_id)
+    return 'lost'
+
+
+def run_pending(worker='inline'):
+    """Run queued jobs one after another until none are left; returns how many ran."""
+    count = 0
+    while True:
+        job_id = claim(worker)
+        if job_id is None:
+            return count
+        run(job_id)
+        count += 1
+
+
+def work(app, threads=1, poll=1.0, once=False, stop=None):
+    """Worker loop: `threads` threads claiming and running jobs.
+
+    With once=True each thread exits when the queue is empty. Otherwise the
+    threads poll every `poll` seconds until `stop` (a threading.Event) is set.
+    """
+    stop = stop or threading.Event()
+    name = f'{socket.gethostname()}:{os.getpid()}'
+
+    def loop(n):
+        worker = f'{name}:{n}'
+        while not stop.is_set():
+            with app.app_context():
+                try:
+                    job_id = claim(worker)
+                    if job_id is not None:
+                        logger.info('%s running job %s', worker, job_id)
+                        run(job_id)
+                        continue
+                except Exception:
+                    logger.exception('%s: worker loop error', worker)
+                finally:
+                    db.session.remove()
+            if once:
+                return
+            stop.wait(poll)
+
+    pool = [threading.Thread(target=loop, args=(n,), name=f'job-worker-{n}', daemon=True)
+            for n in range(threads)]
+    for t in pool:
+        t.start()
+    try:
+        for t in pool:
+            while t.is_alive():
+                t.join(0.5)
+    except KeyboardInterrupt:
+        stop.set()
+        for t in pool:
+            t.join()
+
+
+def _process_main(threads, poll, once):
+    # spawned children build their own app, so no connection crosses a fork
+    from . import create_app
+    work(create_app(), threads=threads, poll=poll, once=once)
+
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+
+@jobs_cli.command('worker')
+@click.option('--threads', default=None, type=int, help='Worker threads per process (JOBS_THREADS).')
+@click.option('--processes', default=1, show_default=True, help='Worker processes.')
+@click.option('--poll', default=None, type=float, help='Seconds between polls of an empty queue.')
+@click.option('--once', is_flag=True, help='Exit when the queue is empty.')
+def worker_command(threads, processes, poll, once):
+    """Claim and run queued jobs."""
+    app = current_app._get_current_object()
+    threads = threads or app.config['JOBS_THREADS']
+    poll = poll or app.config['JOBS_POLL_SECONDS']
+    if processes <= 1:
+        work(app, threads=threads, poll=poll, once=once)
+        return
+    ctx = multiprocessing.get_context('spawn')
+    children = [ctx.Process(target=_process_main, args=(threads, poll, once)) for _ in range(processes)]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+
+
+@jobs_cli.command('list')
+@click.option('--status', type=click.Choice(STATUSES))
+@click.option('--limit', default=20, show_default=True)
+def list_command(status, limit):
+    """Show the most recent jobs."""
+    q = Job.query.order_by(Job.id.desc())
+    if status:
+        q = q.filter(Job.status == status)
+    for job in q.limit(limit):
+        total = f'/{job.progress_total}' if job.progress_total is not None else ''
+        click.echo(f'{job.id:6d}  {job.kind:20s} {job.status:8s} {job.progress_done}{total}  {job.error or ""}')
+
+
+def init_jobs(app):
+    """Read the JOBS_* settings and register the `flask jobs` commands."""
+    app.config.setdefault('JOBS_DIR', os.getenv('JOBS_DIR'))
+    app.config.setdefault('JOBS_THREADS', int(os.getenv('JOBS_THREADS', 2)))
+    app.config.setdefault('JOBS_POLL_SECONDS', float(os.getenv('JOBS_POLL_SECONDS', 1.0)))
+    app.config.setdefault('JOBS_STALE_SECONDS', float(os.getenv('JOBS_STALE_SECONDS', 600)))
+    app.config.setdefault('JOBS_HEARTBEAT_SECONDS', float(os.getenv('JOBS_HEARTBEAT_SECONDS', 60)))
+    app.config.setdefault('JOBS_MAX_ATTEMPTS', int(os.getenv('JOBS_MAX_ATTEMPTS', 3)))
+    app.cli.add_command(jobs_cli)
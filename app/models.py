@@ -12,6 +12,12 @@ class User(UserMixin, db.Model):
     
 class Student (db.Model):
     __tablename__ = 'student'
+    # see migration b7e3a1d95c42 for the query plans behind these indexes
+    __table_args__ = (
+        db.Index('ix_student_program_id_year', 'program_id', 'year'),
+        db.Index('ix_student_last_name_id', 'last_name', 'id'),
+        db.Index('ix_student_first_name_id', 'first_name', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     # formatted student identifier (example: "2023-1231")
     id_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -24,18 +30,80 @@ class Student (db.Model):
     # link to Program table (course/program)
     program_id = db.Column(db.Integer, db.ForeignKey('program.id'), nullable=False)
     program = db.relationship('Program', backref='students', lazy=True)
+    # row version for optimistic concurrency (see app.user.editing)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
 
 class Program(db.Model):
     __tablename__ = 'program'
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(10), unique=True, nullable=False)
-    name = db.Column(db.String(100), nullable=False)
-    college_id = db.Column(db.Integer, db.ForeignKey('college.id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    college_id = db.Column(db.Integer, db.ForeignKey('college.id'), nullable=False, index=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
 
 class College(db.Model):
     __tablename__ = 'college'
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(10), unique=True, nullable=False)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    __mapper_args__ = {'version_id_col': version}
 
-    programs = db.relationship('Program', backref='college', lazy=True)
\ No newline at end of file
+    programs = db.relationship('Program', backref='college', lazy=True)
+
+
+class TableRevision(db.Model):
+    """Per-table write counter, bumped by app.revisions on every commit that
+    changes the table; used as a cheap version marker for ETags."""
+    __tablename__ = 'table_revision'
+    table_name = db.Column(db.String(50), primary_key=True)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+
+
+class StudentStat(db.Model):
+    """Student head count per (program, year, gender), kept current by
+    app.stats. Missing years/genders are stored as 0 / ''. There is no FK
+    to program, so a program and its counters can be removed in either order."""
+    __tablename__ = 'student_stat'
+    program_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    gender = db.Column(db.String(10), primary_key=True)
+    student_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Job(db.Model):
+    """A unit of background work run by `flask jobs worker` (see app.jobs)."""
+    __tablename__ = 'job'
+    __table_args__ = (db.Index('ix_job_status_id', 'status', 'id'),)
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # queued -> running -> done | failed
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    params = db.Column(db.Text, nullable=False, default='{}')
+    result = db.Column(db.Text)
+    error = db.Column(db.Text)
+    progress_done = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(100))
+    created_at = db.Column(db.DateTime, nullable=False)
+    started_at = db.Column(db.DateTime)
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+
+class ChangeLog(db.Model):
+    """Append-only list of row changes behind the /user/api/changes feed
+    (see app.changes). row_id NULL means "many rows changed": readers
+    reload the table instead of patching rows."""
+    __tablename__ = 'change_log'
+    # AUTOINCREMENT: SQLite must not hand out a pruned seq again
+    __table_args__ = (db.Index('ix_change_log_created_at', 'created_at'), {'sqlite_autoincrement': True})
+    seq = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(50), nullable=False)
+    row_id = db.Column(db.Integer)
+    # insert | update | delete | reset
+    op = db.Column(db.String(10), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,260 @@
+# app/passwords.py
+"""Password hashing and login checks with bounded cost.
+
+Hashes use scrypt from hashlib, so no extra dependency is needed. They are
+stored as
+    scrypt$n=<N>,r=<r>,p=<p>$<salt>$<key>
+with the salt and key base64-encoded without padding. That is about 90
+characters, which fits User.password_hash (128). The cost comes from
+PASSWORD_SCRYPT_N, _R and _P, which default to Django's 2**14 / 8 / 1:
+16 MB and tens of milliseconds per hash. A hash made with other
+parameters, or by werkzeug.security, still verifies. authenticate()
+replaces it with a current one after a successful login, so raising the
+cost needs no migration.
+
+Every hash and verify runs on a pool of PASSWORD_HASH_THREADS threads.
+hashlib.scrypt releases the GIL, so these threads run in parallel. At
+most PASSWORD_HASH_QUEUE calls may wait for a thread. Past that,
+HashingBusy is raised at once, and the login view answers 503 instead of
+letting a burst of logins tie up every worker and all of its memory.
+The pool starts on first use, so it is never inherited by a forked child.
+
+Each client IP gets LOGIN_RATE_LIMIT attempts per LOGIN_RATE_WINDOW
+seconds. Further attempts raise LoginThrottled, which the view answers
+with 429. The counts live in process memory, so each worker process
+limits on its own. The client IP is request.remote_addr. Behind a reverse
+proxy, set SERVE_TRUSTED_PROXIES (app.serve) so that it is the client's
+address and not the proxy's, since otherwise all clients share one bucket.
+
+Login latency (by outcome) and KDF time (by operation) are exported on
+/metrics.
+"""
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app
+from werkzeug.security import check_password_hash
+
+from .database import db
+from .models import User
+
+SCHEME = 'scrypt'
+SALT_BYTES = 16
+KEY_BYTES = 32
+RATE_LIMIT_KEYS = 10000
+
+
+class HashingBusy(Exception):
+    """Every KDF thread and queue slot is taken (or the wait timed out)."""
+
+
+class LoginThrottled(Exception):
+    """Too many login attempts from one client."""
+
+    def __init__(self, retry_after):
+        super().__init__(f'too many login attempts; retry in {retry_after} s')
+        self.retry_after = retry_after
+
+
+def _b64(data):
+    return base64.b64encode(data).decode().rstrip('=')
+
+
+def _unb64(text):
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def _scrypt(password, salt, n, r, p):
+    # 128 * N * r bytes of working memory, plus headroom
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=128 * n * r * (p + 1) + 2 ** 20, dklen=KEY_BYTES)
+
+
+def hash_password(password, n, r, p):
+    """Encode a fresh scrypt hash of `password` with the given cost."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    return f'{SCHEME}$n={n},r={r},p={p}${_b64(salt)}${_b64(_scrypt(password, salt, n, r, p))}'
+
+
+def _parse(stored):
+    scheme, params, salt, key = stored.split('$')
+    if scheme != SCHEME:
+        raise ValueError(scheme)
+    cost = dict(item.split('=') for item in params.split(','))
+    return int(cost['n']), int(cost['r']), int(cost['p']), _unb64(salt), _unb64(key)
+
+
+def verify_password(password, stored):
+    """True if `password` matches `stored` (this module's format or werkzeug's)."""
+    if not stored.startswith(SCHEME + '$'):
+        return check_password_hash(stored, password)
+    try:
+        n, r, p, salt, key = _parse(stored)
+    except (ValueError, KeyError):
+        return False
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), key)
+
+
+def needs_rehash(stored, n, r, p):
+    """True if `stored` was not made with the current scheme and cost."""
+    try:
+        return _parse(stored)[:3] != (n, r, p)
+    except (ValueError, KeyError):
+        return True
+
+
+class RateLimiter:
+    """Sliding-window attempt counter per key, holding at most RATE_LIMIT_KEYS keys."""
+
+    def __init__(self):
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, window):
+        """Record an attempt; returns 0 if allowed, else seconds until the next one is."""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.pop(key, None) or deque()
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            self._hits[key] = hits
+            if len(self._hits) > RATE_LIMIT_KEYS:
+                self._hits.popitem(last=False)
+            if len(hits) >= limit:
+                return max(1, int(hits[0] + window - now + 1))
+            hits.append(now)
+            return 0
+
+
+class PasswordService:
+    """Bounded KDF thread pool and login rate limiter for one app."""
+
+    def __init__(self, app):
+        self.app = app
+        self.limiter = RateLimiter()
+        self._executor = None
+        self._slots = None
+        self._dummy = {}
+        self._lock = threading.Lock()
+
+    def cost(self):
+        config = self.app.config
+        return config['PASSWORD_SCRYPT_N'], config['PASSWORD_SCRYPT_R'], config['PASSWORD_SCRYPT_P']
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                threads = self.app.config['PASSWORD_HASH_THREADS']
+                self._executor = ThreadPoolExecutor(threads, thread_name_prefix='password-kdf')
+                self._slots = threading.BoundedSemaphore(threads + self.app.config['PASSWORD_HASH_QUEUE'])
+            return self._executor, self._slots
+
+    def run(self, operation, fn, *args):
+        """Run fn(*args) on the KDF pool and wait for it; raises HashingBusy."""
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise HashingBusy()
+        start = time.perf_counter()
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda f: slots.release())
+        try:
+            return future.result(self.app.config['PASSWORD_HASH_TIMEOUT'])
+        except FutureTimeout:
+            raise HashingBusy() from None
+        finally:
+            metrics = self.app.extensions.get('perf_metrics')
+            if metrics is not None:
+                metrics.observe(metrics.password_hash_seconds, (operation,), time.perf_counter() - start)
+
+    def hash(self, password):
+        return self.run('hash', hash_password, password, *self.cost())
+
+    def verify(self, password, stored):
+        return self.run('verify', verify_password, password, stored)
+
+    def dummy_hash(self):
+        """A hash at the current cost, checked for unknown users so they take as long."""
+        cost = self.cost()
+        if cost not in self._dummy:
+            self._dummy[cost] = self.hash(secrets.token_urlsafe(16))
+        return self._dummy[cost]
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = self._slots = None
+
+
+def _service():
+    return current_app.extensions['passwords']
+
+
+def set_password(user, password):
+    """Store a current-cost hash of `password` on `user` (the caller commits)."""
+    user.password_hash = _service().hash(password)
+
+
+def authenticate(username, password, client):
+    """The User for valid credentials, else None.
+
+    Raises LoginThrottled when `client` (an IP address) has used up its
+    attempts, and HashingBusy when the KDF pool is saturated. An outdated
+    hash is replaced on success.
+    """
+    service = _service()
+    config = current_app.config
+    start = time.perf_counter()
+    outcome = 'failure'
+    try:
+        retry_after = service.limiter.hit(client, config['LOGIN_RATE_LIMIT'], config['LOGIN_RATE_WINDOW'])
+        if retry_after:
+            outcome = 'throttled'
+            raise LoginThrottled(retry_after)
+        user = db.session.execute(db.select(User).filter_by(username=username)).scalar_one_or_none()
+        stored = user.password_hash if user is not None else service.dummy_hash()
+        try:
+            ok = service.verify(password, stored)
+        except HashingBusy:
+            outcome = 'busy'
+            raise
+        if user is None or not ok:
+            return None
+        if needs_rehash(stored, *service.cost()):
+            try:
+                set_password(user, password)
+                db.session.commit()
+            except HashingBusy:
+                pass  # keep the old hash; the next login retries
+        outcome = 'success'
+        return user
+    finally:
+        metrics = current_app.extensions.get('perf_metrics')
+        if metrics is not None:
+            metrics.observe(metrics.login_seconds, (outcome,), time.perf_counter() - start)
+
+
+def init_passwords(app):
+    """Read the PASSWORD_* / LOGIN_* settings and attach the service to `app`."""
+    app.config.setdefault('PASSWORD_SCRYPT_N', int(os.getenv('PASSWORD_SCRYPT_N', 2 ** 14)))
+    app.config.setdefault('PASSWORD_SCRYPT_R', int(os.getenv('PASSWORD_SCRYPT_R', 8)))
+    app.config.setdefault('PASSWORD_SCRYPT_P', int(os.getenv('PASSWORD_SCRYPT_P', 1)))
+    app.config.setdefault('PASSWORD_HASH_THREADS',
+                          int(os.getenv('PASSWORD_HASH_THREADS', min(4, os.cpu_count() or 1))))
+    app.config.setdefault('PASSWORD_HASH_QUEUE', int(os.getenv('PASSWORD_HASH_QUEUE', 16)))
+    app.config.setdefault('PASSWORD_HASH_TIMEOUT', float(os.getenv('PASSWORD_HASH_TIMEOUT', 5)))
+    app.config.setdefault('LOGIN_RATE_LIMIT', int(os.getenv('LOGIN_RATE_LIMIT', 10)))
+    app.config.setdefault('LOGIN_RATE_WINDOW', float(os.getenv('LOGIN_RATE_WINDOW', 60)))
+    service = app.extensions['passwords'] = PasswordService(app)
+    return service
@@ -0,0 +1,99 @@
+# app/pool_metrics.py
+"""Connection pool instrumentation.
+
+`instrument_engine(engine)` attaches pool/engine event hooks that count
+connects, checkouts, checkins, invalidations and connection errors. With
+InstrumentedQueuePool it also records how long each checkout waited for a
+free connection. `PoolStats.snapshot()` adds the live gauges (size, checked
+out, overflow) so workers can be sized against Postgres max_connections.
+"""
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# checkouts slower than this count as having waited for a connection
+WAIT_THRESHOLD = 0.001
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {
+            'connects': 0,
+            'checkouts': 0,
+            'checkins': 0,
+            'invalidations': 0,
+            'connect_errors': 0,
+            'waits': 0,
+        }
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.pool = None
+
+    def incr(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if seconds >= WAIT_THRESHOLD:
+                self.counters['waits'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            data = dict(self.counters, wait_seconds_total=round(self.wait_seconds_total, 6),
+                        wait_seconds_max=round(self.wait_seconds_max, 6))
+        pool = self.pool
+        if isinstance(pool, QueuePool):
+            data.update(pool_size=pool.size(), checked_out=pool.checkedout(), overflow=max(0, pool.overflow()))
+        return data
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long checkouts wait for a connection."""
+
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep reporting to the same stats
+        pool = super().recreate()
+        pool.stats = self.stats
+        if self.stats is not None:
+            self.stats.pool = pool
+        return pool
+
+
+def instrument_engine(engine, stats=None):
+    """Attach counting hooks to `engine` and its pool; returns the PoolStats."""
+    stats = stats or PoolStats()
+    stats.pool = engine.pool
+    if isinstance(engine.pool, InstrumentedQueuePool):
+        engine.pool.stats = stats
+
+    event.listen(engine, 'connect', lambda *a: stats.incr('connects'))
+    event.listen(engine, 'checkout', lambda *a: stats.incr('checkouts'))
+    event.listen(engine, 'checkin', lambda *a: stats.incr('checkins'))
+    event.listen(engine, 'invalidate', lambda *a: stats.incr('invalidations'))
+
+    @event.listens_for(engine, 'handle_error')
+    def _on_error(context):
+        if context.is_disconnect or context.connection is None:
+            stats.incr('connect_errors')
+            logger.warning('database connection error: %s', context.original_exception)
+
+    return stats
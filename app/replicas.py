@@ -0,0 +1,74 @@
+# app/replicas.py
+"""Read-replica routing.
+
+Replica URIs come from app.config['SQLALCHEMY_REPLICA_URIS'] or the
+comma-separated DB_REPLICA_URLS env var. They are registered as
+`replica_<n>` binds. Each GET/HEAD request is given one replica, round-robin,
+and RoutingSession sends all of that request's SELECTs to it. Reads that
+belong together (revision counters and the rows they describe, a change_log
+entry and its row) then come from the same snapshot lag, never from two
+replicas that are behind by different amounts. Flushes, DML and every other
+request method go to the primary.
+
+Read-your-writes: a successful write request pins the browser session to
+the primary for DB_REPLICA_STICKY_SECONDS (default 5). The page loaded
+after a save's redirect therefore sees the save, even if the replicas lag.
+"""
+import itertools
+import os
+import time
+
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+_SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_STICKY_KEY = 'db_primary_until'
+_rotation = itertools.count()
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends request-time reads to replicas."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and getattr(clause, 'is_select', False):
+            key = _request_replica()
+            if key is not None:
+                return self._db.engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _request_replica():
+    """The replica bind chosen for this request, or None for the primary."""
+    return g.get('db_read_replica') if has_request_context() else None
+
+
+def configure_replicas(app, uris=None):
+    """Register replica binds and the routing hooks; call before db.init_app()."""
+    if uris is None:
+        uris = app.config.get('SQLALCHEMY_REPLICA_URIS') or \
+            [u.strip() for u in os.getenv('DB_REPLICA_URLS', '').split(',') if u.strip()]
+    if not uris:
+        return
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    keys = []
+    for i, uri in enumerate(uris):
+        binds[f'replica_{i}'] = uri
+        keys.append(f'replica_{i}')
+    app.extensions['db_replicas'] = keys
+    app.config.setdefault('DB_REPLICA_STICKY_SECONDS', float(os.getenv('DB_REPLICA_STICKY_SECONDS', 5)))
+    app.before_request(_choose_route)
+    app.after_request(_remember_write)
+
+
+def _choose_route():
+    if request.method in _SAFE_METHODS and time.time() >= session.get(_STICKY_KEY, 0):
+        replicas = current_app.extensions['db_replicas']
+        g.db_read_replica = replicas[next(_rotation) % len(replicas)]
+    else:
+        g.db_read_replica = None
+
+
+def _remember_write(response):
+    if request.method not in _SAFE_METHODS and response.status_code < 400:
+        session[_STICKY_KEY] = time.time() + current_app.config['DB_REPLICA_STICKY_SECONDS']
+    return response
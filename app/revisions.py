@@ -0,0 +1,147 @@
+# app/revisions.py
+"""Per-table revision counters and conditional GET (ETag) support.
+
+Session hooks note which tracked tables a transaction wrote, through ORM
+flushes or bulk insert/update/delete statements. Right before commit they
+bump those tables' counters in `table_revision`, so the counters always
+move together with the data.
+
+`conditional(*tables)` wraps a GET view. It derives a weak ETag from those
+counters and answers If-None-Match with 304 without calling the view, so
+the listing query never runs.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, make_response, request, session
+from flask_login import current_user
+from flask_wtf.csrf import generate_csrf
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from .database import db, dialect_insert
+from .models import TableRevision
+
+TRACKED_TABLES = {'college', 'program', 'student'}
+_INFO_KEY = 'changed_tables'
+_REQUEST_KEY = 'table_revisions'
+
+
+def _note(session, table_name):
+    if table_name in TRACKED_TABLES:
+        session.info.setdefault(_INFO_KEY, set()).add(table_name)
+
+
+def touch(session, name):
+    """Bump counter `name` with the others at this session's next commit.
+
+    The counter row stays locked until COMMIT (see app.changes).
+    """
+    session.info.setdefault(_INFO_KEY, set()).add(name)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed(session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        _note(session, getattr(obj, '__tablename__', None))
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            _note(session, getattr(obj, '__tablename__', None))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        _note(orm_execute_state.session, getattr(table, 'name', None))
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_before_commit(session):
+    session.flush()
+    tables = session.info.pop(_INFO_KEY, None)
+    if tables:
+        bump(session, tables)
+        if has_request_context():
+            g.pop(_REQUEST_KEY, None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+
+
+def bump(session, tables):
+    """Increment the counters for `tables` inside the session's transaction."""
+    tables = sorted(tables)
+    stmt = (update(TableRevision).where(TableRevision.table_name.in_(tables))
+            .values(revision=TableRevision.revision + 1).execution_options(synchronize_session=False))
+    if session.execute(stmt).rowcount == len(tables):
+        return
+    # counters are seeded by the migration; create_all() (tests) starts empty.
+    # Concurrent first writers may both get here: ON CONFLICT DO NOTHING lets
+    # both create the missing rows, and the repeated UPDATE bumps every
+    # counter (some twice, which only moves their ETags on once more)
+    insert = dialect_insert(session, TableRevision)
+    if insert is None:
+        raise RuntimeError(f'table_revision has no row for some of {tables}; run `flask db upgrade`')
+    session.execute(insert.on_conflict_do_nothing(index_elements=[TableRevision.table_name]),
+                    [{'table_name': t, 'revision': 0} for t in tables])
+    session.execute(stmt)
+
+
+def current_revisions(*tables):
+    """Return {table_name: revision} for `tables` in one query.
+
+    Within a request the result is remembered until the request commits a
+    write, so the ETag check and cached serializations share one query.
+    """
+    seen = g.setdefault(_REQUEST_KEY, {}) if has_request_context() else {}
+    missing = [t for t in tables if t not in seen]
+    if missing:
+        revs = dict(db.session.query(TableRevision.table_name, TableRevision.revision)
+                    .filter(TableRevision.table_name.in_(missing)))
+        seen.update({t: revs.get(t, 0) for t in missing})
+    return {t: seen[t] for t in tables}
+
+
+def compute_etag(tables, html=False):
+    """ETag for the current request given the revisions of `tables`.
+
+    HTML pages embed a CSRF token, so their tag also varies with the session's
+    CSRF secret and rolls over every half WTF_CSRF_TIME_LIMIT; a revalidated
+    page therefore never carries an expired token. They also show the
+    logged-in user's name, so the tag varies with the user too.
+    """
+    revs = current_revisions(*tables)
+    parts = [request.full_path] + [f'{t}:{revs[t]}' for t in tables]
+    if html:
+        generate_csrf()  # make sure the session's CSRF secret exists before hashing it
+        limit = current_app.config.get('WTF_CSRF_TIME_LIMIT', 3600) or 3600
+        user = f'{current_user.get_id()}:{current_user.username}' if current_user.is_authenticated else 'anon'
+        parts += [str(session.get('csrf_token', '')), str(int(time.time() // max(1, limit // 2))), user]
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+
+def conditional(*tables, html=False):
+    """Decorator adding ETag / If-None-Match handling to a GET view."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # flashed messages are one-shot, so a page showing them must be rendered
+            if request.method not in ('GET', 'HEAD') or (html and session.get('_flashes')):
+                return view(*args, **kwargs)
+            etag = compute_etag(tables, html)
+            if request.if_none_match.contains_weak(etag):
+                resp = current_app.response_class(status=304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+            resp.set_etag(etag, weak=True)
+            # cache, but revalidate on every use
+            resp.headers['Cache-Control'] = 'private, no-cache'
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,79 @@
+# app/seed.py
+"""Synthetic data generator for benchmarks and local load testing.
+
+    flask user seed --colleges 50 --programs 2000 --students 200000
+
+Works against whatever database the app is configured for (SQLite or
+PostgreSQL). Output is deterministic for a given --seed, and rows are
+written with batched executemany INSERTs.
+"""
+import random
+
+from sqlalchemy import insert
+
+from . import stats
+from .database import db
+from .models import College, Program, Student
+
+FIRST_NAMES = ['James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William',
+               'Elizabeth', 'David', 'Maria', 'Jose', 'Ana', 'Mark', 'Grace', 'Paul', 'Joy', 'Angelo',
+               'Kristine', 'Carlo', 'Nicole', 'Miguel', 'Andrea', 'Rafael', 'Camille', 'Paolo', 'Bea']
+LAST_NAMES = ['Santos', 'Reyes', 'Cruz', 'Bautista', 'Ocampo', 'Garcia', 'Mendoza', 'Torres', 'Tomas',
+              'Andrada', 'Castillo', 'Flores', 'Villanueva', 'Ramos', 'Castro', 'Rivera', 'Aquino',
+              'Navarro', 'Salazar', 'Mercado', 'Smith', 'Johnson', 'Lee', 'Tan', 'Lim', 'Chua', 'Go']
+FIELDS = ['Computer Science', 'Information Technology', 'Civil Engineering', 'Biology', 'Chemistry',
+          'Mathematics', 'Physics', 'Nursing', 'Accountancy', 'Economics', 'Psychology', 'History',
+          'Architecture', 'Statistics', 'Political Science', 'Education', 'Marketing', 'Philosophy']
+GENDERS = ['M', 'F', 'F', 'M', 'O']
+
+BATCH_SIZE = 5000
+
+
+def _batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate(colleges=50, programs=2000, students=200000, seed=0, batch_size=BATCH_SIZE, echo=None):
+    """Insert the requested number of colleges, programs and students."""
+    rng = random.Random(seed)
+    echo = echo or (lambda msg: None)
+
+    db.session.execute(insert(College), [
+        {'code': f'C{i:03d}', 'name': f'College of {FIELDS[i % len(FIELDS)]} {i}'} for i in range(colleges)
+    ])
+    db.session.commit()
+    college_ids = [cid for (cid,) in db.session.query(College.id).filter(College.code.like('C%'))]
+    echo(f'{colleges} colleges')
+
+    program_rows = ({'code': f'P{i:05d}',
+                     'name': f'Bachelor of Science in {FIELDS[i % len(FIELDS)]} {i}',
+                     'college_id': rng.choice(college_ids)} for i in range(programs))
+    for batch in _batched(program_rows, batch_size):
+        db.session.execute(insert(Program), batch)
+    db.session.commit()
+    program_ids = [pid for (pid,) in db.session.query(Program.id).filter(Program.code.like('P%'))]
+    echo(f'{programs} programs')
+
+    # id_number is YYYY-NNNN: 10k students per intake year
+    student_rows = ({'id_number': f'{2000 + i // 10000}-{i % 10000:04d}',
+                     'first_name': rng.choice(FIRST_NAMES),
+                     'last_name': rng.choice(LAST_NAMES),
+                     'gender': rng.choice(GENDERS),
+                     'year': rng.randint(1, 4),
+                     'program_id': rng.choice(program_ids)} for i in range(students))
+    for n, batch in enumerate(_batched(student_rows, batch_size), 1):
+        db.session.execute(insert(Student), batch)
+        db.session.commit()
+        echo(f'{min(n * batch_size, students)} / {students} students')
+
+    # the executemany INSERTs bypass the incremental stats hooks
+    stats.rebuild(db.session)
+    db.session.commit()
+    echo('student statistics rebuilt')
@@ -0,0 +1,80 @@
+# app/serialization.py
+"""Fast JSON encoding for list payloads, cached by table revision.
+
+dumps() uses orjson when it is installed and falls back to the stdlib json
+module (compact separators) when it is not. Both produce the same JSON.
+
+encoded(name, tables, build) encodes build()'s result and caches the bytes
+under the current revisions of `tables` (see app.revisions). Until one of
+those tables is written, later calls skip both the query inside build()
+and the encoding; builders select plain column rows (app.user.queries), so
+a miss never hydrates ORM objects either. Entries are immutable and their key
+changes with every write, so a per-app, in-process LRU is enough: no
+invalidation, and no shared cache to keep consistent across workers.
+
+The output is also safe to embed in a <script> element: <, >, & and ' are
+\\u-escaped, as Jinja's tojson filter does.
+"""
+import json
+
+from flask import current_app
+from markupsafe import Markup
+
+from .cache import LRUBackend
+from .revisions import current_revisions
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+ENCODED_CACHE_SIZE = 64
+# revision-keyed entries never go stale, so the TTL only bounds memory held by idle lists
+ENCODED_CACHE_TTL = 3600
+
+_HTML_ESCAPES = ((b'<', b'\\u003c'), (b'>', b'\\u003e'), (b'&', b'\\u0026'), (b"'", b'\\u0027'))
+
+
+def _store():
+    # per app: revision numbers only mean something for one database
+    store = current_app.extensions.get('encoded_json')
+    if store is None:
+        store = current_app.extensions['encoded_json'] = LRUBackend(maxsize=ENCODED_CACHE_SIZE)
+    return store
+
+
+def dumps(obj):
+    """Encode `obj` as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+def html_safe(data):
+    """Escape JSON bytes for embedding in an HTML <script> element."""
+    for char, escape in _HTML_ESCAPES:
+        if char in data:
+            data = data.replace(char, escape)
+    return data
+
+
+def encoded(name, tables, build):
+    """HTML-safe JSON bytes for build(), cached by the revisions of `tables`."""
+    revs = current_revisions(*tables)
+    key = name + '|' + '|'.join(f'{t}:{revs[t]}' for t in tables)
+    store = _store()
+    data = store.get(key)
+    if data is None:
+        data = html_safe(dumps(build()))
+        store.set(key, data, ENCODED_CACHE_TTL)
+    return data
+
+
+def script_json(data):
+    """Mark encoded() bytes for verbatim output in a template."""
+    return Markup(data.decode())
+
+
+def clear():
+    """Drop every cached encoding of the current app (tests)."""
+    _store().clear()
@@ -0,0 +1,165 @@
+# app/serve.py
+"""Production entry point: `flask serve` runs the app under gunicorn.
+
+`python run.py` starts Werkzeug's debug server, which is for development
+only. For anything else:
+
+    flask serve [--bind 0.0.0.0:8000] [--workers 4] [--threads 4]
+
+gunicorn is a pre-fork server. The master process builds the app once
+(preload), forks the workers and replaces any that die. With --threads above
+1 the workers are gthread workers, each serving that many requests at once.
+With --threads 1 they are sync workers, which serve one request at a time
+and close every connection after the response (no keep-alive).
+
+Each setting has an env var, read into app.config by init_serve(). A
+command-line option wins over it:
+
+    SERVE_BIND                  address to listen on (127.0.0.1:8000)
+    WEB_CONCURRENCY             worker processes (one per CPU)
+    SERVE_THREADS               threads per worker (4)
+    SERVE_KEEPALIVE             seconds an idle keep-alive connection is held (5)
+    SERVE_MAX_REQUESTS          requests before a worker is replaced, 0 = never (10000)
+    SERVE_MAX_REQUESTS_JITTER   random 0..N added to that, so workers don't all restart together (1000)
+    SERVE_TIMEOUT               seconds a silent worker may run before it is killed (60)
+    SERVE_GRACEFUL_TIMEOUT      seconds to finish in-flight requests after SIGTERM (30)
+    SERVE_TRUSTED_PROXIES       reverse proxies in front of the app (0)
+
+The server binds to 127.0.0.1 by default and is meant to sit behind a
+reverse proxy. Every request then arrives from the proxy's address, so the
+per-IP login limit (LOGIN_RATE_LIMIT, app.passwords) would put all
+clients into one bucket. With SERVE_TRUSTED_PROXIES=N, init_serve() wraps
+the app in werkzeug's ProxyFix, which trusts the last N X-Forwarded-For /
+-Proto / -Host values. request.remote_addr is then the real client. Set N
+to the number of proxies you run and no higher. A client can forge the
+headers beyond that.
+
+SIGTERM (or SIGINT) stops accepting connections. Workers finish their
+requests, up to the graceful timeout, and exit. SIGHUP reloads the workers
+the same way.
+
+A forked worker inherits the master's connection pools. A connection used
+from two processes breaks, so every worker calls
+engine.dispose(close=False) right after the fork. That drops the inherited
+pool without closing the master's sockets, and the worker opens its own
+connections. The password-hashing thread pool is reset as well, since
+threads do not survive a fork.
+
+Sizing: a worker checks out up to `threads` connections at once. Keep
+DB_POOL_SIZE at or above SERVE_THREADS, and keep workers x (DB_POOL_SIZE +
+DB_MAX_OVERFLOW) under the database's max_connections, or use
+DB_PGBOUNCER. An open /user/api/changes stream holds a thread for up to
+CHANGES_STREAM_SECONDS. On sync workers it holds the whole process, so use
+threads when the live feed is on. /metrics reports the worker that
+answered the scrape, not the whole server.
+
+The default is one worker per CPU with 4 threads each, not gunicorn's usual
+2 x CPUs + 1 sync workers. The threads cover the time a request spends
+waiting on the database. Extra processes only add memory and, in
+benchmarks/bench_serve.py, tail latency.
+"""
+import contextvars
+import os
+
+import click
+from flask import current_app
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from .database import db
+
+# option -> (config key, env var, type); the defaults are in init_serve()
+SETTINGS = {
+    'bind': ('SERVE_BIND', 'SERVE_BIND', str),
+    'workers': ('SERVE_WORKERS', 'WEB_CONCURRENCY', int),
+    'threads': ('SERVE_THREADS', 'SERVE_THREADS', int),
+    'keepalive': ('SERVE_KEEPALIVE', 'SERVE_KEEPALIVE', int),
+    'max_requests': ('SERVE_MAX_REQUESTS', 'SERVE_MAX_REQUESTS', int),
+    'max_requests_jitter': ('SERVE_MAX_REQUESTS_JITTER', 'SERVE_MAX_REQUESTS_JITTER', int),
+    'timeout': ('SERVE_TIMEOUT', 'SERVE_TIMEOUT', int),
+    'graceful_timeout': ('SERVE_GRACEFUL_TIMEOUT', 'SERVE_GRACEFUL_TIMEOUT', int),
+}
+
+
+def after_fork(app):
+    """Drop the state a worker must not share with the master."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    passwords = app.extensions.get('passwords')
+    if passwords is not None:
+        passwords.shutdown()
+
+
+def before_exit(app):
+    """Close the worker's pooled connections."""
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def gunicorn_options(app, **overrides):
+    """gunicorn settings from app.config; `overrides` that are not None win."""
+    settings = {name: app.config[key] for name, (key, _, _) in SETTINGS.items()}
+    settings.update((name, value) for name, value in overrides.items() if value is not None)
+
+    def post_fork(server, worker):
+        after_fork(app)
+
+    def worker_exit(server, worker):
+        before_exit(app)
+
+    return dict(settings, worker_class='gthread' if settings['threads'] > 1 else 'sync',
+                preload_app=True, post_fork=post_fork, worker_exit=worker_exit)
+
+
+def serve(app, **overrides):
+    """Run `app` under gunicorn until the master is stopped."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:  # optional dependency
+        raise click.ClickException('flask serve needs gunicorn: pip install gunicorn') from None
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for name, value in gunicorn_options(app, **overrides).items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            return app
+
+    # the CLI pushed an app context; a sync worker would otherwise share it (and `g`) across requests
+    contextvars.Context().run(Application().run)
+
+
+@click.command('serve')
+@click.option('--bind', '-b', help='host:port or unix:/path to listen on (SERVE_BIND).')
+@click.option('--workers', '-w', type=int, help='Worker processes (WEB_CONCURRENCY).')
+@click.option('--threads', type=int, help='Threads per worker; 1 means sync workers (SERVE_THREADS).')
+@click.option('--keepalive', type=int, help='Seconds to hold an idle keep-alive connection (SERVE_KEEPALIVE).')
+@click.option('--max-requests', type=int, help='Replace a worker after this many requests (SERVE_MAX_REQUESTS).')
+@click.option('--max-requests-jitter', type=int, help='Random extra requests per worker (SERVE_MAX_REQUESTS_JITTER).')
+@click.option('--timeout', type=int, help='Seconds before a silent worker is killed (SERVE_TIMEOUT).')
+@click.option('--graceful-timeout', type=int, help='Seconds to finish requests on shutdown (SERVE_GRACEFUL_TIMEOUT).')
+def serve_command(**overrides):
+    """Run the app under gunicorn (pre-fork, multi-process)."""
+    serve(current_app._get_current_object(), **overrides)
+
+
+def init_serve(app):
+    """Read the SERVE_* settings, trust the configured proxies and register `flask serve`."""
+    defaults = {
+        'bind': '127.0.0.1:8000',
+        'workers': os.cpu_count() or 1,
+        'threads': 4,
+        'keepalive': 5,
+        'max_requests': 10000,
+        'max_requests_jitter': 1000,
+        'timeout': 60,
+        'graceful_timeout': 30,
+    }
+    for name, (key, env, cast) in SETTINGS.items():
+        app.config.setdefault(key, cast(os.getenv(env, defaults[name])))
+    proxies = app.config.setdefault('SERVE_TRUSTED_PROXIES', int(os.getenv('SERVE_TRUSTED_PROXIES', 0)))
+    if proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+    app.cli.add_command(serve_command)
@@ -0,0 +1,164 @@
+# app/startup.py
+"""Cold-start helpers: one .env load, a lazy migration CLI, init-phase timing.
+
+create_app() runs each init step inside StartupProfile.phase(name). The
+timings go to app.extensions['startup']. With STARTUP_PROFILE=1 in the
+environment they are also logged on `app.startup` when the factory
+returns.
+
+Flask-Migrate pulls in Alembic and Mako, which is about a fifth of the
+app's import time, and only `flask db ...` needs it. So create_app()
+registers a placeholder `db` group instead. The first time the group is
+used, it imports Flask-Migrate and initializes it for the app.
+
+For the whole picture run
+    flask startup-profile [--top N]
+This starts a fresh interpreter with -X importtime and builds the app. It
+then prints the import cost per top-level package, the slowest modules,
+and the init phases.
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import click
+
+logger = logging.getLogger('app.startup')
+
+_env_loaded = False
+
+
+def load_env():
+    """Load .env into os.environ once per process (existing variables win)."""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+class StartupProfile:
+    """Wall-clock time of each create_app() phase."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+
+    def add(self, name, seconds):
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def finish(self, app):
+        total = time.perf_counter() - self.started
+        app.extensions['startup'] = {'phases': dict(self.phases), 'create_app_seconds': total}
+        if os.getenv('STARTUP_PROFILE', '').lower() in ('1', 'true', 'yes'):
+            logger.warning('create_app() took %.1f ms: %s', total * 1000,
+                           ', '.join(f'{name} {seconds * 1000:.1f} ms' for name, seconds in self.phases))
+
+
+class LazyGroup(click.Group):
+    """A click group whose real commands are loaded on first use."""
+
+    def __init__(self, name, load, **kwargs):
+        super().__init__(name, **kwargs)
+        self._load = load
+        self._group = None
+
+    def _real(self):
+        if self._group is None:
+            self._group = self._load()
+        return self._group
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        # the real group parses its own options and runs its callback
+        # (Flask-Migrate's sets g.directory and g.x_arg for the subcommands)
+        return self._real().make_context(info_name, args, parent=parent, **extra)
+
+    def list_commands(self, ctx):
+        return self._real().list_commands(ctx)
+
+    def get_command(self, ctx, cmd_name):
+        return self._real().get_command(ctx, cmd_name)
+
+
+def migrate_cli(app, db):
+    """The `flask db` group; Flask-Migrate is imported only when it runs."""
+    def load():
+        from flask_migrate import Migrate
+        # init_app() swaps this placeholder for Flask-Migrate's own group
+        Migrate(app, db)
+        return app.cli.commands['db']
+    return LazyGroup('db', load, help='Perform database migrations (Flask-Migrate).')
+
+
+_PROFILE_SCRIPT = '''
+import json, sys, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+done = time.perf_counter()
+print(json.dumps({
+    'import_seconds': imported - start,
+    'create_app_seconds': done - imported,
+    'phases': app.extensions['startup']['phases'],
+    'modules': sorted(sys.modules),
+}))
+'''
+
+
+def measure(importtime=False, env=None):
+    """Build the app in a fresh interpreter; returns the profile dict.
+
+    With importtime=True the dict also has 'imports': [(module, self_us,
+    cumulative_us), ...] from -X importtime. That flag slows imports, so
+    leave it off when checking a time budget.
+    """
+    cmd = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', _PROFILE_SCRIPT]
+    proc = subprocess.run(cmd, capture_output=True, text=True, env={**os.environ, **(env or {})},
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if proc.returncode != 0:
+        raise RuntimeError(f'create_app() failed in a fresh interpreter:\n{proc.stderr}')
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    if importtime:
+        result['imports'] = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            result['imports'].append((name.strip(), int(self_us), int(cumulative_us)))
+    return result
+
+
+@click.command('startup-profile')
+@click.option('--top', default=15, show_default=True, help='Rows per table.')
+def startup_profile_command(top):
+    """Print an import-time and init-phase breakdown of create_app()."""
+    result = measure(importtime=True)
+    by_package = {}
+    for name, self_us, _ in result['imports']:
+        package = name.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    click.echo(f"import app: {result['import_seconds'] * 1000:.1f} ms (slowed by -X importtime), "
+               f"create_app(): {result['create_app_seconds'] * 1000:.1f} ms\n")
+    click.echo('import time by top-level package (self time summed):')
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        click.echo(f'  {us / 1000:8.1f} ms  {package}')
+    click.echo('\nslowest modules (cumulative):')
+    for name, _, cumulative in sorted(result['imports'], key=lambda item: -item[2])[:top]:
+        click.echo(f'  {cumulative / 1000:8.1f} ms  {name}')
+    click.echo('\ncreate_app() phases:')
+    for name, seconds in result['phases'].items():
+        click.echo(f'  {seconds * 1000:8.1f} ms  {name}')
+
@@ -0,0 +1,22 @@
+// app/static/js/changes.js
+// Live updates from /user/api/changes (Server-Sent Events). A page calls
+//   subscribeChanges(['student', 'program'], {upsert(table, row), remove(table, id), reset(table)})
+// and patches the affected rows in place. EventSource reconnects on its own
+// and resumes from the last event id; a `reset` event (the client fell
+// behind the pruned log) asks for every table to be reloaded.
+window.subscribeChanges = function(tables, handlers) {
+  if (!window.EventSource) return null;
+  const url = (window.CHANGES_API || '/user/api/changes') + '?tables=' + tables.join(',');
+  const source = new EventSource(url);
+
+  source.addEventListener('changes', (e) => {
+    const data = JSON.parse(e.data);
+    for (const change of data.changes) {
+      if (change.op === 'upsert') handlers.upsert(change.table, change.row);
+      else if (change.op === 'delete') handlers.remove(change.table, change.id);
+      else handlers.reset(change.table);
+    }
+  });
+  source.addEventListener('reset', () => tables.forEach(t => handlers.reset(t)));
+  return source;
+};
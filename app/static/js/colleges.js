@@ -5,23 +5,35 @@ document.addEventListener('DOMContentLoaded', function() {
   let colleges = window.INIT_COLLEGES || [];
   let editIndex = null;
 
-  function renderTable(list = colleges) {
+  function visible() {
+    const q = searchInput.value.toLowerCase();
+    if (!q) return colleges;
+    return colleges.filter(c =>
+      c.name.toLowerCase().includes(q) ||
+      c.code.toLowerCase().includes(q)
+    );
+  }
+
+  function buildRow(c) {
+    const tr = document.createElement('tr');
+    tr.dataset.id = c.id;
+    tr.innerHTML = `
+      <td>${c.code}</td>
+      <td>${c.name}</td>
+      <td>
+        <button class="btn btn-sm btn-outline-primary me-1" data-id="${c.id}" data-action="edit">Edit</button>
+        <button class="btn btn-sm btn-outline-danger" data-id="${c.id}" data-action="delete">Delete</button>
+      </td>`;
+    return tr;
+  }
+
+  function renderTable(list = visible()) {
     tbody.innerHTML = '';
     if (list.length === 0) {
       tbody.innerHTML = `<tr><td colspan="3" class="text-center text-muted">No colleges found.</td></tr>`;
       return;
     }
-    list.forEach((c, i) => {
-      const tr = document.createElement('tr');
-      tr.innerHTML = `
-        <td>${c.code}</td>
-        <td>${c.name}</td>
-        <td>
-          <button class="btn btn-sm btn-outline-primary me-1" data-index="${i}" data-action="edit">Edit</button>
-          <button class="btn btn-sm btn-outline-danger" data-index="${i}" data-action="delete">Delete</button>
-        </td>`;
-      tbody.appendChild(tr);
-    });
+    list.forEach(c => tbody.appendChild(buildRow(c)));
   }
 
   // Let the form submit normally to the server (server handles create/edit)
@@ -29,23 +41,32 @@ document.addEventListener('DOMContentLoaded', function() {
   tbody.addEventListener('click', function(e) {
     const btn = e.target.closest('button');
     if (!btn) return;
-    const index = btn.dataset.index;
+    const id = Number(btn.dataset.id);
     const action = btn.dataset.action;
 
     if (action === 'delete') {
-      const college = colleges[index];
+      const college = colleges.find(c => c.id === id);
       if (!college) return;
       if (!confirm(`Delete college ${college.name}?`)) return;
       const csrfToken = document.querySelector('input[name="csrf_token"]')?.value;
-      fetch(`/user/colleges/delete/${college.id}`, {
+      const send = (body) => fetch(`/user/colleges/delete/${college.id}`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'X-CSRFToken': csrfToken || ''
+        },
+        body: JSON.stringify(body || {})
+      }).then(r => r.json());
+      send().then(data => {
+        // blocked by children: offer to delete them too, in one server-side statement
+        if (data && !data.success && data.blocking_count &&
+            confirm(`${data.message} Delete the ${data.blocking_count} linked ${data.blocking} as well?`)) {
+          return send({ mode: 'cascade' });
         }
-      }).then(r => r.json()).then(data => {
+        return data;
+      }).then(data => {
         if (data && data.success) {
-          colleges.splice(index, 1);
+          colleges = colleges.filter(c => c.id !== id);
           renderTable();
           showAlert('success', data.message || 'College deleted');
         } else {
@@ -56,25 +77,54 @@ document.addEventListener('DOMContentLoaded', function() {
         showAlert('danger', 'Failed to delete college');
       });
     } else if (action === 'edit') {
-      const college = colleges[index];
+      const college = colleges.find(c => c.id === id);
+      if (!college) return;
       if (form) {
         if (form.elements['id']) form.elements['id'].value = college.id || '';
+        if (form.elements['version']) form.elements['version'].value = college.version || '';
+        // the server writes only the fields that differ from these
+        if (form.elements['original']) form.elements['original'].value = JSON.stringify({
+          code: college.code, name: college.name
+        });
         if (form.elements['code']) form.elements['code'].value = college.code || '';
         if (form.elements['name']) form.elements['name'].value = college.name || '';
       }
-      editIndex = index;
+      editIndex = id;
       new bootstrap.Modal(document.querySelector('#collegeModal')).show();
     }
   });
 
-  searchInput.addEventListener('input', function() {
-    const q = this.value.toLowerCase();
-    const filtered = colleges.filter(c =>
-      c.name.toLowerCase().includes(q) ||
-      c.code.toLowerCase().includes(q)
-    );
-    renderTable(filtered);
-  });
+  searchInput.addEventListener('input', () => renderTable());
+
+  // Live updates (changes.js): replace just the changed row; new rows and
+  // removals re-render the (small, in-memory) list
+  function upsertCollege(row) {
+    const index = colleges.findIndex(c => c.id === row.id);
+    const old = tbody.querySelector(`tr[data-id="${row.id}"]`);
+    if (index !== -1 && old) {
+      colleges[index] = row;
+      const tr = buildRow(row);
+      tr.classList.add('table-info');
+      old.replaceWith(tr);
+      setTimeout(() => tr.classList.remove('table-info'), 1500);
+      return;
+    }
+    if (index === -1) colleges.push(row); else colleges[index] = row;
+    colleges.sort((a, b) => a.name.localeCompare(b.name));
+    renderTable();
+  }
+
+  if (window.subscribeChanges) {
+    window.subscribeChanges(['college'], {
+      upsert: (table, row) => upsertCollege(row),
+      remove: (table, id) => {
+        colleges = colleges.filter(c => c.id !== id);
+        renderTable();
+      },
+      // the list is embedded in the page, so a reset reloads it
+      reset: () => window.location.reload(),
+    });
+  }
 
   function showAlert(type, message) {
     try {
@@ -1,11 +1,20 @@
 // app/static/js/main.js
 (() => {
-  const DATA_URL = '/static/data/students.json'; // relative to app static root
-  let students = [];           // in-memory dataset
+  const API_URL = window.STUDENTS_API || '/user/api/students';
+  const SEARCH_URL = window.STUDENTS_SEARCH_API || '/user/api/students/search';
+  const BULK_DELETE_URL = window.STUDENTS_BULK_DELETE_API || '/user/api/students/bulk-delete';
+  const BULK_UPDATE_URL = window.STUDENTS_BULK_UPDATE_API || '/user/api/students/bulk-update';
+  let students = [];           // rows of the current page only
   let currentEditId = null;    // null => new, else edit
   const pageSize = 8;
-  let currentPage = 1;
-  let filtered = [];
+
+  // keyset pagination state: cursors[i] is the cursor that loads page i
+  let cursors = [null];
+  let pageIndex = 0;
+  let nextCursor = null;
+  let sort = 'id_number';
+  let order = 'asc';
+  const selected = new Set();  // student ids ticked for a bulk action
 
   // DOM refs
   const tbody = document.querySelector('#students-table-body');
@@ -13,88 +22,258 @@
   const modalEl = document.getElementById('studentModal');
   const searchInput = document.getElementById('student-search');
   const paginationEl = document.querySelector('.pagination');
+  const filterProgram = document.getElementById('filter-program');
+  const filterYear = document.getElementById('filter-year');
+  const filterGender = document.getElementById('filter-gender');
+  const exportLink = document.getElementById('btn-export');
+  const selectPage = document.getElementById('select-page');
+  const bulkBar = document.getElementById('bulk-actions');
+  const bulkCount = document.getElementById('bulk-count');
+  const bulkAllMatching = document.getElementById('bulk-all-matching');
+  const bulkProgram = document.getElementById('bulk-program');
 
   // Bootstrap modal helper
   let bsModal = null;
   if (modalEl) bsModal = new bootstrap.Modal(modalEl);
 
+  function searchTerm() {
+    return searchInput ? (searchInput.value || '').trim() : '';
+  }
+
+  function addFilters(params) {
+    if (filterProgram && filterProgram.value) params.set('program_id', filterProgram.value);
+    if (filterYear && filterYear.value) params.set('year', filterYear.value);
+    if (filterGender && filterGender.value) params.set('gender', filterGender.value);
+    return params;
+  }
+
+  function buildQuery(cursor) {
+    const q = searchTerm();
+    if (q) {
+      // ranked search results come back as a single page
+      const params = addFilters(new URLSearchParams({q, limit: 50}));
+      return `${SEARCH_URL}?${params.toString()}`;
+    }
+    const params = addFilters(new URLSearchParams({sort, order, limit: pageSize}));
+    if (cursor) params.set('cursor', cursor);
+    return `${API_URL}?${params.toString()}`;
+  }
+
+  let inflight = null;  // aborts a slower, older request when a new one starts
+
   async function loadData() {
+    if (inflight) inflight.abort();
+    const controller = new AbortController();
+    inflight = controller;
     try {
-      // prefer server-provided initial data injected into the page
-      if (window.INIT_STUDENTS) {
-        students = window.INIT_STUDENTS.slice();
-      } else {
-        const res = await fetch(DATA_URL);
-        students = await res.json();
-      }
-      filtered = students.slice();
-      renderTable();
-      renderPagination();
+      const res = await fetch(buildQuery(cursors[pageIndex]), {signal: controller.signal});
+      const data = await res.json();
+      students = data.items || [];
+      nextCursor = data.next_cursor || null;
     } catch (err) {
-      console.error('Failed to fetch students.json', err);
-      // fallback: empty array
+      if (err.name === 'AbortError') return;
+      console.error('Failed to fetch students', err);
       students = [];
-      filtered = [];
-      renderTable();
-      renderPagination();
+      nextCursor = null;
     }
+    renderTable();
+    renderPagination();
+  }
+
+  // keep the export link in sync with the current filters
+  function updateExportLink() {
+    if (!exportLink) return;
+    const params = addFilters(new URLSearchParams());
+    const q = searchTerm();
+    if (q) params.set('q', q);
+    exportLink.href = exportLink.href.split('?')[0] + (params.toString() ? `?${params.toString()}` : '');
+  }
+
+  // reset to the first page (after sort/filter/search changes)
+  function reload() {
+    updateExportLink();
+    selected.clear();
+    cursors = [null];
+    pageIndex = 0;
+    loadData();
   }
 
   function renderTable() {
     if (!tbody) return;
     tbody.innerHTML = '';
 
-    const start = (currentPage - 1) * pageSize;
-    const pageItems = filtered.slice(start, start + pageSize);
-
-    if (pageItems.length === 0) {
-      tbody.innerHTML = `<tr><td colspan="6" class="text-center small text-muted">No students found</td></tr>`;
+    if (students.length === 0) {
+      tbody.innerHTML = `<tr><td colspan="8" class="text-center small text-muted">No students found</td></tr>`;
+      renderBulkBar();
       return;
     }
 
-    for (const s of pageItems) {
-      const tr = document.createElement('tr');
-
-      // show id_number, first_name, last_name, program, year, gender
-      tr.innerHTML = `
-        <td><a href="#" class="student-roll-link" data-id="${s.id}">${escapeHtml(s.id_number || '')}</a></td>
-        <td>${escapeHtml(s.first_name || '')}</td>
-        <td>${escapeHtml(s.last_name || '')}</td>
-        <td>${escapeHtml(s.program || '')}</td>
-        <td>${escapeHtml(String(s.year || ''))}</td>
-        <td>${escapeHtml(s.gender || '')}</td>
-        <td>
-          <button class="btn btn-sm btn-outline-primary btn-edit" data-id="${s.id}">Edit</button>
-          <button class="btn btn-sm btn-outline-danger btn-delete" data-id="${s.id}">Delete</button>
-        </td>
-      `;
-      tbody.appendChild(tr);
-    }
+    for (const s of students) tbody.appendChild(buildRow(s));
+    renderBulkBar();
+  }
+
+  function buildRow(s) {
+    const tr = document.createElement('tr');
+    tr.dataset.id = s.id;
+
+    // show id_number, first_name, last_name, program, year, gender
+    tr.innerHTML = `
+      <td><input class="form-check-input row-select" type="checkbox" data-id="${s.id}" ${selected.has(s.id) ? 'checked' : ''}></td>
+      <td><a href="#" class="student-roll-link" data-id="${s.id}">${escapeHtml(s.id_number || '')}</a></td>
+      <td>${escapeHtml(s.first_name || '')}</td>
+      <td>${escapeHtml(s.last_name || '')}</td>
+      <td>${escapeHtml(s.program || '')}</td>
+      <td>${escapeHtml(String(s.year || ''))}</td>
+      <td>${escapeHtml(s.gender || '')}</td>
+      <td>
+        <button class="btn btn-sm btn-outline-primary btn-edit" data-id="${s.id}">Edit</button>
+        <button class="btn btn-sm btn-outline-danger btn-delete" data-id="${s.id}">Delete</button>
+      </td>
+    `;
 
     // wire buttons
-    tbody.querySelectorAll('.btn-edit').forEach(btn => btn.addEventListener('click', onEdit));
-    tbody.querySelectorAll('.btn-delete').forEach(btn => btn.addEventListener('click', onDelete));
+    tr.querySelector('.btn-edit').addEventListener('click', onEdit);
+    tr.querySelector('.btn-delete').addEventListener('click', onDelete);
+    const box = tr.querySelector('.row-select');
+    box.addEventListener('change', () => {
+      const id = Number(box.dataset.id);
+      if (box.checked) selected.add(id); else selected.delete(id);
+      renderBulkBar();
+    });
+    return tr;
+  }
+
+  // Live updates (changes.js): patch the rows on this page in place instead of
+  // reloading; set-based changes arrive as a reset and reload the page
+  function patchRow(s) {
+    const index = students.findIndex(x => x.id === s.id);
+    if (index === -1) return;  // not on this page; shows up on the next load
+    students[index] = s;
+    const old = tbody && tbody.querySelector(`tr[data-id="${s.id}"]`);
+    if (!old) return;
+    const tr = buildRow(s);
+    tr.classList.add('table-info');
+    old.replaceWith(tr);
+    setTimeout(() => tr.classList.remove('table-info'), 1500);
+  }
+
+  function removeRow(id) {
+    const index = students.findIndex(x => x.id === id);
+    if (index === -1) return;
+    students.splice(index, 1);
+    selected.delete(id);
+    tbody?.querySelector(`tr[data-id="${id}"]`)?.remove();
+    if (students.length === 0) loadData(); else renderBulkBar();
   }
 
+  function renameProgram(p) {
+    students.filter(s => s.program_id === p.id && s.program !== p.name)
+      .forEach(s => patchRow(Object.assign({}, s, {program: p.name})));
+    [filterProgram, bulkProgram].forEach(select => {
+      const option = select && Array.from(select.options).find(o => o.value === String(p.id));
+      if (option) option.text = `${p.code} - ${p.name}`;
+    });
+  }
+
+  function subscribe() {
+    if (!window.subscribeChanges) return;
+    window.subscribeChanges(['student', 'program'], {
+      upsert: (table, row) => (table === 'student' ? patchRow(row) : renameProgram(row)),
+      // a removed program's students are reported as their own change
+      remove: (table, id) => { if (table === 'student') removeRow(id); },
+      reset: () => loadData(),
+    });
+  }
+
+  // Bulk actions: ticked rows (kept across pages) or every student matching
+  // the filters; the server applies each as one UPDATE/DELETE statement
+  function currentFilter() {
+    const filter = {};
+    if (filterProgram && filterProgram.value) filter.program_id = Number(filterProgram.value);
+    if (filterYear && filterYear.value) filter.year = Number(filterYear.value);
+    if (filterGender && filterGender.value) filter.gender = filterGender.value;
+    return filter;
+  }
+
+  function bulkTarget() {
+    if (bulkAllMatching && bulkAllMatching.checked) return {filter: currentFilter()};
+    return {ids: Array.from(selected)};
+  }
+
+  function renderBulkBar() {
+    if (!bulkBar) return;
+    // "all matching" needs at least one filter and no search term (search is not a filter field)
+    const canMatchAll = Object.keys(currentFilter()).length > 0 && !searchTerm();
+    if (bulkAllMatching) {
+      bulkAllMatching.disabled = !canMatchAll;
+      if (!canMatchAll) bulkAllMatching.checked = false;
+    }
+    const active = selected.size > 0 || (bulkAllMatching && bulkAllMatching.checked);
+    bulkBar.classList.toggle('d-none', !active && !canMatchAll);
+    if (bulkCount) bulkCount.textContent = String(selected.size);
+    if (selectPage) {
+      selectPage.checked = students.length > 0 && students.every(s => selected.has(s.id));
+    }
+  }
+
+  function runBulk(url, body, question) {
+    const target = bulkTarget();
+    if (!target.filter && target.ids.length === 0) return;
+    const what = target.filter ? 'all students matching the filters' : `${target.ids.length} selected student(s)`;
+    if (!confirm(`${question} ${what}?`)) return;
+    const csrfToken = document.querySelector('input[name="csrf_token"]')?.value;
+    fetch(url, {
+      method: 'POST',
+      headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrfToken || ''},
+      body: JSON.stringify(Object.assign(target, body))
+    }).then(r => r.json()).then(data => {
+      if (data && data.success) {
+        showAlert('success', data.message);
+        reload();
+      } else {
+        showAlert('danger', (data && data.message) || 'Bulk action failed');
+      }
+    }).catch(err => {
+      console.error(err);
+      showAlert('danger', 'Bulk action failed');
+    });
+  }
+
+  if (selectPage) {
+    selectPage.addEventListener('change', () => {
+      students.forEach(s => { if (selectPage.checked) selected.add(s.id); else selected.delete(s.id); });
+      renderTable();
+    });
+  }
+  if (bulkAllMatching) bulkAllMatching.addEventListener('change', renderBulkBar);
+  // reuse the filter's course options instead of rendering the list twice
+  if (bulkProgram && filterProgram) {
+    Array.from(filterProgram.options).filter(o => o.value).forEach(o => bulkProgram.add(new Option(o.text, o.value)));
+  }
+  document.getElementById('bulk-delete')?.addEventListener('click', () =>
+    runBulk(BULK_DELETE_URL, {}, 'Delete'));
+  document.getElementById('bulk-promote')?.addEventListener('click', () =>
+    runBulk(BULK_UPDATE_URL, {promote: true}, 'Promote to the next year'));
+  document.getElementById('bulk-move')?.addEventListener('click', () => {
+    if (!bulkProgram || !bulkProgram.value) return;
+    runBulk(BULK_UPDATE_URL, {set: {program_id: Number(bulkProgram.value)}}, 'Move to the chosen course');
+  });
+
   function renderPagination() {
     if (!paginationEl) return;
     paginationEl.innerHTML = '';
 
-    const pages = Math.max(1, Math.ceil(filtered.length / pageSize));
-    const createPageItem = (label, pg, disabled=false, active=false) => {
+    const createPageItem = (label, onClick, disabled=false, active=false) => {
       const li = document.createElement('li');
       li.className = 'page-item' + (disabled ? ' disabled' : '') + (active ? ' active' : '');
       const a = document.createElement('a');
       a.className = 'page-link';
       a.href = '#';
-      a.dataset.page = pg;
       a.textContent = label;
       a.addEventListener('click', (e) => {
         e.preventDefault();
         if (!disabled) {
-          currentPage = pg;
-          renderTable();
-          renderPagination();
+          onClick();
           window.scrollTo({top: 0, behavior: 'smooth'});
         }
       });
@@ -102,20 +281,40 @@
       return li;
     };
 
-    // prev
-    const prev = createPageItem('<', Math.max(1, currentPage - 1), currentPage === 1);
-    paginationEl.appendChild(prev);
-
-    for (let i = 1; i <= pages; i++) {
-      const li = createPageItem(String(i), i, false, i === currentPage);
-      paginationEl.appendChild(li);
-    }
+    // prev / current / next: keyset pagination has no page count
+    paginationEl.appendChild(createPageItem('<', () => { pageIndex -= 1; loadData(); }, pageIndex === 0));
+    paginationEl.appendChild(createPageItem(String(pageIndex + 1), () => {}, false, true));
+    paginationEl.appendChild(createPageItem('>', () => {
+      cursors[pageIndex + 1] = nextCursor;
+      pageIndex += 1;
+      loadData();
+    }, !nextCursor));
+  }
 
-    // next
-    const next = createPageItem('>', Math.min(pages, currentPage + 1), currentPage === pages);
-    paginationEl.appendChild(next);
+  function renderSortHeaders() {
+    document.querySelectorAll('th.sortable').forEach(th => {
+      th.classList.remove('sort-asc', 'sort-desc');
+      if (th.dataset.sort === sort) th.classList.add(order === 'asc' ? 'sort-asc' : 'sort-desc');
+    });
   }
 
+  document.querySelectorAll('th.sortable').forEach(th => {
+    th.addEventListener('click', () => {
+      if (th.dataset.sort === sort) {
+        order = order === 'asc' ? 'desc' : 'asc';
+      } else {
+        sort = th.dataset.sort;
+        order = 'asc';
+      }
+      renderSortHeaders();
+      reload();
+    });
+  });
+
+  [filterProgram, filterYear, filterGender].forEach(el => {
+    if (el) el.addEventListener('change', reload);
+  });
+
   // Edit handler
   function onEdit(e) {
     const id = Number(e.currentTarget.dataset.id);
@@ -125,6 +324,12 @@
     // fill form
     form.reset();
     setFormValue('id', student.id || '');
+    setFormValue('version', student.version || '');
+    // the server writes only the fields that differ from these
+    setFormValue('original', JSON.stringify({
+      id_number: student.id_number, first_name: student.first_name, last_name: student.last_name,
+      program_id: student.program_id, year: student.year, gender: student.gender
+    }));
     setFormValue('id_number', student.id_number || '');
     setFormValue('first_name', student.first_name || '');
     setFormValue('last_name', student.last_name || '');
@@ -150,13 +355,9 @@
       }
     }).then(r => r.json()).then(data => {
       if (data && data.success) {
-        // remove locally and refresh UI
-        students = students.filter(s => s.id !== id);
-        filtered = filtered.filter(s => s.id !== id);
-        const maxPage = Math.max(1, Math.ceil(filtered.length / pageSize));
-        if (currentPage > maxPage) currentPage = maxPage;
-        renderTable();
-        renderPagination();
+        // reload the current page so the next row slides in
+        if (students.length === 1 && pageIndex > 0) pageIndex -= 1;
+        loadData();
         showAlert('success', data.message || 'Student deleted');
       } else {
         showAlert('danger', (data && data.message) || 'Failed to delete student');
@@ -176,27 +377,18 @@
  
   // We no longer intercept form submit; forms post to the server for create/edit.
 
-  // Search
-  function applySearch() {
-    const q = searchInput ? (searchInput.value || '').toLowerCase().trim() : '';
-    if (!q) {
-      filtered = students.slice();
-    } else {
-      filtered = students.filter(s =>
-        (s.first_name && s.first_name.toLowerCase().includes(q)) ||
-        (s.last_name && s.last_name.toLowerCase().includes(q)) ||
-        (s.id_number && s.id_number.toLowerCase().includes(q)) ||
-        (s.program && s.program.toLowerCase().includes(q))
-      );
-    }
-    currentPage = 1;
-    renderTable();
-    renderPagination();
-  }
-
+  // Search: debounced, answered by the ranked server-side search endpoint
+  let searchTimer = null;
+  let lastTerm = '';
   if (searchInput) {
     searchInput.addEventListener('input', () => {
-      applySearch();
+      clearTimeout(searchTimer);
+      searchTimer = setTimeout(() => {
+        const q = searchTerm();
+        if (q === lastTerm) return;
+        lastTerm = q;
+        reload();
+      }, 250);
     });
   }
 
@@ -230,7 +422,9 @@
 
   // init on DOMContentLoaded
   document.addEventListener('DOMContentLoaded', () => {
+    renderSortHeaders();
     loadData();
+    subscribe();
   });
 
 })();
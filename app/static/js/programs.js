@@ -5,30 +5,45 @@ document.addEventListener('DOMContentLoaded', function() {
   let programs = window.INIT_PROGRAMS || [];
   let editIndex = null;
 
-  function renderTable(list = programs) {
+  function visible() {
+    const q = searchInput.value.toLowerCase();
+    if (!q) return programs;
+    return programs.filter(p =>
+      p.name.toLowerCase().includes(q) ||
+      p.code.toLowerCase().includes(q) ||
+      p.college.toLowerCase().includes(q)
+    );
+  }
+
+  function buildRow(p) {
+    const tr = document.createElement('tr');
+    tr.dataset.id = p.id;
+    tr.innerHTML = `
+      <td>${p.code}</td>
+      <td>${p.name}</td>
+      <td>${p.college}</td>
+      <td>
+        <button class="btn btn-sm btn-outline-primary me-1" data-id="${p.id}" data-action="edit">Edit</button>
+        <button class="btn btn-sm btn-outline-danger" data-id="${p.id}" data-action="delete">Delete</button>
+      </td>`;
+    return tr;
+  }
+
+  function renderTable(list = visible()) {
     tbody.innerHTML = '';
     if (list.length === 0) {
       tbody.innerHTML = `<tr><td colspan="4" class="text-center text-muted">No programs found.</td></tr>`;
       return;
     }
-    list.forEach((p, i) => {
-      const tr = document.createElement('tr');
-      tr.innerHTML = `
-        <td>${p.code}</td>
-        <td>${p.name}</td>
-        <td>${p.college}</td>
-        <td>
-          <button class="btn btn-sm btn-outline-primary me-1" data-index="${i}" data-action="edit">Edit</button>
-          <button class="btn btn-sm btn-outline-danger" data-index="${i}" data-action="delete">Delete</button>
-        </td>`;
-      tbody.appendChild(tr);
-    });
+    list.forEach(p => tbody.appendChild(buildRow(p)));
   }
 
   function resetForm() {
     form.reset();
     editIndex = null;
     if (form.elements['id']) form.elements['id'].value = '';
+    if (form.elements['version']) form.elements['version'].value = '';
+    if (form.elements['original']) form.elements['original'].value = '';
   }
 
   // Let the form submit normally to server (server handles create/edit).
@@ -36,22 +51,31 @@ document.addEventListener('DOMContentLoaded', function() {
   tbody.addEventListener('click', function(e) {
     const btn = e.target.closest('button');
     if (!btn) return;
-    const index = btn.dataset.index;
+    const id = Number(btn.dataset.id);
     const action = btn.dataset.action;
     if (action === 'delete') {
-      const prog = programs[index];
+      const prog = programs.find(p => p.id === id);
       if (!prog) return;
       if (!confirm(`Delete program ${prog.name}?`)) return;
       const csrfToken = document.querySelector('input[name="csrf_token"]')?.value;
-      fetch(`/user/programs/delete/${prog.id}`, {
+      const send = (body) => fetch(`/user/programs/delete/${prog.id}`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'X-CSRFToken': csrfToken || ''
+        },
+        body: JSON.stringify(body || {})
+      }).then(r => r.json());
+      send().then(data => {
+        // blocked by children: offer to delete them too, in one server-side statement
+        if (data && !data.success && data.blocking_count &&
+            confirm(`${data.message} Delete the ${data.blocking_count} linked ${data.blocking} as well?`)) {
+          return send({ mode: 'cascade' });
         }
-      }).then(r => r.json()).then(data => {
+        return data;
+      }).then(data => {
         if (data && data.success) {
-          programs.splice(index, 1);
+          programs = programs.filter(p => p.id !== id);
           renderTable();
           showAlert('success', data.message || 'Program deleted');
         } else {
@@ -62,9 +86,15 @@ document.addEventListener('DOMContentLoaded', function() {
         showAlert('danger', 'Failed to delete program');
       });
     } else if (action === 'edit') {
-      const program = programs[index];
+      const program = programs.find(p => p.id === id);
+      if (!program) return;
       if (form) {
         if (form.elements['id']) form.elements['id'].value = program.id || '';
+        if (form.elements['version']) form.elements['version'].value = program.version || '';
+        // the server writes only the fields that differ from these
+        if (form.elements['original']) form.elements['original'].value = JSON.stringify({
+          code: program.code, name: program.name, college_id: program.college_id
+        });
         if (form.elements['code']) form.elements['code'].value = program.code || '';
         if (form.elements['name']) form.elements['name'].value = program.name || '';
         if (form.elements['college_id']) form.elements['college_id'].value = program.college_id || '';
@@ -73,15 +103,46 @@ document.addEventListener('DOMContentLoaded', function() {
     }
   });
 
-  searchInput.addEventListener('input', function() {
-    const q = this.value.toLowerCase();
-    const filtered = programs.filter(p =>
-      p.name.toLowerCase().includes(q) ||
-      p.code.toLowerCase().includes(q) ||
-      p.college.toLowerCase().includes(q)
-    );
-    renderTable(filtered);
-  });
+  searchInput.addEventListener('input', () => renderTable());
+
+  // Live updates (changes.js): replace just the changed row; new rows and
+  // removals re-render the (small, in-memory) list
+  function upsertProgram(row) {
+    const index = programs.findIndex(p => p.id === row.id);
+    const old = tbody.querySelector(`tr[data-id="${row.id}"]`);
+    if (index !== -1 && old) {
+      programs[index] = row;
+      const tr = buildRow(row);
+      tr.classList.add('table-info');
+      old.replaceWith(tr);
+      setTimeout(() => tr.classList.remove('table-info'), 1500);
+      return;
+    }
+    if (index === -1) programs.push(row); else programs[index] = row;
+    programs.sort((a, b) => a.name.localeCompare(b.name));
+    renderTable();
+  }
+
+  function renameCollege(college) {
+    programs.filter(p => p.college_id === college.id && p.college !== college.name)
+      .forEach(p => upsertProgram(Object.assign({}, p, {college: college.name})));
+    const option = form && Array.from(form.elements['college_id']?.options || [])
+      .find(o => o.value === String(college.id));
+    if (option) option.text = `${college.code} - ${college.name}`;
+  }
+
+  if (window.subscribeChanges) {
+    window.subscribeChanges(['program', 'college'], {
+      upsert: (table, row) => (table === 'program' ? upsertProgram(row) : renameCollege(row)),
+      remove: (table, id) => {
+        if (table !== 'program') return;
+        programs = programs.filter(p => p.id !== id);
+        renderTable();
+      },
+      // the list is embedded in the page, so a reset reloads it
+      reset: () => window.location.reload(),
+    });
+  }
 
   function showAlert(type, message) {
     try {
@@ -0,0 +1,206 @@
+# app/stats.py
+"""Denormalized student counts per program, year and gender.
+
+`student_stat` holds one row per (program_id, year, gender) with its head
+count. College totals join it to `program`. Reading the stats therefore
+costs the same whether there are a thousand students or a million.
+
+The counts are maintained incrementally inside the writing transaction:
+    - ORM inserts, edits and deletes of Student are picked up by session
+      flush hooks, from attribute history
+    - set-based statements bypass the unit of work. The importer's
+      executemany INSERTs report their rows with record_rows(); bulk
+      actions, cascading deletes and edits run their DELETE or UPDATE
+      through delete_students() / update_students(), which count the rows
+      the statement itself returns
+Right before commit the accumulated deltas are applied in one upsert. Keys
+that drop to zero keep their row; readers skip them, and this saves every
+delete path a statement. rebuild() (`flask user rebuild-stats`)
+recomputes the whole table from `student`.
+"""
+from collections import Counter
+
+from sqlalchemy import delete, event, func, insert, inspect, select, update
+from sqlalchemy.orm import Session
+
+from .models import Program, Student, StudentStat
+
+_INFO_KEY = 'student_stat_deltas'
+_KEY_FIELDS = ('program_id', 'year', 'gender')
+_KEY_ATTRS = (Student.program_id, Student.year, Student.gender)
+
+# NULL year/gender are counted under 0 / '' (the columns form the primary key)
+_KEY_COLUMNS = (Student.program_id, func.coalesce(Student.year, 0), func.coalesce(Student.gender, ''))
+
+
+def stat_key(program_id, year, gender):
+    return program_id, year or 0, gender or ''
+
+
+def _deltas(session):
+    return session.info.setdefault(_INFO_KEY, Counter())
+
+
+def record_rows(session, rows, sign=1):
+    """Count `rows` (dicts with program_id/year/gender) as inserted, or deleted with sign=-1."""
+    deltas = _deltas(session)
+    for row in rows:
+        deltas[stat_key(row.get('program_id'), row.get('year'), row.get('gender'))] += sign
+
+
+# the callers hold no Student objects worth syncing
+_NO_SYNC = {'synchronize_session': False}
+
+
+def delete_students(session, criteria):
+    """DELETE the students matching `criteria`; returns the number deleted.
+
+    The deleted keys come back through RETURNING, so the counts match the
+    rows the statement removed even when another writer got there first.
+    """
+    stmt = delete(Student).where(*criteria).returning(*_KEY_ATTRS)
+    rows = session.execute(stmt, execution_options=_NO_SYNC).all()
+    deltas = _deltas(session)
+    for row in rows:
+        deltas[stat_key(*row)] -= 1
+    return len(rows)
+
+
+def update_students(session, criteria, values):
+    """UPDATE the students matching `criteria` with `values`; returns the number updated.
+
+    Each row's old and new keys are read by the UPDATE itself. On PostgreSQL
+    the old keys come from a CTE that locks the matched rows (FOR UPDATE), so
+    a concurrent writer is waited for and its change is the one moved.
+    SQLite's RETURNING cannot see a FROM clause. There a no-op UPDATE first
+    returns the old keys and takes the database write lock, which keeps the
+    rows as read until the real UPDATE.
+    """
+    if session.get_bind(mapper=Student.__mapper__).dialect.name == 'postgresql':
+        old = (select(Student.id, *_KEY_ATTRS).where(*criteria)
+               .order_by(Student.id).with_for_update().cte('old'))
+        stmt = (update(Student).where(Student.id == old.c.id).values(values)
+                .returning(*(old.c[name] for name in _KEY_FIELDS), *_KEY_ATTRS))
+        moves = [(row[:3], row[3:]) for row in session.execute(stmt, execution_options=_NO_SYNC)]
+    else:
+        read = (update(Student).where(*criteria).values(program_id=Student.program_id)
+                .returning(Student.id, *_KEY_ATTRS))
+        before = {row[0]: row[1:] for row in session.execute(read, execution_options=_NO_SYNC)}
+        stmt = update(Student).where(*criteria).values(values).returning(Student.id, *_KEY_ATTRS)
+        moves = [(before[row[0]], row[1:]) for row in session.execute(stmt, execution_options=_NO_SYNC)]
+    deltas = _deltas(session)
+    for old_key, new_key in moves:
+        deltas[stat_key(*old_key)] -= 1
+        deltas[stat_key(*new_key)] += 1
+    return len(moves)
+
+
+def _key_of(state, old):
+    values = []
+    for name in _KEY_FIELDS:
+        history = state.attrs[name].load_history()
+        current = (history.deleted or history.unchanged) if old else (history.added or history.unchanged)
+        values.append(current[0] if current else None)
+    return stat_key(*values)
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_deleted(session, flush_context, instances):
+    # deleted rows are still loadable here, not after the flush
+    for obj in session.deleted:
+        if isinstance(obj, Student):
+            _deltas(session)[_key_of(inspect(obj), old=True)] -= 1
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed(session, flush_context):
+    # after the flush relationship-set foreign keys are filled in; history is still intact
+    for obj in session.new:
+        if isinstance(obj, Student):
+            _deltas(session)[stat_key(obj.program_id, obj.year, obj.gender)] += 1
+    for obj in session.dirty:
+        if isinstance(obj, Student):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _KEY_FIELDS):
+                deltas = _deltas(session)
+                deltas[_key_of(state, old=True)] -= 1
+                deltas[_key_of(state, old=False)] += 1
+
+
+@event.listens_for(Session, 'before_commit')
+def _apply_before_commit(session):
+    session.flush()
+    deltas = session.info.pop(_INFO_KEY, None)
+    if deltas:
+        apply(session, deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    session.info.pop(_INFO_KEY, None)
+
+
+def _upsert(session, rows):
+    dialect = session.get_bind(mapper=StudentStat.__mapper__).dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(StudentStat).values(rows)
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=list(_KEY_FIELDS),
+            set_={'student_count': StudentStat.student_count + stmt.excluded.student_count}))
+        return
+    for row in rows:
+        result = session.execute(
+            update(StudentStat)
+            .where(StudentStat.program_id == row['program_id'], StudentStat.year == row['year'],
+                   StudentStat.gender == row['gender'])
+            .values(student_count=StudentStat.student_count + row['student_count'])
+            .execution_options(synchronize_session=False))
+        if result.rowcount == 0:
+            session.execute(insert(StudentStat).values(row))
+
+
+def apply(session, deltas):
+    """Add `deltas` ({key: change}) to student_stat in one statement."""
+    changed = sorted((key, delta) for key, delta in deltas.items() if delta)
+    if not changed:
+        return
+    _upsert(session, [dict(zip(_KEY_FIELDS, key), student_count=delta) for key, delta in changed])
+
+
+def rebuild(session):
+    """Recompute student_stat from `student`; the caller commits. Returns the row count."""
+    session.flush()
+    session.info.pop(_INFO_KEY, None)
+    session.execute(delete(StudentStat).execution_options(synchronize_session=False))
+    session.execute(insert(StudentStat).from_select(
+        list(_KEY_FIELDS) + ['student_count'],
+        select(*_KEY_COLUMNS, func.count()).group_by(*_KEY_COLUMNS)))
+    return session.query(func.count()).select_from(StudentStat).scalar()
+
+
+def summary(session, program_id=None, college_id=None):
+    """Totals by program, college, year and gender, read from student_stat only."""
+    count = func.sum(StudentStat.student_count)
+
+    def grouped(column):
+        q = select(column, count).select_from(StudentStat)
+        if college_id is not None or column is Program.college_id:
+            q = q.join(Program, Program.id == StudentStat.program_id)
+        if program_id is not None:
+            q = q.where(StudentStat.program_id == program_id)
+        if college_id is not None:
+            q = q.where(Program.college_id == college_id)
+        return {key: int(n) for key, n in session.execute(q.group_by(column).having(count > 0))}
+
+    by_year = grouped(StudentStat.year)
+    return {
+        'total': sum(by_year.values()),
+        'by_program': grouped(StudentStat.program_id),
+        'by_college': grouped(Program.college_id),
+        'by_year': by_year,
+        'by_gender': grouped(StudentStat.gender),
+    }
@@ -4,4 +4,5 @@ from flask import Blueprint
 bp = Blueprint('user', __name__, template_folder='templates')
 
 # import routes (controller will import `bp` from this package)
-from . import controller  # noqa: E402 (import after bp)
\ No newline at end of file
+from . import controller  # noqa: E402 (import after bp)
+from . import commands  # noqa: E402
\ No newline at end of file
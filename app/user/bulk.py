@@ -0,0 +1,132 @@
+"""Set-based bulk actions on students.
+
+A payload selects students by explicit ids or by a filter:
+
+    {"ids": [1, 2, 3]}
+    {"filter": {"program_id": 7, "year": 4}}
+
+bulk_delete_students() runs one DELETE. bulk_update_students() runs one
+UPDATE (two on SQLite, see stats.update_students()), either with "set"
+values or with "promote": true (year N -> N+1, leaving students already in
+the final year untouched):
+
+    {"filter": {"year": 2}, "promote": true}
+    {"ids": [1, 2], "set": {"program_id": 9}}
+
+The caller commits, so a whole request is one transaction.
+"""
+from app import changes, stats
+from app.database import db
+from app.models import Program, Student
+from .forms import GENDER_CHOICES, YEAR_CHOICES
+
+BULK_MAX_IDS = 5000
+FILTER_FIELDS = ('program_id', 'year', 'gender')
+YEARS = tuple(value for value, _ in YEAR_CHOICES)
+GENDERS = tuple(value for value, _ in GENDER_CHOICES)
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+
+
+def student_criteria(payload):
+    """WHERE clauses for the students a bulk payload selects.
+
+    Raises ValueError for a payload that selects nothing explicitly. An empty
+    filter would otherwise match every student.
+    """
+    ids, filters = payload.get('ids'), payload.get('filter')
+    if ids is not None and filters is not None:
+        raise ValueError('give either ids or filter, not both')
+    if ids is not None:
+        if not isinstance(ids, list) or not ids:
+            raise ValueError('ids must be a non-empty list')
+        if len(ids) > BULK_MAX_IDS:
+            raise ValueError(f'at most {BULK_MAX_IDS} ids per request')
+        return [Student.id.in_(sorted({_int(i, 'ids') for i in ids}))]
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError('ids or a non-empty filter is required')
+    unknown = set(filters) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown filter field(s): {', '.join(sorted(unknown))}")
+    criteria = []
+    for field in FILTER_FIELDS:
+        if field not in filters:
+            continue
+        if field == 'gender':
+            value = filters[field]
+            if value not in GENDERS:
+                raise ValueError('gender is not a valid choice')
+        else:
+            value = _int(filters[field], field)
+        criteria.append(getattr(Student, field) == value)
+    return criteria
+
+
+def _values(changes):
+    unknown = set(changes) - set(FILTER_FIELDS)
+    if unknown:
+        raise ValueError(f"cannot set field(s): {', '.join(sorted(unknown))}")
+    values = {}
+    if 'program_id' in changes:
+        values['program_id'] = _int(changes['program_id'], 'program_id')
+        if db.session.get(Program, values['program_id']) is None:
+            raise ValueError(f"program {values['program_id']} does not exist")
+    if 'year' in changes:
+        values['year'] = _int(changes['year'], 'year')
+        if values['year'] not in YEARS:
+            raise ValueError('year is out of range')
+    if 'gender' in changes:
+        if changes['gender'] not in GENDERS:
+            raise ValueError('gender is not a valid choice')
+        values['gender'] = changes['gender']
+    return values
+
+
+def _log_change(payload, op, affected):
+    """Report the change to app.changes: the ids when given, else a table reset."""
+    if affected:
+        ids = payload.get('ids')
+        changes.record(db.session, 'student', op, [_int(i, 'ids') for i in ids] if ids else None)
+
+
+def bulk_delete_students(payload):
+    """Delete the selected students; returns the number deleted."""
+    affected = stats.delete_students(db.session, student_criteria(payload))
+    _log_change(payload, 'delete', affected)
+    return affected
+
+
+def _update_spec(payload):
+    """(criteria, values) for a bulk-update payload; raises ValueError."""
+    criteria = student_criteria(payload)
+    if payload.get('promote'):
+        if payload.get('set'):
+            raise ValueError('give either set or promote, not both')
+        criteria.append(Student.year < max(YEARS))
+        return criteria, {'year': Student.year + 1}
+    values = _values(payload.get('set') or {})
+    if not values:
+        raise ValueError('set or promote is required')
+    return criteria, values
+
+
+def validate_payload(payload, update=False):
+    """Raise ValueError now for a payload that would fail later, e.g. in a queued job."""
+    if update:
+        _update_spec(payload)
+    else:
+        student_criteria(payload)
+
+
+def bulk_update_students(payload):
+    """Apply "set" values or a one-year promotion; returns the number updated."""
+    criteria, values = _update_spec(payload)
+    # bump row versions so pending single-row edits see the change (app.user.editing)
+    affected = stats.update_students(db.session, criteria, {**values, 'version': Student.version + 1})
+    _log_change(payload, 'update', affected)
+    return affected
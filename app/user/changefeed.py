@@ -0,0 +1,97 @@
+"""Server-Sent Events stream of the change log, with the changed rows attached.
+
+A client sends `since` (or Last-Event-ID on reconnect) and gets every change
+after it. The stream polls change_log every CHANGES_POLL_INTERVAL seconds,
+using one primary-key range query. New entries go out as one `changes`
+event:
+
+    id: 42
+    event: changes
+    data: {"seq": 42, "changes": [
+        {"table": "student", "op": "upsert", "id": 7, "row": {...student_dict...}},
+        {"table": "student", "op": "delete", "id": 9},
+        {"table": "program", "op": "reset"}]}
+
+Rows are read when the event is sent, with one query per table in the
+batch. Several edits of one row therefore collapse into its current state,
+and a row that no longer exists is reported as deleted. A reset (a
+set-based change, or a client too far behind the pruned log) means
+"reload this table".
+
+Each open stream holds a worker thread. After CHANGES_STREAM_SECONDS the
+stream ends, and the browser's EventSource reconnects after
+CHANGES_RETRY_MS with Last-Event-ID. Between polls the database
+connection goes back to the pool.
+"""
+import json
+import time
+
+from app import changes
+from app.database import db
+from app.models import College, Program, Student
+from .queries import (college_dict, colleges_query, program_dict, programs_query, student_dict,
+                      students_query)
+
+# table -> (id column, query builder, row serializer)
+ROW_READERS = {
+    'student': (Student.id, students_query, student_dict),
+    'program': (Program.id, programs_query, program_dict),
+    'college': (College.id, colleges_query, college_dict),
+}
+
+
+def event(name, data, seq=None):
+    """One SSE frame."""
+    head = f'id: {seq}\n' if seq is not None else ''
+    return f'{head}event: {name}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def describe(entries):
+    """Changes to send for change_log `entries`, with the current rows attached."""
+    reset = {e.table_name for e in entries if e.op == 'reset'}
+    # last position of each row wins; a reset covers the whole table
+    order = {}
+    for e in entries:
+        if e.table_name not in reset:
+            order.pop((e.table_name, e.row_id), None)
+            order[(e.table_name, e.row_id)] = True
+    rows = {}
+    for table in {t for t, _ in order}:
+        id_column, query, to_dict = ROW_READERS[table]
+        ids = [row_id for t, row_id in order if t == table]
+        rows.update(((table, r.id), to_dict(r)) for r in query().filter(id_column.in_(ids)).order_by(None))
+    out = [{'table': table, 'op': 'reset'} for table in sorted(reset)]
+    for key in order:
+        row = rows.get(key)
+        out.append({'table': key[0], 'op': 'upsert', 'id': key[1], 'row': row} if row is not None
+                   else {'table': key[0], 'op': 'delete', 'id': key[1]})
+    return out
+
+
+def stream(since, tables, config):
+    """Yield SSE frames for `tables` after seq `since` (None: from now on)."""
+    yield f"retry: {config['CHANGES_RETRY_MS']}\n\n"
+    oldest, newest = changes.bounds(db.session)
+    if since is None:
+        since = newest or 0
+        yield event('ready', {'seq': since}, since)
+    elif changes.gap(since, oldest, newest):
+        since = newest or 0
+        yield event('reset', {'seq': since, 'tables': sorted(tables)}, since)
+    deadline = time.monotonic() + config['CHANGES_STREAM_SECONDS']
+    quiet_since = time.monotonic()
+    while True:
+        entries = changes.read(db.session, since, tables, config['CHANGES_BATCH'])
+        if entries:
+            since = entries[-1].seq
+            yield event('changes', {'seq': since, 'changes': describe(entries)}, since)
+            quiet_since = time.monotonic()
+        elif time.monotonic() - quiet_since >= config['CHANGES_HEARTBEAT']:
+            yield ': keep-alive\n\n'
+            quiet_since = time.monotonic()
+        # hand the connection back to the pool while idle
+        db.session.close()
+        if time.monotonic() >= deadline:
+            return
+        if len(entries) < config['CHANGES_BATCH']:
+            time.sleep(config['CHANGES_POLL_INTERVAL'])
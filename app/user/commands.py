@@ -0,0 +1,84 @@
+"""`flask user ...` CLI commands for bulk operations and accounts."""
+import click
+from werkzeug.datastructures import MultiDict
+
+from . import bp
+from .importer import import_students, iter_rows, detect_format, BATCH_SIZE
+from .exporter import EXPORTS, iter_csv, write_xlsx
+from app import passwords, stats
+from app.database import db
+from app.models import User
+from app.seed import generate
+
+
+@bp.cli.command('import-students')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'json']), help='Defaults to the file extension.')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True, help='Rows per INSERT batch.')
+def import_students_command(path, fmt, batch_size):
+    """Import students from a CSV or JSON file."""
+    with open(path, 'rb') as stream:
+        result = import_students(iter_rows(stream, fmt or detect_format(path)), batch_size=batch_size)
+    for err in result['errors']:
+        click.echo(f"row {err['row']}: {'; '.join(err['errors'])}", err=True)
+    click.echo(f"Imported {result['inserted']} students, {result['failed']} rows rejected.")
+
+
+@bp.cli.command('export')
+@click.argument('table', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'xlsx']), default='csv', show_default=True)
+@click.option('-o', '--output', type=click.Path(dir_okay=False), help='Defaults to stdout (CSV only).')
+@click.option('--filter', 'filters', multiple=True, metavar='KEY=VALUE',
+              help='Listing filter, e.g. --filter year=2 --filter program_id=3.')
+def export_command(table, fmt, output, filters):
+    """Export students, programs or colleges."""
+    args = MultiDict(f.split('=', 1) for f in filters)
+    if fmt == 'xlsx':
+        if not output:
+            raise click.UsageError('XLSX export needs --output.')
+        try:
+            with open(output, 'wb') as fileobj:
+                write_xlsx(table, args, fileobj)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        return
+    out = open(output, 'wb') if output else click.get_binary_stream('stdout')
+    try:
+        for chunk in iter_csv(table, args):
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+
+
+@bp.cli.command('seed')
+@click.option('--colleges', default=50, show_default=True)
+@click.option('--programs', default=2000, show_default=True)
+@click.option('--students', default=200000, show_default=True)
+@click.option('--seed', 'random_seed', default=0, show_default=True, help='Random seed.')
+def seed_command(colleges, programs, students, random_seed):
+    """Fill the database with synthetic colleges, programs and students."""
+    generate(colleges, programs, students, seed=random_seed, echo=click.echo)
+
+
+@bp.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recompute the student_stat summary table from scratch."""
+    rows = stats.rebuild(db.session)
+    db.session.commit()
+    click.echo(f'Rebuilt student statistics: {rows} rows.')
+
+
+@bp.cli.command('create-user')
+@click.argument('username')
+@click.argument('email')
+@click.password_option()
+def create_user_command(username, email, password):
+    """Create a login account, or reset an existing account's password."""
+    user = User.query.filter_by(username=username).first()
+    if user is None:
+        user = User(username=username, email=email)
+        db.session.add(user)
+    passwords.set_password(user, password)
+    db.session.commit()
+    click.echo(f'Saved user {username}.')
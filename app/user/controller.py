@@ -1,14 +1,36 @@
 """User blueprint routes."""
-from flask import render_template, redirect, url_for, flash, request, jsonify
+import os
+import shutil
+
+from flask import (render_template, redirect, url_for, flash, request, jsonify, Response,
+                   stream_with_context, send_file, current_app, abort)
 
 # import the blueprint object from this package
 from . import bp
 
 # local imports
-from .forms import StudentForm, ProgramForm, CollegeForm
-from app.models import Student, Program, College
+from flask_login import login_user, logout_user
+
+from .forms import StudentForm, ProgramForm, CollegeForm, LoginForm
+from app.models import Student, Program, College, Job
 from app.database import db
 from sqlalchemy.exc import IntegrityError
+from .queries import (students_query, filter_students, student_page, student_dict, STUDENT_SORTS,
+                      cached_programs, cached_colleges, programs_json, colleges_json)
+from app.cache import cache
+from app.revisions import conditional
+from app import changes, jobs, passwords, serialization, stats
+from .search import search_students
+from .importer import import_students, iter_rows, detect_format
+from .exporter import EXPORTS, iter_csv, xlsx_tempfile
+from . import changefeed, deletion, editing, uniqueness
+from .bulk import bulk_delete_students, bulk_update_students, validate_payload
+from .tasks import job_file
+from .deletion import DeleteBlocked
+
+STUDENT_PAGE_DEFAULT = 8
+STUDENT_PAGE_MAX = 100
+SEARCH_LIMIT_MAX = 50
 
 
 @bp.route('/')
@@ -17,115 +39,431 @@ def index():
     return render_template('layouts/index.html')
 
 
+def _safe_next(target):
+    # only same-site paths, so ?next= can't send the user elsewhere
+    if target and target.startswith('/') and not target.startswith('//') and '\\' not in target:
+        return target
+    return None
+
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    form = LoginForm()
+    if form.validate_on_submit():
+        try:
+            user = passwords.authenticate(form.username.data.strip(), form.password.data, request.remote_addr)
+        except passwords.LoginThrottled as e:
+            flash('Too many login attempts. Please wait and try again.', 'danger')
+            return render_template('layouts/login.html', form=form), 429, {'Retry-After': str(e.retry_after)}
+        except passwords.HashingBusy:
+            flash('The server is busy. Please try again in a moment.', 'danger')
+            return render_template('layouts/login.html', form=form), 503, {'Retry-After': '1'}
+        if user is not None:
+            login_user(user)
+            return redirect(_safe_next(request.args.get('next')) or url_for('home'))
+        flash('Invalid username or password.', 'danger')
+        return render_template('layouts/login.html', form=form), 401
+    return render_template('layouts/login.html', form=form)
+
+
+@bp.route('/logout', methods=['POST'])
+def logout():
+    logout_user()
+    return redirect(url_for('user.login'))
+
+
+def _edit_from_form(model, form, unique_message, values):
+    """Apply an edit form with one version-checked UPDATE; False (after flashing) if it failed.
+
+    Only the fields that differ from the form's `original` are written (see
+    editing.changed_values). A form without a version (an old page)
+    overwrites the row unconditionally.
+    """
+    version = int(form.version.data) if (form.version.data or '').isdigit() else None
+    try:
+        editing.update_versioned(model, int(form.id.data), version, values)
+    except editing.VersionConflict as e:
+        db.session.rollback()
+        flash(str(e), 'warning')
+        return False
+    except LookupError:
+        db.session.rollback()
+        flash(f'{model.__name__} no longer exists.', 'warning')
+        return False
+    except IntegrityError:
+        db.session.rollback()
+        flash(unique_message, 'danger')
+        return False
+    return True
+
+
+def _save_form(model, form, unique_message, **values):
+    """Create or edit a row from a validated form and commit; False (after flashing) if not saved.
+
+    The form's Unique validators have already checked the key. A create that
+    loses a race for it is skipped by INSERT ... ON CONFLICT DO NOTHING, so
+    that path needs no rollback either (see app/user/uniqueness.py).
+    """
+    if form.id.data:
+        values = editing.changed_values(values, form.original.data)
+        if values:  # an unchanged form writes nothing
+            if not _edit_from_form(model, form, unique_message, values):
+                return False
+            changes.record(db.session, model.__tablename__, 'update', [int(form.id.data)])
+    else:
+        inserted = uniqueness.insert_new(model, [values])
+        if not inserted:
+            flash(unique_message, 'danger')
+            return False
+        if model is Student:
+            stats.record_rows(db.session, [values])
+        changes.record(db.session, model.__tablename__, 'insert', inserted.values())
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # databases without ON CONFLICT
+        db.session.rollback()
+        flash(unique_message, 'danger')
+        return False
+    return True
+
+
+def _flash_errors(form):
+    """Surface validation errors on the page too; the form itself sits in a closed modal."""
+    for field, errors in form.errors.items():
+        for error in errors:
+            flash(f'{getattr(form, field).label.text}: {error}', 'danger')
+
+
 @bp.route('/programs', methods=['GET', 'POST'])
+@conditional('college', 'program', html=True)
 def programs():
     form = ProgramForm()
-    # populate college choices for the program form (ORM objects)
-    colleges_q = College.query.order_by(College.name).all()
-    form.college_id.choices = [(c.id, f"{c.code} - {c.name}") for c in colleges_q]
+    # populate college choices for the program form (cached reference data)
+    colleges = cached_colleges()
+    form.college_id.choices = [(c['id'], f"{c['code']} - {c['name']}") for c in colleges]
 
     # handle create or edit
     if form.validate_on_submit():
-        if form.id.data:
-            # editing existing program
-            prog = Program.query.get(int(form.id.data))
-            if prog:
-                prog.code = form.code.data.strip()
-                prog.name = form.name.data.strip()
-                prog.college_id = form.college_id.data
-        else:
-            prog = Program(code=form.code.data.strip(), name=form.name.data.strip(), college_id=form.college_id.data)
-            db.session.add(prog)
-        try:
-            db.session.commit()
+        if _save_form(Program, form, 'Program code must be unique.', code=form.code.data.strip(),
+                      name=form.name.data.strip(), college_id=form.college_id.data):
             flash('Program saved', 'success')
             return redirect(url_for('user.programs'))
-        except IntegrityError:
-            db.session.rollback()
-            flash('Program code must be unique.', 'danger')
-
-    # serializable lists for templates/JS
-    programs_q = Program.query.order_by(Program.name).all()
-    programs = [
-        {'id': p.id, 'code': p.code, 'name': p.name, 'college': (p.college.name if p.college else ''), 'college_id': p.college_id}
-        for p in programs_q
-    ]
-    colleges = [{'id': c.id, 'code': c.code, 'name': c.name} for c in colleges_q]
+    elif form.is_submitted():
+        _flash_errors(form)
 
-    return render_template('layouts/programs.html', form=form, programs=programs, colleges=colleges)
+    # pre-encoded lists for templates/JS
+    return render_template('layouts/programs.html', form=form,
+                           programs_json=serialization.script_json(programs_json()),
+                           colleges_json=serialization.script_json(colleges_json()))
 
 
 @bp.route('/colleges', methods=['GET', 'POST'])
+@conditional('college', html=True)
 def colleges():
     form = CollegeForm()
     if form.validate_on_submit():
-        if form.id.data:
-            col = College.query.get(int(form.id.data))
-            if col:
-                col.code = form.code.data.strip()
-                col.name = form.name.data.strip()
-        else:
-            col = College(code=form.code.data.strip(), name=form.name.data.strip())
-            db.session.add(col)
-        try:
-            db.session.commit()
+        if _save_form(College, form, 'College code must be unique.', code=form.code.data.strip(),
+                      name=form.name.data.strip()):
             flash('College saved', 'success')
             return redirect(url_for('user.colleges'))
-        except IntegrityError:
-            db.session.rollback()
-            flash('College code must be unique.', 'danger')
+    elif form.is_submitted():
+        _flash_errors(form)
 
-    colleges_q = College.query.order_by(College.name).all()
-    colleges = [{'id': c.id, 'code': c.code, 'name': c.name} for c in colleges_q]
-    return render_template('layouts/colleges.html', form=form, colleges=colleges)
+    return render_template('layouts/colleges.html', form=form,
+                           colleges_json=serialization.script_json(colleges_json()))
 
 
 @bp.route('/students', methods=['GET', 'POST'])
+@conditional('college', 'program', html=True)
 def students():
     form = StudentForm()
-    programs_q = Program.query.order_by(Program.name).all()
-    form.program_id.choices = [(p.id, f"{p.code} - {p.name}") for p in programs_q]
+    programs = cached_programs()
+    form.program_id.choices = [(p['id'], f"{p['code']} - {p['name']}") for p in programs]
 
     if form.validate_on_submit():
-        if form.id.data:
-            st = Student.query.get(int(form.id.data))
-            if st:
-                st.id_number = form.id_number.data.strip()
-                st.first_name = form.first_name.data.strip()
-                st.last_name = form.last_name.data.strip()
-                st.program_id = form.program_id.data
-                st.year = form.year.data
-                st.gender = form.gender.data
-        else:
-            st = Student(
-                id_number=form.id_number.data.strip(),
-                first_name=form.first_name.data.strip(),
-                last_name=form.last_name.data.strip(),
-                program_id=form.program_id.data,
-                year=form.year.data,
-                gender=form.gender.data,
-            )
-            db.session.add(st)
+        if _save_form(Student, form, 'Student ID must be unique.', id_number=form.id_number.data.strip(),
+                      first_name=form.first_name.data.strip(), last_name=form.last_name.data.strip(),
+                      program_id=form.program_id.data, year=form.year.data, gender=form.gender.data):
+            flash('Student saved', 'success')
+            return redirect(url_for('user.students'))
+    elif form.is_submitted():
+        _flash_errors(form)
+
+    # rows are fetched page by page from api_students(); only the program
+    # list (for the filter select) is embedded in the page
+    return render_template('layouts/students.html', form=form, programs=programs,
+                           programs_json=serialization.script_json(programs_json()))
+
+
+@bp.route('/api/students')
+@conditional('student', 'program')
+def api_students():
+    """Return one page of students as JSON using keyset (cursor) pagination.
+
+    Query params:
+        - sort: one of STUDENT_SORTS (default id_number); order: asc|desc
+        - limit: page size (capped at STUDENT_PAGE_MAX)
+        - cursor: opaque value from a previous response's `next_cursor`
+        - program_id, year, gender: optional filters
+        - q: optional substring match on id number, names and program
+    """
+    sort = request.args.get('sort', 'id_number')
+    order = request.args.get('order', 'asc')
+    if sort not in STUDENT_SORTS or order not in ('asc', 'desc'):
+        return jsonify(success=False, message='Invalid sort parameters.'), 400
+    limit = request.args.get('limit', STUDENT_PAGE_DEFAULT, type=int)
+    limit = max(1, min(limit, STUDENT_PAGE_MAX))
+
+    q = filter_students(students_query(),
+                        program_id=request.args.get('program_id', type=int),
+                        year=request.args.get('year', type=int),
+                        gender=request.args.get('gender'),
+                        term=(request.args.get('q') or '').strip())
+    try:
+        rows, next_cursor = student_page(q, sort, order, limit, request.args.get('cursor'))
+    except (ValueError, TypeError):
+        return jsonify(success=False, message='Invalid cursor.'), 400
+    return jsonify(items=[student_dict(r) for r in rows], next_cursor=next_cursor, limit=limit)
+
+
+@bp.route('/api/students/search')
+@conditional('student', 'program')
+def api_student_search():
+    """Ranked search over id number, first/last name and program name.
+
+    Query params: q (required), limit, plus the program_id/year/gender
+    filters of api_students().
+    """
+    term = (request.args.get('q') or '').strip()
+    if not term:
+        return jsonify(items=[])
+    limit = max(1, min(request.args.get('limit', 20, type=int), SEARCH_LIMIT_MAX))
+    q = filter_students(students_query(),
+                        program_id=request.args.get('program_id', type=int),
+                        year=request.args.get('year', type=int),
+                        gender=request.args.get('gender'))
+    rows = search_students(q, term, db.session.get_bind().dialect.name).limit(limit).all()
+    items = [dict(student_dict(r), score=round(float(r.score), 3)) for r in rows]
+    return jsonify(items=items)
+
+
+@bp.route('/api/students/import', methods=['POST'])
+def api_student_import():
+    """Bulk-import students from an uploaded file (`file`) or the raw body.
+
+    The format comes from `?format=csv|json`, else the file name or content
+    type. Responds with inserted/failed counts and per-row errors.
+    `?dry_run=1` validates the whole file, existing ids included, and writes
+    nothing; the response counts `valid` rows instead.
+    """
+    upload = request.files.get('file')
+    if upload:
+        stream, fmt = upload.stream, detect_format(upload.filename, upload.mimetype)
+    else:
+        stream, fmt = request.stream, detect_format(content_type=request.mimetype)
+    fmt = request.args.get('format', fmt)
+    if fmt not in ('csv', 'json'):
+        return jsonify(success=False, message='Format must be csv or json.'), 400
+    dry_run = _flag('dry_run')
+    if _wants_async():
+        name, path = job_file('import', fmt)
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(stream, out)
+        return _accepted(jobs.enqueue('import_students', file=name, format=fmt, dry_run=dry_run))
+    result = import_students(iter_rows(stream, fmt), dry_run=dry_run)
+    return jsonify(success=result['failed'] == 0, **result)
+
+
+def _flag(name):
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+def _wants_async():
+    return _flag('async')
+
+
+def _accepted(job_id):
+    """202 response pointing at the status of a queued job."""
+    status_url = url_for('user.api_job', job_id=job_id)
+    return jsonify(success=True, job_id=job_id, status_url=status_url), 202, {'Location': status_url}
+
+
+def _bulk_action(action, verb, kind, update=False):
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify(success=False, message='Expected a JSON object.'), 400
+    if _wants_async():
+        try:
+            validate_payload(payload, update)
+        except ValueError as e:
+            return jsonify(success=False, message=str(e)), 400
+        return _accepted(jobs.enqueue(kind, payload=payload))
+    try:
+        affected = action(payload)
         db.session.commit()
-        flash('Student saved', 'success')
-        return redirect(url_for('user.students'))
-
-    students_q = Student.query.all()
-    students = [
-        {
-            'id': s.id,
-            'id_number': s.id_number,
-            'first_name': s.first_name,
-            'last_name': s.last_name,
-            'program_id': s.program_id,
-            'program': (s.program.name if s.program else ''),
-            'year': s.year,
-            'gender': s.gender,
-        }
-        for s in students_q
-    ]
-    programs = [{'id': p.id, 'code': p.code, 'name': p.name} for p in programs_q]
-    return render_template('layouts/students.html', form=form, students=students, programs=programs)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify(success=False, message=str(e)), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(success=False, message='Bulk change conflicts with existing data.'), 400
+    return jsonify(success=True, affected=affected, message=f'{affected} student(s) {verb}')
+
+
+@bp.route('/api/students/bulk-delete', methods=['POST'])
+def api_student_bulk_delete():
+    """Delete students by `ids` or `filter` with one DELETE (see app/user/bulk.py)."""
+    return _bulk_action(bulk_delete_students, 'deleted', 'bulk_delete_students')
+
+
+@bp.route('/api/students/bulk-update', methods=['POST'])
+def api_student_bulk_update():
+    """Update students by `ids` or `filter` with `set` values or `promote`, in one UPDATE."""
+    return _bulk_action(bulk_update_students, 'updated', 'bulk_update_students', update=True)
+
+
+def _patch(model, item_id):
+    """Partial, version-checked update from a JSON body in one UPDATE (see app/user/editing.py)."""
+    try:
+        version, values = editing.clean_changes(model, request.get_json(silent=True))
+        version = editing.update_versioned(model, item_id, version, values)
+        changes.record(db.session, model.__tablename__, 'update', [item_id])
+        db.session.commit()
+    except editing.VersionConflict as e:
+        db.session.rollback()
+        return jsonify(success=False, message=str(e), current_version=e.current_version), 409
+    except LookupError:
+        db.session.rollback()
+        abort(404)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify(success=False, message=str(e)), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(success=False, message='Change conflicts with existing data.'), 400
+    return jsonify(success=True, id=item_id, version=version, changed=values)
+
+
+@bp.route('/api/students/<int:item_id>', methods=['PATCH'])
+def api_student_patch(item_id):
+    """Change some fields of a student; the body carries the `version` it was read at."""
+    return _patch(Student, item_id)
+
+
+@bp.route('/api/programs/<int:item_id>', methods=['PATCH'])
+def api_program_patch(item_id):
+    """Change some fields of a program (409 if its version moved on)."""
+    return _patch(Program, item_id)
+
+
+@bp.route('/api/colleges/<int:item_id>', methods=['PATCH'])
+def api_college_patch(item_id):
+    """Change some fields of a college (409 if its version moved on)."""
+    return _patch(College, item_id)
+
+
+@bp.route('/export/<table>.<fmt>')
+def export(table, fmt):
+    """Stream students/programs/colleges as CSV or XLSX.
+
+    Accepts the same filters as the listing views (q, program_id, year,
+    gender for students; q, college_id for programs; q for colleges).
+    """
+    if table not in EXPORTS or fmt not in ('csv', 'xlsx'):
+        return jsonify(success=False, message='Unknown export.'), 404
+    if _wants_async():
+        filters = [(k, v) for k, v in request.args.items(multi=True) if k != 'async']
+        return _accepted(jobs.enqueue('export', table=table, format=fmt, filters=filters))
+    filename = f'{table}.{fmt}'
+    if fmt == 'csv':
+        return Response(stream_with_context(iter_csv(table, request.args)), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+    try:
+        fileobj = xlsx_tempfile(table, request.args)
+    except RuntimeError as e:
+        return jsonify(success=False, message=str(e)), 501
+    return send_file(fileobj, as_attachment=True, download_name=filename,
+                     mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+
+
+@bp.route('/api/changes')
+def api_changes():
+    """Server-Sent Events feed of student, program and college changes.
+
+    The client passes the last seq it has applied, as Last-Event-ID on
+    reconnect or `since` on first connect. Without either, the stream starts
+    from now. `tables` narrows the feed, e.g. ?tables=student,program. See
+    app/user/changefeed.py for the event format.
+    """
+    tables = set(filter(None, (request.args.get('tables') or ','.join(changefeed.ROW_READERS)).split(',')))
+    if not tables or not tables <= set(changefeed.ROW_READERS):
+        return jsonify(success=False, message=f"tables must be among {', '.join(changefeed.ROW_READERS)}"), 400
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since else None
+    except ValueError:
+        return jsonify(success=False, message='since must be an integer'), 400
+    return Response(stream_with_context(changefeed.stream(since, tables, current_app.config)),
+                    mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@bp.route('/api/stats')
+@conditional('student', 'program', 'college')
+def api_stats():
+    """Student counts by program, college, year and gender.
+
+    Read from the student_stat summary table (see app/stats.py), never from
+    `student`. Optional program_id / college_id narrow every breakdown.
+    """
+    counts = stats.summary(db.session, program_id=request.args.get('program_id', type=int),
+                           college_id=request.args.get('college_id', type=int))
+    by_program, by_college = counts['by_program'], counts['by_college']
+    return jsonify(
+        total=counts['total'],
+        by_year={str(year or ''): n for year, n in sorted(counts['by_year'].items())},
+        by_gender=counts['by_gender'],
+        by_program=[{'id': p['id'], 'code': p['code'], 'count': by_program[p['id']]}
+                    for p in cached_programs() if p['id'] in by_program],
+        by_college=[{'id': c['id'], 'code': c['code'], 'count': by_college[c['id']]}
+                    for c in cached_colleges() if c['id'] in by_college],
+    )
+
+
+@bp.route('/api/stats/rebuild', methods=['POST'])
+def api_stats_rebuild():
+    """Queue a full rebuild of the student_stat table."""
+    return _accepted(jobs.enqueue('rebuild_stats'))
+
+
+@bp.route('/api/jobs/<int:job_id>')
+def api_job(job_id):
+    """Status, progress and result of a background job."""
+    return jsonify(jobs.job_dict(db.get_or_404(Job, job_id)))
+
+
+@bp.route('/api/jobs/<int:job_id>/download')
+def api_job_download(job_id):
+    """The file written by a finished export job."""
+    job = db.get_or_404(Job, job_id)
+    result = jobs.job_dict(job)['result'] or {}
+    if job.kind != 'export' or job.status != 'done' or 'file' not in result:
+        return jsonify(success=False, message='No file for this job.'), 404
+    return send_file(os.path.join(jobs.job_dir(), result['file']), as_attachment=True,
+                     download_name=result['download_name'])
+
+
+@bp.route('/api/cache')
+def api_cache_stats():
+    """Reference-data cache hit/miss counters."""
+    return jsonify(cache.stats())
+
+
+@bp.route('/api/pool')
+def api_pool_stats():
+    """Connection pool counters and gauges per engine."""
+    stats = current_app.extensions.get('pool_stats', {})
+    return jsonify({key: s.snapshot() for key, s in stats.items()})
 
 
 @bp.route('/students/delete/<int:item_id>', methods=['POST'])
@@ -133,6 +471,7 @@ def delete_student(item_id):
     st = Student.query.get_or_404(item_id)
     try:
         db.session.delete(st)
+        changes.record(db.session, 'student', 'delete', [item_id])
         db.session.commit()
         return jsonify(success=True, message='Student deleted')
     except Exception as e:
@@ -140,32 +479,42 @@ def delete_student(item_id):
         return jsonify(success=False, message=str(e)), 400
 
 
-@bp.route('/programs/delete/<int:item_id>', methods=['POST'])
-def delete_program(item_id):
-    prog = Program.query.get_or_404(item_id)
-    # prevent deleting programs that still have students
-    if getattr(prog, 'students', None) and len(prog.students) > 0:
-        return jsonify(success=False, message='Program cannot be deleted because students are enrolled.'), 400
+def _delete_options():
+    """(mode, target) from the query string, form or JSON body."""
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode') or request.values.get('mode') or 'restrict'
+    target = data.get('target', request.values.get('target'))
     try:
-        db.session.delete(prog)
-        db.session.commit()
-        return jsonify(success=True, message='Program deleted')
-    except Exception as e:
-        db.session.rollback()
-        return jsonify(success=False, message=str(e)), 400
+        target = int(target) if target not in (None, '') else None
+    except (TypeError, ValueError):
+        raise ValueError('target must be an integer id')
+    return mode, target
 
 
-@bp.route('/colleges/delete/<int:item_id>', methods=['POST'])
-def delete_college(item_id):
-    col = College.query.get_or_404(item_id)
-    # prevent deleting colleges that still have programs
-    if getattr(col, 'programs', None) and len(col.programs) > 0:
-        return jsonify(success=False, message='College cannot be deleted because programs are linked.'), 400
+def _delete_with_guard(delete_fn, item_id, done_message, child_name):
     try:
-        db.session.delete(col)
+        mode, target = _delete_options()
+        affected = delete_fn(item_id, mode, target)
         db.session.commit()
-        return jsonify(success=True, message='College deleted')
+    except DeleteBlocked as e:
+        db.session.rollback()
+        return jsonify(success=False, message=str(e), blocking_count=e.count, blocking=child_name), 400
+    except LookupError:
+        db.session.rollback()
+        abort(404)
     except Exception as e:
         db.session.rollback()
         return jsonify(success=False, message=str(e)), 400
+    return jsonify(success=True, message=done_message, mode=mode, affected=affected)
+
 
+@bp.route('/programs/delete/<int:item_id>', methods=['POST'])
+def delete_program(item_id):
+    # ?mode=cascade removes enrolled students, ?mode=reassign&target=<id> moves them
+    return _delete_with_guard(deletion.delete_program, item_id, 'Program deleted', 'students')
+
+
+@bp.route('/colleges/delete/<int:item_id>', methods=['POST'])
+def delete_college(item_id):
+    # ?mode=cascade removes linked programs (and their students), ?mode=reassign&target=<id> moves them
+    return _delete_with_guard(deletion.delete_college, item_id, 'College deleted', 'programs')
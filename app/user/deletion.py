@@ -0,0 +1,106 @@
+"""Set-based delete guards and delete modes for programs and colleges.
+
+The guards run an EXISTS probe first. Only a blocked delete pays for the
+COUNT that is shown to the user. Both use the program_id / college_id
+indexes and never load child rows into the session.
+
+Modes:
+    restrict (default)  refuse while children exist
+    cascade             delete the children, and for a college also its
+                        programs' students, with one DELETE per table
+    reassign            move the children to `target` with one UPDATE
+
+The parent row is removed with a DELETE statement too. session.delete()
+would make the ORM load the backref collection to null out the children.
+"""
+from sqlalchemy import delete, exists, func, select, update
+
+from app import changes, stats
+from app.database import db
+from app.models import College, Program, Student
+
+DELETE_MODES = ('restrict', 'cascade', 'reassign')
+
+
+class DeleteBlocked(Exception):
+    """Raised when children still reference the row in restrict mode."""
+
+    def __init__(self, message, count):
+        super().__init__(message)
+        self.count = count
+
+
+def _child_count(column, parent_id):
+    """COUNT of children, or 0 without counting when an EXISTS finds none."""
+    if not db.session.query(exists().where(column == parent_id)).scalar():
+        return 0
+    return db.session.execute(select(func.count()).where(column == parent_id)).scalar()
+
+
+def _check_target(model, item_id, target):
+    if target is None:
+        raise ValueError('reassign mode needs a target id')
+    if target == item_id:
+        raise ValueError('cannot reassign to the row being deleted')
+    if db.session.get(model, target) is None:
+        raise ValueError(f'{model.__tablename__} {target} does not exist')
+
+
+def _delete_parent(model, item_id):
+    if db.session.execute(delete(model).where(model.id == item_id)).rowcount == 0:
+        raise LookupError(f'{model.__tablename__} {item_id} does not exist')
+    changes.record(db.session, model.__tablename__, 'delete', [item_id])
+
+
+def delete_program(item_id, mode='restrict', target=None):
+    """Delete program `item_id`. Returns the number of students removed or moved.
+
+    Raises DeleteBlocked (restrict mode with students enrolled), LookupError
+    (no such program) or ValueError (bad mode/target). The caller commits.
+    """
+    if mode not in DELETE_MODES:
+        raise ValueError(f'unknown delete mode {mode!r}')
+    affected = 0
+    if mode == 'restrict':
+        count = _child_count(Student.program_id, item_id)
+        if count:
+            raise DeleteBlocked('Program cannot be deleted because students are enrolled.', count)
+    elif mode == 'cascade':
+        affected = stats.delete_students(db.session, [Student.program_id == item_id])
+    else:
+        _check_target(Program, item_id, target)
+        affected = stats.update_students(db.session, [Student.program_id == item_id],
+                                         {'program_id': target, 'version': Student.version + 1})
+    if affected:
+        changes.record(db.session, 'student', 'reset')
+    _delete_parent(Program, item_id)
+    return affected
+
+
+def delete_college(item_id, mode='restrict', target=None):
+    """Delete college `item_id`. Returns the number of programs removed or moved.
+
+    Cascade also deletes the students of those programs. Errors as for
+    delete_program(); the caller commits.
+    """
+    if mode not in DELETE_MODES:
+        raise ValueError(f'unknown delete mode {mode!r}')
+    affected = 0
+    if mode == 'restrict':
+        count = _child_count(Program.college_id, item_id)
+        if count:
+            raise DeleteBlocked('College cannot be deleted because programs are linked.', count)
+    elif mode == 'cascade':
+        program_ids = select(Program.id).where(Program.college_id == item_id)
+        stats.delete_students(db.session, [Student.program_id.in_(program_ids)])
+        affected = db.session.execute(delete(Program).where(Program.college_id == item_id)).rowcount
+    else:
+        _check_target(College, item_id, target)
+        affected = db.session.execute(update(Program).where(Program.college_id == item_id)
+                                      .values(college_id=target, version=Program.version + 1)).rowcount
+    if affected:
+        changes.record(db.session, 'program', 'reset')
+        if mode == 'cascade':
+            changes.record(db.session, 'student', 'reset')
+    _delete_parent(College, item_id)
+    return affected
@@ -0,0 +1,161 @@
+"""Single-statement, version-checked edits of students, programs and colleges.
+
+Each of these tables has a `version` column, which is the mapper's
+version_id_col, so ORM flushes check and bump it too. An edit is one
+statement:
+
+    UPDATE student SET first_name = ?, version = version + 1
+    WHERE student.id = ? AND student.version = ?
+
+It sets only the columns passed in. No SELECT runs before it. When no row
+matches, the row was either deleted (LookupError) or changed since the
+client read it. In the second case VersionConflict carries the current
+version, and that lookup is the only extra statement, run only on this
+failure path.
+
+Moving a student to another program, year or gender goes through
+stats.update_students(), which reads the old and new keys back from the
+UPDATE to keep app.stats current (one extra no-op UPDATE on SQLite).
+
+The edit forms post every field. They also post `original`, the row as
+the form was filled, as JSON. changed_values() keeps only the fields that
+differ from it, so a form edit writes the same narrow UPDATE as a PATCH. It
+also skips the stats bookkeeping unless a stats column moved.
+"""
+import json
+import re
+
+from sqlalchemy import select, update
+
+from app import stats
+from app.database import db
+from app.models import College, Program, Student
+from .bulk import GENDERS, YEARS
+from .forms import ID_NUMBER_MAX_LENGTH, ID_NUMBER_PATTERN, NAME_MAX_LENGTH
+from .queries import cached_colleges, cached_programs
+
+
+class VersionConflict(Exception):
+    """The row changed after the client read it."""
+
+    def __init__(self, current_version):
+        super().__init__('This record was changed by someone else. Reload it and try again.')
+        self.current_version = current_version
+
+
+def _text(max_length, pattern=None, message=None):
+    def clean(value, name):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f'{name} is required')
+        value = value.strip()
+        if len(value) > max_length:
+            raise ValueError(f'{name} must be at most {max_length} characters')
+        if pattern and not re.match(pattern, value):
+            raise ValueError(message or f'{name} is not valid')
+        return value
+    return clean
+
+
+def _int(value, name):
+    if isinstance(value, bool):
+        raise ValueError(f'{name} must be an integer')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f'{name} must be an integer')
+
+
+def _choice(choices, convert=None):
+    def clean(value, name):
+        value = convert(value, name) if convert else value
+        if value not in choices:
+            raise ValueError(f'{name} is not a valid choice')
+        return value
+    return clean
+
+
+def _reference(rows):
+    # validated against the cached reference lists, so no SELECT on a hit
+    def clean(value, name):
+        value = _int(value, name)
+        if value not in {row['id'] for row in rows()}:
+            raise ValueError(f'{name} {value} does not exist')
+        return value
+    return clean
+
+
+FIELDS = {
+    Student: {
+        'id_number': _text(ID_NUMBER_MAX_LENGTH, ID_NUMBER_PATTERN, 'Use format YYYY-NNNN'),
+        'first_name': _text(NAME_MAX_LENGTH),
+        'last_name': _text(NAME_MAX_LENGTH),
+        'program_id': _reference(cached_programs),
+        'year': _choice(YEARS, _int),
+        'gender': _choice(GENDERS),
+    },
+    Program: {
+        'code': _text(10),
+        'name': _text(100),
+        'college_id': _reference(cached_colleges),
+    },
+    College: {
+        'code': _text(10),
+        'name': _text(100),
+    },
+}
+
+
+def clean_changes(model, payload):
+    """(expected version, {column: value}) from a PATCH body; raises ValueError."""
+    if not isinstance(payload, dict):
+        raise ValueError('Expected a JSON object.')
+    if 'version' not in payload:
+        raise ValueError('version is required')
+    version = _int(payload['version'], 'version')
+    fields = FIELDS[model]
+    unknown = set(payload) - set(fields) - {'version'}
+    if unknown:
+        raise ValueError(f"cannot change field(s): {', '.join(sorted(unknown))}")
+    values = {name: fields[name](value, name) for name, value in payload.items() if name in fields}
+    if not values:
+        raise ValueError('nothing to change')
+    return version, values
+
+
+def changed_values(values, original):
+    """The entries of form `values` that differ from `original` (JSON).
+
+    Without a readable `original` every value counts as changed.
+    """
+    try:
+        original = json.loads(original or '')
+    except ValueError:
+        return dict(values)
+    if not isinstance(original, dict):
+        return dict(values)
+    return {name: value for name, value in values.items()
+            if name not in original or str(original[name]) != str(value)}
+
+
+def update_versioned(model, item_id, version, values):
+    """Apply `values` to row `item_id` if it is still at `version`; returns the new version.
+
+    Raises LookupError when the row is gone and VersionConflict when its
+    version moved on. version=None skips the check (last write wins) and
+    returns None. The caller commits (or rolls back on error).
+    """
+    criteria = [model.id == item_id]
+    if version is not None:
+        criteria.append(model.version == version)
+    values = dict(values, version=model.version + 1)
+    if model is Student and {'program_id', 'year', 'gender'} & set(values):
+        updated = stats.update_students(db.session, criteria, values)
+    else:
+        updated = db.session.execute(update(model).where(*criteria).values(values),
+                                     execution_options={'synchronize_session': False}).rowcount
+    if updated == 1:
+        return version + 1 if version is not None else None
+    current = db.session.execute(select(model.version).where(model.id == item_id)).scalar()
+    if current is None:
+        raise LookupError(f'{model.__name__} {item_id} not found')
+    raise VersionConflict(current)
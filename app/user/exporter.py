@@ -0,0 +1,110 @@
+"""Streaming CSV/XLSX export of students, programs and colleges.
+
+Rows are read with `yield_per`, which turns on server-side cursors
+(stream_results) on PostgreSQL. They are written out chunk by chunk, so
+memory use does not grow with the size of the table. XLSX needs the
+optional `openpyxl` package.
+
+Text cells that a spreadsheet would run as a formula (starting with =, +,
+-, @, tab or CR) are written with a leading apostrophe, in both formats, so
+user-entered names and codes cannot inject formulas.
+"""
+import csv
+import io
+import tempfile
+
+from app.models import Student
+from .queries import (students_query, filter_students, programs_query, filter_programs,
+                      colleges_query, filter_colleges)
+
+# rows fetched per round trip from the server-side cursor
+YIELD_PER = 1000
+# rows buffered before a CSV chunk is handed to the response
+CSV_CHUNK_ROWS = 500
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+EXPORTS = {
+    'students': (
+        ['ID Number', 'First Name', 'Last Name', 'Program', 'Year', 'Gender'],
+        lambda r: (r.id_number, r.first_name, r.last_name, r.program, r.year, r.gender),
+    ),
+    'programs': (
+        ['Code', 'Name', 'College'],
+        lambda r: (r.code, r.name, r.college),
+    ),
+    'colleges': (
+        ['Code', 'Name'],
+        lambda r: (r.code, r.name),
+    ),
+}
+
+
+def export_query(table, filters):
+    """Listing query for `table` with the same filters the list views accept.
+
+    `filters` is a mapping like request.args (supports .get(key, type=...)).
+    """
+    term = (filters.get('q') or '').strip()
+    if table == 'students':
+        q = filter_students(students_query(),
+                            program_id=filters.get('program_id', type=int),
+                            year=filters.get('year', type=int),
+                            gender=filters.get('gender'),
+                            term=term)
+        return q.order_by(Student.id_number)
+    if table == 'programs':
+        return filter_programs(programs_query(), college_id=filters.get('college_id', type=int), term=term)
+    return filter_colleges(colleges_query(), term=term)
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def export_rows(table, filters):
+    """Yield plain tuples for `table`, streamed from the database."""
+    to_tuple = EXPORTS[table][1]
+    for row in export_query(table, filters).yield_per(YIELD_PER):
+        yield tuple(_cell(value) for value in to_tuple(row))
+
+
+def iter_csv(table, filters):
+    """Yield the CSV export of `table` as a sequence of UTF-8 chunks."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORTS[table][0])
+    for i, row in enumerate(export_rows(table, filters), 1):
+        writer.writerow(row)
+        if i % CSV_CHUNK_ROWS == 0:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode()
+
+
+def write_xlsx(table, filters, fileobj):
+    """Write the XLSX export of `table` to `fileobj`.
+
+    Uses openpyxl's write-only mode, which spools rows to disk instead of
+    keeping the sheet in memory. Raises RuntimeError if openpyxl is missing.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError('XLSX export requires the openpyxl package.')
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(table.capitalize())
+    ws.append(EXPORTS[table][0])
+    for row in export_rows(table, filters):
+        ws.append(row)
+    wb.save(fileobj)
+
+
+def xlsx_tempfile(table, filters):
+    """Return a rewound temporary file holding the XLSX export."""
+    fileobj = tempfile.TemporaryFile()
+    write_xlsx(table, filters, fileobj)
+    fileobj.seek(0)
+    return fileobj
@@ -1,7 +1,17 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, SubmitField, HiddenField
+from wtforms import StringField, SelectField, SubmitField, HiddenField, PasswordField
 from wtforms.validators import DataRequired, Length, Regexp
 
+from app.models import College, Program, Student
+from .uniqueness import Unique
+
+# student field rules, shared with the bulk importer so both paths agree
+ID_NUMBER_PATTERN = r'^\d{4}-\d{4}$'
+ID_NUMBER_MAX_LENGTH = 50
+NAME_MAX_LENGTH = 100
+YEAR_CHOICES = [(1, '1'), (2, '2'), (3, '3'), (4, '4')]
+GENDER_CHOICES = [('M', 'Male'), ('F', 'Female'), ('O', 'Other')]
+
 
 class ProgramForm(FlaskForm):
 	"""Form for creating / editing a Program.
@@ -10,17 +20,32 @@ class ProgramForm(FlaskForm):
 	before validating/rendering so the select displays available colleges.
 	"""
 	id = HiddenField('id')
-	code = StringField('Code', validators=[DataRequired(), Length(max=10)])
+	# row version the edit is based on, and the row as the form was filled (app.user.editing)
+	version = HiddenField('version')
+	original = HiddenField('original')
+	code = StringField('Code', validators=[DataRequired(), Length(max=10),
+										   Unique(Program.code, 'Program code must be unique.')])
 	name = StringField('Name', validators=[DataRequired(), Length(max=100)])
 	# choices must be populated by the view: form.college_id.choices = [(id, name), ...]
 	college_id = SelectField('College', coerce=int, validators=[DataRequired()])
 	submit = SubmitField('Save')
 
 
+class LoginForm(FlaskForm):
+	"""Username / password login; the check itself is app.passwords.authenticate()."""
+	username = StringField('Username', validators=[DataRequired(), Length(max=80)])
+	password = PasswordField('Password', validators=[DataRequired(), Length(max=1024)])
+	submit = SubmitField('Login')
+
+
 class CollegeForm(FlaskForm):
 	"""Form for creating / editing a College."""
 	id = HiddenField('id')
-	code = StringField('Code', validators=[DataRequired(), Length(max=10)])
+	# row version the edit is based on, and the row as the form was filled (app.user.editing)
+	version = HiddenField('version')
+	original = HiddenField('original')
+	code = StringField('Code', validators=[DataRequired(), Length(max=10),
+										   Unique(College.code, 'College code must be unique.')])
 	name = StringField('Name', validators=[DataRequired(), Length(max=100)])
 	submit = SubmitField('Save')
 
@@ -40,14 +65,18 @@ class StudentForm(FlaskForm):
 			form.program_id.choices = [(p.id, p.name) for p in Program.query.order_by(Program.name).all()]
 		"""
 		id = HiddenField('id')
-		id_number = StringField('Student ID', validators=[DataRequired(), Length(max=50),
-																	 Regexp(r'^\d{4}-\d{4}$', message='Use format YYYY-NNNN')])
-		first_name = StringField('First name', validators=[DataRequired(), Length(max=100)])
-		last_name = StringField('Last name', validators=[DataRequired(), Length(max=100)])
+		# row version the edit is based on, and the row as the form was filled (app.user.editing)
+		version = HiddenField('version')
+		original = HiddenField('original')
+		id_number = StringField('Student ID', validators=[DataRequired(), Length(max=ID_NUMBER_MAX_LENGTH),
+																	 Regexp(ID_NUMBER_PATTERN, message='Use format YYYY-NNNN'),
+																	 Unique(Student.id_number, 'Student ID must be unique.')])
+		first_name = StringField('First name', validators=[DataRequired(), Length(max=NAME_MAX_LENGTH)])
+		last_name = StringField('Last name', validators=[DataRequired(), Length(max=NAME_MAX_LENGTH)])
 		# populate choices in the view: form.program_id.choices = [(id, name), ...]
 		program_id = SelectField('Program', coerce=int, validators=[DataRequired()])
 		# year as a small select; adjust choices if you support more years
-		year = SelectField('Year', coerce=int, choices=[(1, '1'), (2, '2'), (3, '3'), (4, '4')], validators=[DataRequired()])
-		gender = SelectField('Gender', choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other')])
+		year = SelectField('Year', coerce=int, choices=YEAR_CHOICES, validators=[DataRequired()])
+		gender = SelectField('Gender', choices=GENDER_CHOICES)
 		submit = SubmitField('Save')
 
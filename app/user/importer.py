@@ -0,0 +1,234 @@
+"""Bulk student import from CSV or JSON.
+
+Rows are parsed incrementally from a binary stream, validated with the same
+rules as StudentForm, and written in batches with one INSERT ... ON CONFLICT
+DO NOTHING per batch (see uniqueness.py). A bad row is reported with its row
+number and skipped; it never aborts the rest of the file. A dry run checks
+the same rules, including existing ids, without writing.
+
+Expected fields: id_number, first_name, last_name, program_code, year, gender.
+"""
+import codecs
+import csv
+import json
+import re
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from app import changes, stats
+from app.database import db
+from app.models import Student, Program
+from .forms import ID_NUMBER_PATTERN, ID_NUMBER_MAX_LENGTH, NAME_MAX_LENGTH, YEAR_CHOICES, GENDER_CHOICES
+from .uniqueness import existing, insert_new
+
+BATCH_SIZE = 1000
+# errors beyond this many are counted but not listed in the result
+MAX_REPORTED_ERRORS = 1000
+READ_SIZE = 64 * 1024
+EXISTS_ERROR = 'id_number: A student with this id_number already exists.'
+
+_ID_NUMBER_RE = re.compile(ID_NUMBER_PATTERN)
+_YEARS = {value for value, _ in YEAR_CHOICES}
+_GENDERS = {value for value, _ in GENDER_CHOICES}
+
+
+def iter_csv_rows(stream):
+    """Yield (line_number, row_dict) from a binary CSV stream with a header row."""
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig'))
+    try:
+        for row in reader:
+            yield reader.line_num, row
+    except csv.Error as e:
+        raise ValueError(f'Malformed CSV near line {reader.line_num}: {e}')
+
+
+def iter_rows(stream, fmt):
+    """Dispatch to the CSV or JSON parser; `fmt` is 'csv' or 'json'."""
+    return iter_csv_rows(stream) if fmt == 'csv' else iter_json_rows(stream)
+
+
+def detect_format(filename='', content_type=''):
+    """Guess 'csv' or 'json' from a file name or content type (default csv)."""
+    if (filename or '').lower().endswith(('.json', '.ndjson', '.jsonl')) or 'json' in (content_type or ''):
+        return 'json'
+    return 'csv'
+
+
+def iter_json_rows(stream):
+    """Yield (item_number, obj) from a JSON array or newline-delimited JSON.
+
+    The stream is decoded chunk by chunk, so the whole document never has to
+    fit in memory.
+    """
+    decoder = json.JSONDecoder()
+    chunks = codecs.iterdecode(iter(lambda: stream.read(READ_SIZE), b''), 'utf-8-sig')
+    buf = ''
+    pos = 0
+    number = 0
+    exhausted = False
+    while True:
+        # skip array brackets, separators and whitespace between values
+        while pos < len(buf) and buf[pos] in ' \t\r\n,[]':
+            pos += 1
+        if pos == len(buf):
+            if exhausted:
+                return
+            buf, pos = next(chunks, None) or '', 0
+            exhausted = not buf
+            continue
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except ValueError:
+            more = next(chunks, None)
+            if more is None:
+                raise ValueError(f'Malformed JSON after item {number}')
+            buf, pos = buf[pos:] + more, 0
+            continue
+        number += 1
+        yield number, obj
+        buf, pos = buf[end:], 0
+
+
+def program_lookup():
+    """Map program code -> id, loaded once per import."""
+    return dict(db.session.query(Program.code, Program.id).all())
+
+
+def validate_row(row, programs):
+    """Return (values, errors) for one raw row using StudentForm's rules."""
+    if not isinstance(row, dict):
+        return None, ['Row must be an object']
+    errors = []
+    get = lambda key: str(row.get(key) if row.get(key) is not None else '').strip()  # noqa: E731
+
+    id_number = get('id_number')
+    if not id_number:
+        errors.append('id_number: This field is required.')
+    elif len(id_number) > ID_NUMBER_MAX_LENGTH or not _ID_NUMBER_RE.match(id_number):
+        errors.append('id_number: Use format YYYY-NNNN')
+
+    names = {}
+    for field in ('first_name', 'last_name'):
+        names[field] = get(field)
+        if not names[field]:
+            errors.append(f'{field}: This field is required.')
+        elif len(names[field]) > NAME_MAX_LENGTH:
+            errors.append(f'{field}: Field cannot be longer than {NAME_MAX_LENGTH} characters.')
+
+    program_code = get('program_code') or get('program')
+    program_id = programs.get(program_code)
+    if program_id is None:
+        errors.append(f'program_code: Unknown program "{program_code}".')
+
+    try:
+        year = int(get('year'))
+    except ValueError:
+        year = None
+    if year not in _YEARS:
+        errors.append('year: Not a valid choice.')
+
+    gender = get('gender').upper()
+    if gender not in _GENDERS:
+        errors.append('gender: Not a valid choice.')
+
+    if errors:
+        return None, errors
+    return {'id_number': id_number, 'program_id': program_id, 'year': year, 'gender': gender,
+            **names}, []
+
+
+def import_students(rows, batch_size=BATCH_SIZE, progress=None, dry_run=False):
+    """Validate and insert students from an iterable of (row_number, row).
+
+    Returns a dict with `inserted`, `failed` and `errors` (a list of
+    {'row': n, 'errors': [...]}, truncated at MAX_REPORTED_ERRORS).
+    `progress(rows_processed)` is called after each committed batch.
+    With dry_run=True nothing is written; rows that would be inserted are
+    counted in `valid` instead, and ids already in the database are found
+    with one lookup per batch.
+    """
+    result = {'inserted': 0, 'failed': 0, 'errors': []}
+    if dry_run:
+        result['valid'] = 0
+
+    def reject(number, errors):
+        result['failed'] += 1
+        if len(result['errors']) < MAX_REPORTED_ERRORS:
+            result['errors'].append({'row': number, 'errors': errors})
+
+    flush = _check_batch if dry_run else _flush_batch
+    programs = program_lookup()
+    seen = set()
+    batch = []
+    try:
+        for number, row in rows:
+            values, errors = validate_row(row, programs)
+            if not errors and values['id_number'] in seen:
+                errors = ['id_number: Duplicate id_number in file.']
+            if errors:
+                reject(number, errors)
+                continue
+            seen.add(values['id_number'])
+            batch.append((number, values))
+            if len(batch) >= batch_size:
+                flush(batch, result, reject)
+                batch = []
+                if progress is not None:
+                    progress(result['inserted'] + result['failed'])
+    except ValueError as e:
+        # the parser could not continue; keep what was already imported
+        reject(None, [str(e)])
+    if batch:
+        flush(batch, result, reject)
+    return result
+
+
+def _reject_taken(batch, taken, reject):
+    """Reject the rows of `batch` whose id_number is in `taken`; returns the others."""
+    fresh = []
+    for number, values in batch:
+        if values['id_number'] in taken:
+            reject(number, [EXISTS_ERROR])
+        else:
+            fresh.append((number, values))
+    return fresh
+
+
+def _check_batch(batch, result, reject):
+    taken = existing(Student.id_number, [values['id_number'] for _, values in batch])
+    result['valid'] += len(_reject_taken(batch, taken, reject))
+
+
+def _flush_batch(batch, result, reject):
+    # ON CONFLICT skips ids that already exist, so no lookup is needed first;
+    # the rows it skipped are the ones missing from RETURNING
+    rows = [values for _, values in batch]
+    try:
+        inserted = insert_new(Student, rows)
+    except IntegrityError:
+        # a foreign key, or a duplicate on databases without ON CONFLICT:
+        # retry row by row to find the culprits
+        db.session.rollback()
+        taken = existing(Student.id_number, [values['id_number'] for values in rows])
+        _insert_one_by_one(_reject_taken(batch, taken, reject), result, reject)
+        return
+    fresh = _reject_taken(batch, {values['id_number'] for values in rows} - inserted.keys(), reject)
+    stats.record_rows(db.session, [values for _, values in fresh])
+    if inserted:
+        changes.record(db.session, 'student', 'insert', inserted.values())
+    db.session.commit()
+    result['inserted'] += len(fresh)
+
+
+def _insert_one_by_one(batch, result, reject):
+    for number, values in batch:
+        try:
+            db.session.execute(insert(Student), [values])
+            stats.record_rows(db.session, [values])
+            changes.record(db.session, 'student', 'reset')
+            db.session.commit()
+            result['inserted'] += 1
+        except IntegrityError as e:
+            db.session.rollback()
+            reject(number, [f'Database rejected row: {e.orig}'])
@@ -0,0 +1,177 @@
+"""Listing queries shared by the user blueprint views and JSON APIs.
+
+Every function here selects plain columns (joined in SQL) instead of hydrating
+ORM objects and walking their lazy relationships, so a list costs one SELECT
+no matter how many rows it returns.
+"""
+import base64
+import json
+
+from sqlalchemy import func, or_, tuple_
+
+from app import serialization
+from app.cache import cache
+from app.database import db
+from app.models import Student, Program, College
+from app.revisions import current_revisions
+
+# columns the students API can sort by; nullable columns are coalesced so the
+# keyset comparison never has to deal with NULLs
+STUDENT_SORTS = {
+    'id_number': Student.id_number,
+    'first_name': Student.first_name,
+    'last_name': Student.last_name,
+    'program': Program.name,
+    'year': func.coalesce(Student.year, 0),
+    'gender': func.coalesce(Student.gender, ''),
+}
+
+
+def students_query():
+    """Student columns joined with their program name."""
+    return (db.session.query(Student.id, Student.id_number, Student.first_name, Student.last_name,
+                             Student.program_id, Program.name.label('program'), Student.year,
+                             Student.gender, Student.version)
+            .join(Program, Student.program_id == Program.id))
+
+
+def filter_students(q, program_id=None, year=None, gender=None, term=None):
+    """Apply the optional listing filters to a query built by students_query()."""
+    if program_id:
+        q = q.filter(Student.program_id == program_id)
+    if year:
+        q = q.filter(Student.year == year)
+    if gender:
+        q = q.filter(Student.gender == gender)
+    if term:
+        like = f'%{term}%'
+        q = q.filter(or_(Student.id_number.ilike(like), Student.first_name.ilike(like),
+                         Student.last_name.ilike(like), Program.name.ilike(like)))
+    return q
+
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); raises ValueError/TypeError on garbage."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return value, int(row_id)
+
+
+def student_page(q, sort='id_number', order='asc', limit=8, cursor=None):
+    """Return (rows, next_cursor) for one keyset page of a students_query().
+
+    `cursor` is the opaque value from a previous call; next_cursor is None on
+    the last page.
+    """
+    key = STUDENT_SORTS[sort]
+    q = q.add_columns(key.label('sort_key'))
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        # row-value comparison lets the database walk an index on (key, id)
+        if order == 'asc':
+            q = q.filter(tuple_(key, Student.id) > tuple_(value, last_id))
+        else:
+            q = q.filter(tuple_(key, Student.id) < tuple_(value, last_id))
+
+    if order == 'asc':
+        q = q.order_by(key.asc(), Student.id.asc())
+    else:
+        q = q.order_by(key.desc(), Student.id.desc())
+
+    # fetch one extra row to know whether another page exists
+    rows = q.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].sort_key, rows[-1].id)
+
+
+def student_dict(row):
+    return {
+        'id': row.id,
+        'id_number': row.id_number,
+        'first_name': row.first_name,
+        'last_name': row.last_name,
+        'program_id': row.program_id,
+        'program': row.program or '',
+        'year': row.year,
+        'gender': row.gender,
+        'version': row.version,
+    }
+
+
+def programs_query():
+    """Program columns with the owning college name, ordered by name."""
+    return (db.session.query(Program.id, Program.code, Program.name, Program.college_id,
+                             College.name.label('college'), Program.version)
+            .outerjoin(College, Program.college_id == College.id)
+            .order_by(Program.name))
+
+
+def filter_programs(q, college_id=None, term=None):
+    """Apply the optional listing filters to a query built by programs_query()."""
+    if college_id:
+        q = q.filter(Program.college_id == college_id)
+    if term:
+        like = f'%{term}%'
+        q = q.filter(or_(Program.code.ilike(like), Program.name.ilike(like), College.name.ilike(like)))
+    return q
+
+
+def program_dict(row):
+    return {'id': row.id, 'code': row.code, 'name': row.name,
+            'college': row.college or '', 'college_id': row.college_id, 'version': row.version}
+
+
+def colleges_query():
+    """College columns ordered by name."""
+    return db.session.query(College.id, College.code, College.name, College.version).order_by(College.name)
+
+
+def filter_colleges(q, term=None):
+    """Apply the optional search filter to a query built by colleges_query()."""
+    if term:
+        like = f'%{term}%'
+        q = q.filter(or_(College.code.ilike(like), College.name.ilike(like)))
+    return q
+
+
+def college_dict(row):
+    return {'id': row.id, 'code': row.code, 'name': row.name, 'version': row.version}
+
+
+# reference data: small, read on every form render, rarely written. Entries
+# are keyed by the table revisions (like serialization.encoded), so a write
+# in any process or worker moves every reader to a fresh entry; the
+# revision lookup is the one the page's ETag check already made
+def _reference_key(name, tables):
+    revs = current_revisions(*tables)
+    return name + '|' + '|'.join(f'{t}:{revs[t]}' for t in tables)
+
+
+def cached_colleges():
+    return cache.get_or_set(_reference_key('colleges', ('college',)),
+                            lambda: [college_dict(c) for c in colleges_query()])
+
+
+def cached_programs():
+    return cache.get_or_set(_reference_key('programs', ('college', 'program')),
+                            lambda: [program_dict(p) for p in programs_query()])
+
+
+# the same lists as JSON for the pages' <script> data, encoded once per table
+# revision (app.serialization); a hit costs neither a query nor an encode
+def programs_json():
+    return serialization.encoded('programs', ('college', 'program'),
+                                 lambda: [program_dict(p) for p in programs_query()])
+
+
+def colleges_json():
+    return serialization.encoded('colleges', ('college',),
+                                 lambda: [college_dict(c) for c in colleges_query()])
+
@@ -0,0 +1,115 @@
+"""Ranked, typo-tolerant student search.
+
+On PostgreSQL the query uses pg_trgm's `<%` operator and `word_similarity()`
+so it is answered from the GIN trigram indexes created by migration
+8c1d2e4f6a10. SQLite has no pg_trgm, so the same two functions are
+registered on every SQLite connection (implemented in Python below); the
+query is identical apart from the operator, which keeps tests meaningful.
+
+`<%` compares against the pg_trgm.word_similarity_threshold setting.
+search_students() sets it with set_config(..., is_local => true) in the
+search's own transaction. A per-connection SET would be lost when PgBouncer
+(DB_PGBOUNCER) hands the next transaction to another server connection.
+"""
+import re
+import sqlite3
+from functools import lru_cache
+
+from sqlalchemy import event, func, literal, or_, case, select
+from sqlalchemy.engine import Engine
+
+from app.models import Student, Program
+
+# minimum word_similarity() for a fuzzy match; pg_trgm's default (0.6) is too
+# strict to catch a single typo in a short name
+SIMILARITY_THRESHOLD = 0.3
+
+_WORD_RE = re.compile(r'[0-9a-z]+')
+
+
+# the SQLite fallback calls similarity() once per row per word window, and
+# names repeat across rows; memoizing per word halves fuzzy-search time on the
+# benchmark dataset. Results are frozensets, so the shared cached values
+# cannot be mutated by a caller.
+@lru_cache(maxsize=65536)
+def _word_trigrams(word):
+    padded = f'  {word} '
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _trigrams(text):
+    """Trigram set of `text` the way pg_trgm builds it (per word, padded)."""
+    words = _WORD_RE.findall((text or '').lower())
+    if len(words) == 1:
+        return _word_trigrams(words[0])
+    return frozenset().union(*map(_word_trigrams, words))
+
+
+def similarity(a, b):
+    """Python equivalent of pg_trgm similarity(): shared / total trigrams."""
+    ta, tb = _trigrams(a), _trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+def word_similarity(needle, haystack):
+    """Approximation of pg_trgm word_similarity().
+
+    Returns the best similarity between `needle` and any run of consecutive
+    words in `haystack`, so a short query can match part of a long string.
+    """
+    words = _WORD_RE.findall((haystack or '').lower())
+    width = max(1, len(_WORD_RE.findall((needle or '').lower())))
+    best = 0.0
+    for start in range(len(words)):
+        extent = ' '.join(words[start:start + width])
+        best = max(best, similarity(needle, extent))
+    return best
+
+
+@event.listens_for(Engine, 'connect')
+def _register_trigram_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('similarity', 2, similarity, deterministic=True)
+        dbapi_connection.create_function('word_similarity', 2, word_similarity, deterministic=True)
+
+
+def _like_prefix(term):
+    """LIKE pattern matching values that start with `term` literally (escape character: backslash)."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def search_document():
+    """Expression the trigram index on `student` is built over."""
+    return Student.id_number + ' ' + Student.first_name + ' ' + Student.last_name
+
+
+def search_students(q, term, dialect):
+    """Restrict a students_query() to rows matching `term`, best match first.
+
+    Prefix matches on id number or names always qualify and rank first; other
+    rows qualify when their name/id or program name is trigram-similar to the
+    term.
+    """
+    doc = search_document()
+    prefix = _like_prefix(term)
+    word = literal(term)
+    if dialect == 'postgresql':
+        # transaction-local, so it holds for this search and ends with it
+        q.session.execute(select(func.set_config('pg_trgm.word_similarity_threshold',
+                                                 str(SIMILARITY_THRESHOLD), True)))
+        fuzzy = or_(word.op('<%')(doc), word.op('<%')(Program.name))
+        best = func.greatest(func.word_similarity(word, doc), func.word_similarity(word, Program.name))
+    else:
+        doc_score = func.word_similarity(word, doc)
+        program_score = func.word_similarity(word, Program.name)
+        fuzzy = or_(doc_score >= SIMILARITY_THRESHOLD, program_score >= SIMILARITY_THRESHOLD)
+        # SQLite's two-argument max() is a scalar, like greatest()
+        best = func.max(doc_score, program_score)
+    is_prefix = or_(Student.id_number.like(prefix, escape='\\'), Student.first_name.ilike(prefix, escape='\\'),
+                    Student.last_name.ilike(prefix, escape='\\'))
+    rank = (case((is_prefix, 1.0), else_=0.0) + best).label('score')
+    return (q.add_columns(rank)
+            .filter(or_(is_prefix, fuzzy))
+            .order_by(rank.desc(), Student.last_name, Student.first_name, Student.id))
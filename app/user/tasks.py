@@ -0,0 +1,76 @@
+"""Background job handlers for the slow user-blueprint operations.
+
+Each one backs an `?async=1` variant of a view in controller.py (see
+app/jobs.py for the queue). Files travel through JOBS_DIR: uploads are
+saved there before the job is queued, and exports are written there for
+/user/api/jobs/<id>/download.
+"""
+import os
+import uuid
+
+from werkzeug.datastructures import MultiDict
+
+from app import stats
+from app.database import db
+from app.jobs import job_dir, task
+from .bulk import bulk_delete_students, bulk_update_students
+from .exporter import iter_csv, write_xlsx
+from .importer import BATCH_SIZE, import_students, iter_rows
+
+
+def job_file(prefix, ext):
+    """A fresh file name inside JOBS_DIR; returns (name, absolute path)."""
+    name = f'{prefix}-{uuid.uuid4().hex}.{ext}'
+    return name, os.path.join(job_dir(), name)
+
+
+@task('import_students')
+def import_students_job(params, progress):
+    path = os.path.join(job_dir(), params['file'])
+    try:
+        with open(path, 'rb') as stream:
+            return import_students(iter_rows(stream, params['format']),
+                                   batch_size=params.get('batch_size', BATCH_SIZE), progress=progress,
+                                   dry_run=params.get('dry_run', False))
+    finally:
+        os.remove(path)
+
+
+@task('export')
+def export_job(params, progress):
+    # progress() commits, which would end the streamed (yield_per) export
+    # query, so progress is only reported once the file is complete; the
+    # heartbeat thread in jobs.run() keeps the job alive meanwhile
+    table, fmt = params['table'], params['format']
+    filters = MultiDict(params.get('filters', []))
+    name, path = job_file(f'export-{table}', fmt)
+    with open(path, 'wb') as out:
+        if fmt == 'xlsx':
+            write_xlsx(table, filters, out)
+        else:
+            for chunk in iter_csv(table, filters):
+                out.write(chunk)
+    size = os.path.getsize(path)
+    progress(size, size, force=True)
+    return {'file': name, 'download_name': f'{table}.{fmt}', 'bytes': size}
+
+
+@task('rebuild_stats')
+def rebuild_stats_job(params, progress):
+    rows = stats.rebuild(db.session)
+    db.session.commit()
+    return {'rows': rows}
+
+
+@task('bulk_delete_students')
+def bulk_delete_job(params, progress):
+    affected = bulk_delete_students(params['payload'])
+    db.session.commit()
+    return {'affected': affected}
+
+
+@task('bulk_update_students')
+def bulk_update_job(params, progress):
+    affected = bulk_update_students(params['payload'])
+    db.session.commit()
+    return {'affected': affected}
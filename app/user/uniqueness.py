@@ -0,0 +1,84 @@
+"""Uniqueness checks made before writing, instead of catching IntegrityError afterwards.
+
+Student.id_number, Program.code and College.code each have a unique index.
+Two helpers check them:
+
+    existing(column, values)   the values already in use. One indexed
+                               `IN (...)` lookup per LOOKUP_CHUNK values, so
+                               an import batch of thousands of ids costs one
+                               query.
+    Unique(column)             a WTForms validator doing the same check for a
+                               single field, skipping the row being edited.
+
+A check that passes can still race with a concurrent writer. insert_new()
+closes that gap. On PostgreSQL and SQLite it sends
+INSERT ... ON CONFLICT (key) DO NOTHING RETURNING key, id and reports
+which rows went in. A lost race then costs no exception and no rollback. Other
+databases get a plain INSERT, and the caller still handles IntegrityError.
+"""
+from sqlalchemy import insert, select
+from wtforms.validators import ValidationError
+
+from app.database import db, dialect_insert
+from app.models import College, Program, Student
+
+# values per IN list; well below PostgreSQL's and SQLite's bound-parameter limits
+LOOKUP_CHUNK = 5000
+
+# model -> its natural key
+UNIQUE_KEYS = {Student: Student.id_number, Program: Program.code, College: College.code}
+
+
+def existing(column, values, exclude_id=None):
+    """The subset of `values` already stored in unique `column`.
+
+    `exclude_id` leaves out one row (the one being edited).
+    """
+    values = list(dict.fromkeys(v for v in values if v is not None))
+    model = column.class_
+    found = set()
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        stmt = select(column).where(column.in_(values[start:start + LOOKUP_CHUNK]))
+        if exclude_id is not None:
+            stmt = stmt.where(model.id != exclude_id)
+        found.update(db.session.execute(stmt).scalars())
+    return found
+
+
+class Unique:
+    """WTForms validator: no other row of the column's table has this value.
+
+    The row being edited is read from the form's `id` field.
+    """
+
+    def __init__(self, column, message=None):
+        self.column = column
+        self.message = message or 'This value is already in use.'
+
+    def __call__(self, form, field):
+        value = (field.data or '').strip()
+        # earlier validators (length, format) already failed: spare the query
+        if not value or field.errors:
+            return
+        id_field = getattr(form, 'id', None)
+        exclude_id = int(id_field.data) if id_field is not None and str(id_field.data or '').isdigit() else None
+        if existing(self.column, [value], exclude_id):
+            raise ValidationError(self.message)
+
+
+def insert_new(model, rows):
+    """INSERT `rows` (dicts) into `model`, skipping rows whose key is taken.
+
+    Returns {key: id} for the rows inserted. Without ON CONFLICT support
+    every row is sent, a duplicate raises IntegrityError as usual, and
+    the ids are unknown (None). The caller commits.
+    """
+    if not rows:
+        return {}
+    key = UNIQUE_KEYS[model]
+    stmt = dialect_insert(db.session, model)
+    if stmt is None:
+        db.session.execute(insert(model), rows)
+        return {row[key.key]: None for row in rows}
+    stmt = stmt.on_conflict_do_nothing(index_elements=[key]).returning(key, model.id)
+    return dict(db.session.execute(stmt, rows).all())
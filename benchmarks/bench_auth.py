@@ -0,0 +1,85 @@
+"""Authenticated-request benchmark: SQL statements the user loader costs.
+
+It requests /user/ as a logged-in user in three loader configurations:
+
+    db       identity cache emptied before every request, claims off (the
+             pre-cache behaviour: one SELECT per request)
+    cached   warm per-process identity cache
+    claims   identity cache emptied before every request, signed cookie
+             claims on (a cold worker, or a process that never saw the user)
+
+Run:
+    python -m pytest benchmarks/bench_auth.py -q -s
+
+Recorded on the default dataset (SQLite, 200 iterations):
+
+    db       1 statement/request   p50 1.45 ms
+    cached   0 statements/request  p50 0.72 ms
+    claims   0 statements/request  p50 0.74 ms
+"""
+import os
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app.database import db
+from app.models import User
+
+ITERATIONS = int(os.getenv('BENCH_AUTH_ITERATIONS', 200))
+MODES = {
+    # mode -> (AUTH_IDENTITY_CLAIMS, empty the cache before each request)
+    'db': (False, True),
+    'cached': (False, False),
+    'claims': (True, True),
+}
+
+
+@pytest.fixture(scope='module')
+def bench_user(bench_app):
+    with bench_app.app_context():
+        user = db.session.query(User).filter_by(username='bench-auth').one_or_none()
+        if user is None:
+            user = User(username='bench-auth', email='bench-auth@example.edu', password_hash='x')
+            db.session.add(user)
+            db.session.commit()
+        return user.id
+
+
+@pytest.mark.parametrize('mode', list(MODES))
+def test_user_loader_statements(bench_app, bench_user, mode):
+    claims, cold = MODES[mode]
+    state = bench_app.extensions['auth']
+    saved = bench_app.config['AUTH_IDENTITY_CLAIMS']
+    bench_app.config['AUTH_IDENTITY_CLAIMS'] = claims
+    client = bench_app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(bench_user)
+    statements = []
+
+    def _count(*args):
+        statements.append(1)
+
+    with bench_app.app_context():
+        engine = db.engine
+    try:
+        state.users.clear()
+        client.get('/user/')  # log in fully: issues claims when they are on
+        timings, counts = [], []
+        for _ in range(ITERATIONS):
+            if cold:
+                state.users.clear()
+            statements.clear()
+            event.listen(engine, 'before_cursor_execute', _count)
+            start = time.perf_counter()
+            resp = client.get('/user/')
+            timings.append((time.perf_counter() - start) * 1000)
+            event.remove(engine, 'before_cursor_execute', _count)
+            assert b'bench-auth' in resp.data
+            counts.append(len(statements))
+    finally:
+        bench_app.config['AUTH_IDENTITY_CLAIMS'] = saved
+
+    timings.sort()
+    print(f'\n{mode:8s} {max(counts)} statement(s)/request  p50 {timings[len(timings) // 2]:.2f} ms')
+    assert max(counts) == (1 if mode == 'db' else 0)
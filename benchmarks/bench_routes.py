@@ -0,0 +1,272 @@
+"""Route benchmarks: p50/p99 latency, SQL statements and response bytes.
+
+Every route in app/user/controller.py has a scenario below. Each scenario
+runs BENCH_ITERATIONS times (after warm-up) against create_app() on a seeded
+dataset, and the result is compared with benchmarks/baseline.json:
+
+    - statements per request must not exceed the baseline (exact; these
+      are deterministic, so any increase is a real regression)
+    - response bytes may grow by at most BENCH_BYTES_TOLERANCE (10%)
+    - p50 latency may grow by at most BENCH_LATENCY_TOLERANCE (100%, since
+      CI machines are noisy); p99 is reported but not enforced
+
+Run:
+    python -m pytest benchmarks/bench_routes.py -q -s
+Re-record the baseline after an intended change:
+    BENCH_UPDATE_BASELINE=1 python -m pytest benchmarks/bench_routes.py -q -s
+Larger datasets (each comparison is reported as skipped when the scale
+differs from the baseline's):
+    BENCH_STUDENTS=200000 python -m pytest benchmarks/bench_routes.py -q -s
+"""
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, func
+
+from app import changes, jobs, passwords
+from app.database import db
+from app.models import College, Program, Student, User
+
+ITERATIONS = int(os.getenv('BENCH_ITERATIONS', 20))
+WARMUP = 2
+LATENCY_TOLERANCE = float(os.getenv('BENCH_LATENCY_TOLERANCE', 1.0))
+BYTES_TOLERANCE = float(os.getenv('BENCH_BYTES_TOLERANCE', 0.10))
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+
+_unique = itertools.count(1)
+
+
+def _fresh_student(app):
+    """Insert a throwaway student and return its id."""
+    n = next(_unique)
+    with app.app_context():
+        st = Student(id_number=f'1999-{n % 10000:04d}', first_name='Bench', last_name=f'Row{n}',
+                     program_id=db.session.query(func.min(Program.id)).scalar(), year=1, gender='O')
+        db.session.add(st)
+        db.session.commit()
+        return st.id
+
+
+def _finished_export(app):
+    """Run an export job inline and return its id."""
+    with app.app_context():
+        job_id = jobs.enqueue('export', table='students', format='csv', filters=[['year', '4']])
+        jobs.run_pending()
+        return job_id
+
+
+def _login_form(app, password='bench-password'):
+    """Form data for the benchmark login account, created on first use."""
+    with app.test_request_context():
+        if not db.session.query(User.id).filter_by(username='bench-login').scalar():
+            user = User(username='bench-login', email='bench-login@example.edu')
+            passwords.set_password(user, 'bench-password')
+            db.session.add(user)
+            db.session.commit()
+    return {'data': {'username': 'bench-login', 'password': password}}
+
+
+def _busiest(app, child_fk):
+    """Id of the parent row with the most children (worst case for delete guards)."""
+    with app.app_context():
+        return (db.session.query(child_fk).group_by(child_fk)
+                .order_by(func.count().desc()).limit(1).scalar())
+
+
+def _edit_form(app, **changes):
+    """Student form data as the edit modal posts it: every field, plus the row it was filled from."""
+    sid = _fresh_student(app)
+    with app.app_context():
+        st = db.session.get(Student, sid)
+        row = {'id_number': st.id_number, 'first_name': st.first_name, 'last_name': st.last_name,
+               'program_id': st.program_id, 'year': st.year, 'gender': st.gender}
+    return {'data': {'id': sid, 'version': 1, 'original': json.dumps(row), **row, **changes}}
+
+
+def _patch_body(app, model, item_id, **changes):
+    """PATCH body carrying the row's current version (so the edit applies)."""
+    with app.app_context():
+        version = db.session.get(model, item_id).version
+    return {'json': {'version': version, **changes}}
+
+
+def _first_id(app, model):
+    with app.app_context():
+        return db.session.query(func.min(model.id)).scalar()
+
+
+def _latest_change(app):
+    with app.app_context():
+        return changes.bounds(db.session)[1] or 0
+
+
+def _import_body(app):
+    n = next(_unique)
+    with app.app_context():
+        code = db.session.query(Program.code).order_by(Program.id).limit(1).scalar()
+    lines = ['id_number,first_name,last_name,program_code,year,gender']
+    lines += [f'1998-{(n * 100 + i) % 10000:04d},Bench,Import{i},{code},2,F' for i in range(100)]
+    return '\n'.join(lines).encode()
+
+
+# name -> (method, url or callable(app) -> url, request kwargs or callable(app) -> kwargs)
+SCENARIOS = {
+    'index': ('GET', '/user/', None),
+    'login_page': ('GET', '/user/login', None),
+    # one scrypt verify at the default cost each
+    'login_success': ('POST', '/user/login', _login_form),
+    'login_wrong_password': ('POST', '/user/login', lambda app: _login_form(app, 'wrong')),
+    'logout': ('POST', '/user/logout', None),
+    'students_page': ('GET', '/user/students', None),
+    'students_create': ('POST', '/user/students', lambda app: {'data': {
+        'id_number': f'1997-{next(_unique) % 10000:04d}', 'first_name': 'Bench', 'last_name': 'Form',
+        'program_id': _busiest(app, Student.program_id), 'year': 1, 'gender': 'M'}}),
+    'programs_page': ('GET', '/user/programs', None),
+    'colleges_page': ('GET', '/user/colleges', None),
+    # what a browser actually transfers for the two largest pages and a script
+    'students_page_gzip': ('GET', '/user/students', {'headers': {'Accept-Encoding': 'gzip'}}),
+    'programs_page_gzip': ('GET', '/user/programs', {'headers': {'Accept-Encoding': 'gzip'}}),
+    'static_main_js_gzip': ('GET', '/static/js/main.js', {'headers': {'Accept-Encoding': 'gzip'}}),
+    'api_students_first_page': ('GET', '/user/api/students', None),
+    'api_students_sorted_filtered': ('GET', '/user/api/students?sort=last_name&order=desc&year=2&limit=50', None),
+    'api_student_search': ('GET', '/user/api/students/search?q=santos', None),
+    'api_student_search_typo': ('GET', '/user/api/students/search?q=santso', None),
+    'api_student_import_100_rows': ('POST', '/user/api/students/import?format=csv',
+                                    lambda app: {'data': _import_body(app), 'content_type': 'text/csv'}),
+    # same checks as the import (one id lookup per batch), nothing written
+    'api_student_import_dry_run': ('POST', '/user/api/students/import?format=csv&dry_run=1',
+                                   lambda app: {'data': _import_body(app), 'content_type': 'text/csv'}),
+    'export_students_csv': ('GET', '/user/export/students.csv?year=4&gender=F', None),
+    'api_stats': ('GET', '/user/api/stats', None),
+    'api_stats_rebuild_enqueue': ('POST', '/user/api/stats/rebuild', None),
+    'api_student_import_async_enqueue': ('POST', '/user/api/students/import?format=csv&async=1',
+                                         lambda app: {'data': _import_body(app), 'content_type': 'text/csv'}),
+    'api_job_status': ('GET', '/user/api/jobs/1', None),
+    'api_job_download': ('GET', lambda app: f'/user/api/jobs/{_finished_export(app)}/download', None),
+    # one poll each (CHANGES_STREAM_SECONDS=0): connect, and catch up on the last 10 changes
+    'api_changes_connect': ('GET', '/user/api/changes', None),
+    'api_changes_catch_up': ('GET', lambda app: f'/user/api/changes?since={_latest_change(app) - 10}', None),
+    'api_cache': ('GET', '/user/api/cache', None),
+    'api_pool': ('GET', '/user/api/pool', None),
+    # idempotent: rewrites year 1 -> 1 for every first-year of the busiest program
+    'api_student_bulk_update_filter': ('POST', '/user/api/students/bulk-update', lambda app: {'json': {
+        'filter': {'program_id': _busiest(app, Student.program_id), 'year': 1}, 'set': {'year': 1}}}),
+    'api_student_bulk_delete_ids': ('POST', '/user/api/students/bulk-delete', lambda app: {'json': {
+        'ids': [_fresh_student(app), _fresh_student(app)]}}),
+    # single-row edits: one conditional UPDATE each (see app/user/editing.py)
+    'students_edit_form': ('POST', '/user/students', lambda app: _edit_form(app, last_name='Edited')),
+    'api_student_patch': ('PATCH', lambda app: f'/user/api/students/{_fresh_student(app)}',
+                          {'json': {'version': 1, 'last_name': 'Patched'}}),
+    'api_student_patch_conflict': ('PATCH', lambda app: f'/user/api/students/{_first_id(app, Student)}',
+                                   {'json': {'version': 0, 'last_name': 'Stale'}}),
+    'api_program_patch': ('PATCH', lambda app: f'/user/api/programs/{_first_id(app, Program)}',
+                          lambda app: _patch_body(app, Program, _first_id(app, Program), name='Bench Program')),
+    'api_college_patch': ('PATCH', lambda app: f'/user/api/colleges/{_first_id(app, College)}',
+                          lambda app: _patch_body(app, College, _first_id(app, College), name='Bench College')),
+    'delete_student': ('POST', lambda app: f'/user/students/delete/{_fresh_student(app)}', None),
+    'delete_program_blocked': ('POST', lambda app: f'/user/programs/delete/'
+                                                   f'{_busiest(app, Student.program_id)}', None),
+    'delete_college_blocked': ('POST', lambda app: f'/user/colleges/delete/'
+                                                   f'{_busiest(app, Program.college_id)}', None),
+}
+
+# blueprint endpoints each scenario exercises; test_every_route_has_a_scenario keeps this complete
+COVERED_ENDPOINTS = {
+    'user.index', 'user.login', 'user.logout', 'user.students', 'user.programs', 'user.colleges', 'user.api_students',
+    'user.api_student_search', 'user.api_student_import', 'user.export', 'user.api_stats', 'user.api_stats_rebuild',
+    'user.api_job', 'user.api_job_download', 'user.api_cache_stats',
+    'user.api_pool_stats', 'user.api_student_bulk_delete', 'user.api_student_bulk_update',
+    'user.delete_student', 'user.delete_program', 'user.delete_college',
+    'user.api_student_patch', 'user.api_program_patch', 'user.api_college_patch', 'user.api_changes',
+}
+
+_results = {}
+_scale = {}
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _measure(app, method, url, kwargs):
+    client = app.test_client()
+    statements = []
+
+    def _count(*args):
+        statements.append(1)
+
+    with app.app_context():
+        engine = db.engine
+    timings, counts, sizes = [], [], []
+    for i in range(WARMUP + ITERATIONS):
+        target = url(app) if callable(url) else url
+        extra = kwargs(app) if callable(kwargs) else (kwargs or {})
+        statements.clear()
+        event.listen(engine, 'before_cursor_execute', _count)
+        start = time.perf_counter()
+        resp = client.open(target, method=method, **extra)
+        body = resp.get_data()
+        elapsed = time.perf_counter() - start
+        event.remove(engine, 'before_cursor_execute', _count)
+        assert resp.status_code < 500, f'{method} {target} -> {resp.status_code}'
+        if i >= WARMUP:
+            timings.append(elapsed * 1000)
+            counts.append(len(statements))
+            sizes.append(len(body))
+    return {
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'queries': max(counts),
+        'bytes': max(sizes),
+    }
+
+
+def _baseline():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {'scale': None, 'routes': {}}
+
+
+def test_every_route_has_a_scenario(bench_app):
+    endpoints = {rule.endpoint for rule in bench_app.url_map.iter_rules() if rule.endpoint.startswith('user.')}
+    assert endpoints == COVERED_ENDPOINTS, 'add a scenario for new routes in benchmarks/bench_routes.py'
+
+
+@pytest.mark.parametrize('name', list(SCENARIOS))
+def test_route_benchmark(bench_app, bench_scale, name):
+    _scale.update(bench_scale)
+    method, url, kwargs = SCENARIOS[name]
+    result = _measure(bench_app, method, url, kwargs)
+    _results[name] = result
+    print(f"\n{name:32s} p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  "
+          f"{result['queries']:3d} queries  {result['bytes']:8d} bytes")
+
+    baseline = _baseline()
+    if os.getenv('BENCH_UPDATE_BASELINE'):
+        return
+    if baseline['scale'] != bench_scale:
+        pytest.skip(f"baseline.json was recorded at scale {baseline['scale']}, this run is {bench_scale}; "
+                    'nothing compared (re-record with BENCH_UPDATE_BASELINE=1)')
+    base = baseline['routes'].get(name)
+    if base is None:
+        pytest.skip(f'{name} has no baseline yet')
+    assert result['queries'] <= base['queries'], f"{name}: {result['queries']} statements > {base['queries']}"
+    assert result['bytes'] <= base['bytes'] * (1 + BYTES_TOLERANCE) + 64, f'{name}: response grew'
+    assert result['p50_ms'] <= base['p50_ms'] * (1 + LATENCY_TOLERANCE) + 1, f'{name}: p50 regressed'
+
+
+def teardown_module(module):
+    if os.getenv('BENCH_UPDATE_BASELINE') and _results:
+        baseline = _baseline()
+        baseline['scale'] = _scale
+        baseline['routes'].update(_results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+    results_path = os.getenv('BENCH_RESULTS')
+    if results_path and _results:
+        Path(results_path).write_text(json.dumps({'scale': _scale, 'routes': _results}, indent=2) + '\n')
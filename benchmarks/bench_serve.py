@@ -0,0 +1,156 @@
+"""Server benchmark: requests/second under `flask serve` per worker/thread mix.
+
+Each mix starts `flask serve` on the seeded benchmark database and waits
+until it answers. BENCH_SERVE_CLIENTS keep-alive clients (16 by default,
+spread over client processes) then cycle through PATHS for
+BENCH_SERVE_SECONDS. Throughput and client-side p50/p99 latency are
+reported per mix. The server is then stopped with SIGTERM, so every run also
+exercises a graceful shutdown. Sync workers (threads=1) close each
+connection after its response, which means those clients reconnect on every
+request.
+
+Run (needs gunicorn):
+    python -m pytest benchmarks/bench_serve.py -q -s
+Other mixes, as workers x threads:
+    BENCH_SERVE_MIXES=2x8,4x8 python -m pytest benchmarks/bench_serve.py -q -s
+
+Recorded on the default dataset (SQLite, 1 CPU, 16 clients, 10 s per mix):
+
+    workers x threads      req/s   p50 ms   p99 ms
+      1 x 1  (sync)         53.3    261.8    744.9
+      3 x 1  (sync)         48.9    272.3    866.6
+      1 x 4  (gthread)      50.7    285.7    799.8
+      3 x 4  (gthread)      45.8    246.6   1601.2
+      3 x 8  (gthread)      45.0    179.3   1806.5
+
+On one CPU the load generator shares the core with the server, which is
+CPU-bound. Throughput is therefore flat across mixes, and extra processes
+only stretch the tail: 3 x 8 has the lowest median and the worst p99. Re-run
+on the deployment hardware before changing WEB_CONCURRENCY or
+SERVE_THREADS. Throughput should scale with workers up to the CPU count, and
+threads should pay off when requests wait on a networked database.
+"""
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('gunicorn')
+
+SECONDS = float(os.getenv('BENCH_SERVE_SECONDS', 10))
+CLIENTS = int(os.getenv('BENCH_SERVE_CLIENTS', 16))
+MIXES = [tuple(int(n) for n in mix.split('x'))
+         for mix in os.getenv('BENCH_SERVE_MIXES', '1x1,3x1,1x4,3x4,3x8').split(',')]
+# a JSON page, a rendered page and a small aggregate; reads only, so mixes are comparable
+PATHS = ['/user/api/students?page=1', '/user/colleges', '/user/api/stats']
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(port, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'flask serve exited with {proc.returncode}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', PATHS[0])
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('flask serve did not start')
+
+
+def _client(port, deadline, latencies, errors):
+    conn = None
+    n = 0
+    while time.monotonic() < deadline:
+        if conn is None:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        start = time.perf_counter()
+        try:
+            conn.request('GET', PATHS[n % len(PATHS)])
+            resp = conn.getresponse()
+            resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            conn = None
+            errors.append(1)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if resp.status != 200:
+            errors.append(1)
+        if resp.will_close:
+            conn.close()
+            conn = None
+        n += 1
+
+
+def _client_process(port, threads, deadline, queue):
+    latencies, errors = [], []
+    pool = [threading.Thread(target=_client, args=(port, deadline, latencies, errors)) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    queue.put((latencies, len(errors)))
+
+
+def _load(port):
+    """(latencies, errors) from CLIENTS clients running for SECONDS."""
+    processes = min(4, CLIENTS)
+    ctx = multiprocessing.get_context('fork')
+    queue = ctx.Queue()
+    deadline = time.monotonic() + SECONDS
+    children = [ctx.Process(target=_client_process,
+                            args=(port, CLIENTS // processes + (i < CLIENTS % processes), deadline, queue))
+                for i in range(processes)]
+    for child in children:
+        child.start()
+    latencies, errors = [], 0
+    for _ in children:
+        part, failed = queue.get()
+        latencies.extend(part)
+        errors += failed
+    for child in children:
+        child.join()
+    return latencies, errors
+
+
+@pytest.mark.parametrize('workers,threads', MIXES, ids=[f'{w}x{t}' for w, t in MIXES])
+def test_serve_throughput(bench_app, workers, threads):
+    port = _free_port()
+    # the server runs in a fresh process, so these reach its create_app()
+    env = {**os.environ, 'FLASK_APP': 'app', 'CHANGES_STREAM_SECONDS': '0'}
+    cmd = [sys.executable, '-m', 'flask', 'serve', '--bind', f'127.0.0.1:{port}',
+           '--workers', str(workers), '--threads', str(threads)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        _wait_until_up(port, proc)
+        latencies, errors = _load(port)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        stderr = proc.communicate(timeout=60)[1].decode()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    kind = 'gthread' if threads > 1 else 'sync'
+    print(f'\n  {workers} x {threads:<2d} ({kind:7s})  {len(latencies) / SECONDS:7.1f} req/s  '
+          f'p50 {p50:6.1f} ms  p99 {p99:6.1f} ms  errors {errors}')
+    assert errors == 0
+    assert proc.returncode == 0, stderr
@@ -0,0 +1,46 @@
+"""Fixtures for the route benchmark suite (see bench_routes.py)."""
+import os
+
+import pytest
+
+# dataset size; the stored baseline was recorded at these defaults
+SCALE = {
+    'colleges': int(os.getenv('BENCH_COLLEGES', 50)),
+    'programs': int(os.getenv('BENCH_PROGRAMS', 2000)),
+    'students': int(os.getenv('BENCH_STUDENTS', 20000)),
+}
+
+
+@pytest.fixture(scope='session')
+def bench_scale():
+    return dict(SCALE)
+
+
+@pytest.fixture(scope='session')
+def bench_app(tmp_path_factory):
+    """The real create_app() factory on a seeded database.
+
+    Uses BENCH_DATABASE_URL when set (an empty local Postgres database);
+    otherwise a throwaway SQLite file.
+    """
+    url = os.getenv('BENCH_DATABASE_URL') or f"sqlite:///{tmp_path_factory.mktemp('bench')}/bench.db"
+    os.environ['DATABASE_URL'] = url
+    os.environ['DB_NAME'] = ''  # keep a developer's .env from pointing init_db at another database
+
+    from app import create_app
+    from app.database import db
+    from app.seed import generate
+
+    app = create_app()
+    # LOGIN_RATE_LIMIT: every login scenario comes from the same test client address;
+    # CHANGES_STREAM_SECONDS=0: the changes feed answers one poll and ends
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False, JOBS_DIR=str(tmp_path_factory.mktemp('jobs')),
+                      LOGIN_RATE_LIMIT=10 ** 6, CHANGES_STREAM_SECONDS=0)
+    with app.app_context():
+        db.create_all()
+        generate(seed=0, **SCALE)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        if url.startswith('sqlite'):
+            db.drop_all()
@@ -0,0 +1,42 @@
+"""student search trigram indexes
+
+Revision ID: 8c1d2e4f6a10
+Revises: 5ee2d6809fa0
+Create Date: 2026-10-18 09:12:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d2e4f6a10'
+down_revision = '5ee2d6809fa0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm GIN indexes back the `<%` / ILIKE 'prefix%' filters used by
+    # app/user/search.py; the expression must match search_document() exactly.
+    # Other backends (SQLite in tests) fall back to a scan.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(
+        "CREATE INDEX ix_student_search_trgm ON student "
+        "USING gin ((id_number || ' ' || first_name || ' ' || last_name) gin_trgm_ops)"
+    )
+    op.execute('CREATE INDEX ix_student_id_number_trgm ON student USING gin (id_number gin_trgm_ops)')
+    op.execute('CREATE INDEX ix_student_first_name_trgm ON student USING gin (first_name gin_trgm_ops)')
+    op.execute('CREATE INDEX ix_student_last_name_trgm ON student USING gin (last_name gin_trgm_ops)')
+    op.execute('CREATE INDEX ix_program_name_trgm ON program USING gin (name gin_trgm_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP INDEX IF EXISTS ix_program_name_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_student_last_name_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_student_first_name_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_student_id_number_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_student_search_trgm')
@@ -0,0 +1,33 @@
+"""table revision counters
+
+Revision ID: a4f09b7c3e21
+Revises: 8c1d2e4f6a10
+Create Date: 2026-10-18 10:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4f09b7c3e21'
+down_revision = '8c1d2e4f6a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table = op.create_table('table_revision',
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('revision', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table, [
+        {'table_name': 'college', 'revision': 0},
+        {'table_name': 'program', 'revision': 0},
+        {'table_name': 'student', 'revision': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('table_revision')
@@ -0,0 +1,91 @@
+"""foreign key and listing sort indexes
+
+Revision ID: b7e3a1d95c42
+Revises: a4f09b7c3e21
+Create Date: 2026-10-18 11:40:00.000000
+
+Plans below are SQLite EXPLAIN QUERY PLAN output on the benchmark dataset
+(`flask user seed`: 50 colleges, 2000 programs, 200000 students). Timings
+are the mean of 5 runs. PostgreSQL plans differ in form, but every change
+replaces a full scan or a sort with an index search.
+
+ix_student_program_id_year (program_id, year)
+    delete_program guard, SELECT count(*) FROM student WHERE program_id = ?
+        before: SCAN student                                          18.7 ms
+        after:  SEARCH student USING COVERING INDEX
+                ix_student_program_id_year (program_id=?)              0.02 ms
+    students API, ?program_id=&year=
+        before: SCAN student USING INDEX sqlite_autoindex_student_1   15.6 ms
+        after:  SEARCH student USING INDEX
+                ix_student_program_id_year (program_id=? AND year=?)   0.05 ms
+    The leading column also serves as the student.program_id FK index.
+
+ix_student_last_name_id (last_name, id), ix_student_first_name_id (first_name, id)
+    students API keyset pages sort by (key, id), so the index includes id.
+    ORDER BY student.last_name DESC, student.id DESC LIMIT 51
+        before: SCAN student; USE TEMP B-TREE FOR ORDER BY            92.1 ms
+        after:  SCAN student USING INDEX ix_student_last_name_id       0.08 ms
+    WHERE (last_name, id) > (?, ?) ORDER BY last_name, id LIMIT 9
+        before: SCAN student; USE TEMP B-TREE FOR ORDER BY            54.9 ms
+        after:  SEARCH student USING INDEX
+                ix_student_last_name_id (last_name>?)                  0.03 ms
+    ORDER BY student.first_name, student.id LIMIT 9
+        before: SCAN student; USE TEMP B-TREE FOR ORDER BY           102.7 ms
+        after:  SCAN student USING INDEX ix_student_first_name_id      0.03 ms
+    A (last_name, first_name) index is not added. No query orders by that
+    pair, and the keyset tie-break needs id right after the sort key.
+
+ix_program_college_id (college_id)
+    delete_college guard, SELECT count(*) FROM program WHERE college_id = ?
+        before: SCAN program                                           0.18 ms
+        after:  SEARCH program USING COVERING INDEX
+                ix_program_college_id (college_id=?)                   0.01 ms
+
+ix_program_name (name), ix_college_name (name)
+    programs_query() / colleges_query() ORDER BY name
+        before: SCAN program; USE TEMP B-TREE FOR ORDER BY             1.78 ms
+        after:  SCAN program USING INDEX ix_program_name               0.96 ms
+        before: SCAN college; USE TEMP B-TREE FOR ORDER BY
+        after:  SCAN college USING COVERING INDEX ix_college_name
+
+Do not run a bare ANALYZE on SQLite with this dataset. Once statistics
+exist, the planner answers "?year=2 sorted by last_name" through
+ix_student_program_id_year plus a temp sort (about 100 ms). Without them it
+walks ix_student_last_name_id (0.7 ms).
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3a1d95c42'
+down_revision = 'a4f09b7c3e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.create_index('ix_student_program_id_year', ['program_id', 'year'], unique=False)
+        batch_op.create_index('ix_student_last_name_id', ['last_name', 'id'], unique=False)
+        batch_op.create_index('ix_student_first_name_id', ['first_name', 'id'], unique=False)
+
+    with op.batch_alter_table('program', schema=None) as batch_op:
+        batch_op.create_index('ix_program_college_id', ['college_id'], unique=False)
+        batch_op.create_index('ix_program_name', ['name'], unique=False)
+
+    with op.batch_alter_table('college', schema=None) as batch_op:
+        batch_op.create_index('ix_college_name', ['name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('college', schema=None) as batch_op:
+        batch_op.drop_index('ix_college_name')
+
+    with op.batch_alter_table('program', schema=None) as batch_op:
+        batch_op.drop_index('ix_program_name')
+        batch_op.drop_index('ix_program_college_id')
+
+    with op.batch_alter_table('student', schema=None) as batch_op:
+        batch_op.drop_index('ix_student_first_name_id')
+        batch_op.drop_index('ix_student_last_name_id')
+        batch_op.drop_index('ix_student_program_id_year')
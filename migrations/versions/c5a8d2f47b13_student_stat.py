@@ -0,0 +1,36 @@
+"""student statistics summary table
+
+Revision ID: c5a8d2f47b13
+Revises: b7e3a1d95c42
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8d2f47b13'
+down_revision = 'b7e3a1d95c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('student_stat',
+    sa.Column('program_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('year', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('gender', sa.String(length=10), nullable=False),
+    sa.Column('student_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('program_id', 'year', 'gender')
+    )
+    # same statement as app.stats.rebuild()
+    op.execute(
+        "INSERT INTO student_stat (program_id, year, gender, student_count) "
+        "SELECT program_id, coalesce(year, 0), coalesce(gender, ''), count(*) FROM student "
+        "GROUP BY program_id, coalesce(year, 0), coalesce(gender, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('student_stat')
@@ -0,0 +1,31 @@
+"""row version columns for optimistic concurrency
+
+Revision ID: e1f4c7a2b936
+Revises: d3b6e9a17f25
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1f4c7a2b936'
+down_revision = 'd3b6e9a17f25'
+branch_labels = None
+depends_on = None
+
+TABLES = ('student', 'program', 'college')
+
+
+def upgrade():
+    # the server default fills existing rows, so no back-fill UPDATE is needed
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
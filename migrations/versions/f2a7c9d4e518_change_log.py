@@ -0,0 +1,38 @@
+"""append-only change log for the live changes feed
+
+Revision ID: f2a7c9d4e518
+Revises: e1f4c7a2b936
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a7c9d4e518'
+down_revision = 'e1f4c7a2b936'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('change_log',
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(length=50), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=True),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('seq'),
+    sqlite_autoincrement=True
+    )
+    op.create_index('ix_change_log_created_at', 'change_log', ['created_at'], unique=False)
+    # writers lock this counter row so change_log seqs commit in order (app.changes)
+    op.bulk_insert(sa.table('table_revision', sa.column('table_name', sa.String), sa.column('revision', sa.Integer)),
+                   [{'table_name': 'change_log', 'revision': 0}])
+
+
+def downgrade():
+    op.execute("DELETE FROM table_revision WHERE table_name = 'change_log'")
+    op.drop_index('ix_change_log_created_at', table_name='change_log')
+    op.drop_table('change_log')
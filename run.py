@@ -3,5 +3,6 @@ from app import create_app
 # Use the application factory so blueprints and extensions are configured
 app = create_app()
 
+# development server only; in production run `flask serve` (gunicorn, see app/serve.py)
 if __name__ == '__main__':
     app.run(debug=True)
@@ -1,10 +1,21 @@
 import os
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
 
 # Patch init_db to avoid overriding SQLALCHEMY_DATABASE_URI with production env in tests.
 # We import the database module and replace its init_db with a test-friendly version
 from flask import Flask
-from app.database import db as _db
+from app.assets import init_assets
+from app.auth import init_auth
+from app.cache import cache
+from app.changes import init_changes
+from app.compression import init_compression
+from app.database import db as _db, init_pool_metrics
+from app.jobs import init_jobs
+from app.passwords import init_passwords
+from app.serve import init_serve
 from app.user import bp as user_bp
 
 
@@ -22,8 +33,11 @@ def _setup_env():
 
 @pytest.fixture
 def app(_setup_env):
-    # build a minimal Flask app for testing that uses sqlite in-memory
-    app = Flask(__name__, template_folder='templates', static_folder='static')
+    # build a minimal Flask app for testing that uses sqlite in-memory; point it at
+    # the real templates so list pages can be rendered
+    app_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'app')
+    app = Flask(__name__, template_folder=os.path.join(app_dir, 'templates'),
+                static_folder=os.path.join(app_dir, 'static'))
     app.config['TESTING'] = True
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -31,7 +45,18 @@ def app(_setup_env):
 
     # initialize DB and register blueprint
     _db.init_app(app)
+    init_pool_metrics(app)
+    cache.init_app(app)
+    init_compression(app)
+    init_assets(app)
+    init_jobs(app)
+    init_changes(app)
+    init_serve(app)
+    init_auth(app)
+    init_passwords(app)
     app.register_blueprint(user_bp, url_prefix='/user')
+    # base.html links to the root route registered by create_app()
+    app.add_url_rule('/', 'home', lambda: '')
 
     # create tables
     with app.app_context():
@@ -50,6 +75,53 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def count_queries(app):
+    """Context manager collecting every SQL statement executed on the app engine.
+
+    Usage:
+        with count_queries() as statements:
+            client.get('/user/programs')
+        assert len(statements) == 2
+    """
+    @contextmanager
+    def _count():
+        statements = []
+
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = _db.engine
+        event.listen(engine, 'before_cursor_execute', _before_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', _before_execute)
+
+    return _count
+
+
+@pytest.fixture
+def assert_constant_queries(count_queries):
+    """Fail if GET `url` issues more SQL statements after `grow()` adds rows."""
+    def _check(client, url, grow):
+        # measure the listing queries themselves, not reference-data cache hits
+        with client.application.app_context():
+            cache.clear()
+        with count_queries() as before:
+            assert client.get(url).status_code == 200
+        grow()
+        with client.application.app_context():
+            cache.clear()
+        with count_queries() as after:
+            assert client.get(url).status_code == 200
+        assert len(after) == len(before), (
+            f'{url} issued {len(before)} statements before and {len(after)} after adding rows:\n'
+            + '\n'.join(after))
+    return _check
+
+
 @pytest.fixture
 def seeded_db(app):
     from app.models import College, Program, Student
@@ -0,0 +1,84 @@
+import pytest
+
+from app.auth import CLAIMS_KEY
+from app.database import db
+from app.models import User
+
+
+@pytest.fixture
+def user_id(app):
+    with app.app_context():
+        user = User(username='registrar', email='registrar@example.edu', password_hash='x')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+
+@pytest.fixture
+def logged_in(client, user_id):
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(user_id)
+        sess['_fresh'] = True
+    return client
+
+
+def _user_selects(statements):
+    return [s for s in statements if 'FROM user' in s]
+
+
+def test_loader_caches_identity(app, logged_in, count_queries):
+    with count_queries() as statements:
+        assert b'registrar' in logged_in.get('/user/').data
+    assert len(_user_selects(statements)) == 1
+    with count_queries() as statements:
+        assert b'registrar' in logged_in.get('/user/').data
+    assert statements == []
+    assert app.extensions['auth'].stats == {'cache_hits': 1, 'claims_hits': 0, 'db_loads': 1}
+
+
+def test_user_change_invalidates_cache(app, logged_in, user_id):
+    logged_in.get('/user/')
+    with app.app_context():
+        db.session.get(User, user_id).username = 'dean'
+        db.session.commit()
+    assert b'dean' in logged_in.get('/user/').data
+
+
+def test_deleted_user_is_logged_out(app, logged_in, user_id):
+    logged_in.get('/user/')
+    with app.app_context():
+        db.session.execute(db.delete(User).where(User.id == user_id))
+        db.session.commit()
+    page = logged_in.get('/user/').data
+    assert b'registrar' not in page and b'admin' in page
+
+
+def test_signed_claims_skip_the_query(app, logged_in, user_id, count_queries):
+    app.config['AUTH_IDENTITY_CLAIMS'] = True
+    logged_in.get('/user/')
+    with logged_in.session_transaction() as sess:
+        assert sess[CLAIMS_KEY]['username'] == 'registrar'
+
+    # a cold process (empty cache) trusts the cookie
+    app.extensions['auth'].users.clear()
+    with count_queries() as statements:
+        assert b'registrar' in logged_in.get('/user/').data
+    assert statements == []
+    assert app.extensions['auth'].stats['claims_hits'] == 1
+
+    # claims issued before a change are revoked
+    with app.app_context():
+        db.session.get(User, user_id).username = 'dean'
+        db.session.commit()
+    with count_queries() as statements:
+        assert b'dean' in logged_in.get('/user/').data
+    assert len(_user_selects(statements)) == 1
+
+
+def test_expired_claims_are_ignored(app, logged_in, count_queries):
+    app.config.update(AUTH_IDENTITY_CLAIMS=True, AUTH_CLAIMS_MAX_AGE=0)
+    logged_in.get('/user/')
+    app.extensions['auth'].users.clear()
+    with count_queries() as statements:
+        logged_in.get('/user/')
+    assert len(_user_selects(statements)) == 1
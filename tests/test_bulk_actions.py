@@ -0,0 +1,77 @@
+import pytest
+
+from app.database import db
+from app.models import College, Program, Student
+
+
+@pytest.fixture
+def roster(app):
+    """Two programs with students spread over years 1-4."""
+    with app.app_context():
+        college = College(code='C01', name='College')
+        db.session.add(college)
+        db.session.flush()
+        p1 = Program(code='P01', name='One', college_id=college.id)
+        p2 = Program(code='P02', name='Two', college_id=college.id)
+        db.session.add_all([p1, p2])
+        db.session.flush()
+        for i in range(8):
+            db.session.add(Student(id_number=f'2024-{i:04d}', first_name='S', last_name=f'N{i}',
+                                   program_id=(p1 if i < 4 else p2).id, year=i % 4 + 1, gender='F'))
+        db.session.commit()
+        return {'p1': p1.id, 'p2': p2.id,
+                'ids': [sid for (sid,) in db.session.query(Student.id).order_by(Student.id)]}
+
+
+def _years(app):
+    with app.app_context():
+        return [y for (y,) in db.session.query(Student.year).order_by(Student.id)]
+
+
+def test_bulk_delete_by_filter_is_one_statement(client, app, roster, count_queries):
+    with count_queries() as statements:
+        resp = client.post('/user/api/students/bulk-delete',
+                           json={'filter': {'program_id': roster['p1'], 'year': 4}})
+    assert resp.status_code == 200
+    assert resp.get_json()['affected'] == 1
+    assert sum(s.lstrip().startswith('DELETE FROM student ') for s in statements) == 1
+    with app.app_context():
+        assert Student.query.count() == 7
+
+
+def test_bulk_delete_by_ids(client, app, roster):
+    resp = client.post('/user/api/students/bulk-delete', json={'ids': roster['ids'][:3]})
+    assert resp.get_json()['affected'] == 3
+
+
+def test_bulk_promote_skips_final_year(client, app, roster):
+    resp = client.post('/user/api/students/bulk-update', json={'filter': {'program_id': roster['p2']},
+                                                                'promote': True})
+    assert resp.get_json()['affected'] == 3
+    assert _years(app) == [1, 2, 3, 4, 2, 3, 4, 4]
+
+
+def test_bulk_update_set_program(client, app, roster):
+    resp = client.post('/user/api/students/bulk-update',
+                       json={'ids': roster['ids'][:2], 'set': {'program_id': roster['p2']}})
+    assert resp.get_json()['affected'] == 2
+    with app.app_context():
+        assert db.session.query(Student).filter_by(program_id=roster['p2']).count() == 6
+
+
+@pytest.mark.parametrize('url, payload', [
+    ('/user/api/students/bulk-delete', {}),
+    ('/user/api/students/bulk-delete', {'filter': {}}),
+    ('/user/api/students/bulk-delete', {'filter': {'first_name': 'S'}}),
+    ('/user/api/students/bulk-delete', {'filter': {'gender': {'a': 1}}}),
+    ('/user/api/students/bulk-update', {'filter': {'gender': 'X'}, 'promote': True}),
+    ('/user/api/students/bulk-update', {'ids': [1]}),
+    ('/user/api/students/bulk-update', {'ids': [1], 'set': {'year': 9}}),
+    ('/user/api/students/bulk-update', {'ids': [1], 'set': {'program_id': 999}}),
+])
+def test_bulk_rejects_bad_payloads(client, app, roster, url, payload):
+    resp = client.post(url, json=payload)
+    assert resp.status_code == 400
+    assert resp.get_json()['success'] is False
+    with app.app_context():
+        assert Student.query.count() == 8
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from app import changes
+from app.database import db
+
+
+@pytest.fixture
+def feed(app, client):
+    # one poll per request, so reading the body returns
+    app.config.update(CHANGES_STREAM_SECONDS=0, WTF_CSRF_ENABLED=False)
+
+    def _read(**params):
+        resp = client.get('/user/api/changes', query_string=params)
+        assert resp.status_code == 200 and resp.mimetype == 'text/event-stream'
+        return _events(resp.get_data(as_text=True))
+    return _read
+
+
+def _events(body):
+    events = []
+    for frame in body.split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in frame.splitlines() if ': ' in line and line[0] != ':')
+        if 'event' in fields:
+            events.append((fields['event'], int(fields['id']), json.loads(fields['data'])))
+    return events
+
+
+def _seq(app):
+    with app.app_context():
+        return changes.bounds(db.session)[1] or 0
+
+
+def test_fresh_connection_starts_from_now(app, client, feed, seeded_db):
+    client.patch(f"/user/api/students/{seeded_db['student_id']}", json={'version': 1, 'year': 2})
+    (event,) = feed()
+    assert event[0] == 'ready' and event[1] == _seq(app) == 1
+
+
+def test_edits_arrive_as_current_rows(app, client, feed, seeded_db):
+    sid = seeded_db['student_id']
+    client.patch(f'/user/api/students/{sid}', json={'version': 1, 'first_name': 'Jane'})
+    client.patch(f'/user/api/students/{sid}', json={'version': 2, 'last_name': 'Roe'})
+    client.post('/user/colleges', data={'code': 'C02', 'name': 'New College'})
+    (name, seq, data), = feed(since=0)
+    assert name == 'changes' and seq == data['seq'] == 3
+    student, college = data['changes']
+    # two edits of one row collapse into its current state
+    assert student['op'] == 'upsert' and student['id'] == sid
+    assert (student['row']['first_name'], student['row']['last_name'], student['row']['version']) == ('Jane', 'Roe', 3)
+    assert college['table'] == 'college' and college['row']['code'] == 'C02'
+
+    assert feed(since=seq, tables='student') == []
+    client.post(f'/user/students/delete/{sid}')
+    (_, _, data), = feed(since=seq, tables='student')
+    assert data['changes'] == [{'table': 'student', 'op': 'delete', 'id': sid}]
+
+
+def test_set_based_changes_reset_the_table(client, feed, seeded_db):
+    client.post('/user/api/students/bulk-update', json={'filter': {'year': 1}, 'promote': True})
+    client.post('/user/api/students/bulk-update', json={'ids': [seeded_db['student_id']], 'set': {'gender': 'F'}})
+    (_, _, data), = feed(since=0)
+    assert data['changes'] == [{'table': 'student', 'op': 'reset'}]
+
+
+def test_rolled_back_writes_are_not_logged(app, client, feed, seeded_db):
+    resp = client.patch(f"/user/api/students/{seeded_db['student_id']}", json={'version': 7, 'year': 2})
+    assert resp.status_code == 409
+    assert _seq(app) == 0
+
+
+def test_pruned_history_asks_for_a_reload(app, client, feed, seeded_db):
+    sid = seeded_db['student_id']
+    for version in (1, 2, 3):
+        client.patch(f'/user/api/students/{sid}', json={'version': version, 'year': 2})
+    with app.app_context():
+        assert changes.prune(db.session, max_age=-1) == 2  # the newest entry stays
+        db.session.commit()
+    (name, seq, data), = feed(since=1)
+    assert name == 'reset' and seq == 3 and data['tables'] == ['college', 'program', 'student']
+    assert feed(since=2)[0][0] == 'changes'
+
+
+def test_bad_parameters(client):
+    assert client.get('/user/api/changes?tables=job').status_code == 400
+    assert client.get('/user/api/changes?since=soon').status_code == 400
+
+
+def test_record_rejects_untracked_tables(app):
+    with app.app_context(), pytest.raises(ValueError):
+        changes.record(db.session, 'job', 'update', [1])
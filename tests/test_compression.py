@@ -0,0 +1,72 @@
+import gzip
+import re
+
+import pytest
+
+from app import compression
+from app.database import db
+from app.models import Program
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+
+
+def _grow_programs(app, seeded_db, n=40):
+    with app.app_context():
+        db.session.add_all(Program(code=f'Z{i:03d}', name=f'Zipped Program {i}', college_id=seeded_db['college_id'])
+                           for i in range(n))
+        db.session.commit()
+
+
+def test_large_page_is_gzipped(app, client, seeded_db, gzip_only):
+    _grow_programs(app, seeded_db)
+    plain = client.get('/user/programs')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    resp = client.get('/user/programs', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert int(resp.headers['Content-Length']) == len(resp.data) < len(plain.data)
+    assert b'Zipped Program 39' in gzip.decompress(resp.data)
+
+
+def test_compressed_page_still_revalidates(app, client, seeded_db, gzip_only):
+    _grow_programs(app, seeded_db)
+    first = client.get('/user/programs', headers={'Accept-Encoding': 'gzip'})
+    again = client.get('/user/programs', headers={'Accept-Encoding': 'gzip',
+                                                  'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_small_responses_are_left_alone(client, seeded_db):
+    resp = client.get('/user/api/cache', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in resp.headers
+
+
+def test_brotli_preferred_when_available(app, client, seeded_db):
+    if compression.brotli is None:
+        pytest.skip('brotli is not installed')
+    _grow_programs(app, seeded_db)
+    resp = client.get('/user/programs', headers={'Accept-Encoding': 'gzip, br'})
+    assert resp.headers['Content-Encoding'] == 'br'
+
+
+def test_static_urls_are_fingerprinted_and_immutable(client, seeded_db, gzip_only):
+    page = client.get('/user/programs').data.decode()
+    url = re.search(r'src="(/static/js/programs\.js\?v=[0-9a-f]{12})"', page).group(1)
+    assert re.search(r'href="/static/css/style\.css\?v=[0-9a-f]{12}"', page)
+
+    resp = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert resp.status_code == 200
+    assert resp.cache_control.immutable and resp.cache_control.public
+    assert resp.cache_control.max_age == 365 * 24 * 3600
+    assert resp.headers['Content-Encoding'] == 'gzip'
+    assert b'INIT_PROGRAMS' in gzip.decompress(resp.data)
+    resp.close()
+
+    # an outdated hash is served, but not promised to stay the same
+    stale = client.get('/static/js/programs.js?v=000000000000')
+    assert not stale.cache_control.immutable
+    stale.close()
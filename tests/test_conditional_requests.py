@@ -0,0 +1,100 @@
+from sqlalchemy import event
+
+from app.database import db
+from app.models import Student, User
+from app.revisions import bump, current_revisions
+
+
+def test_api_students_304_without_listing_query(client, seeded_db, count_queries):
+    first = client.get('/user/api/students')
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    with count_queries() as statements:
+        resp = client.get('/user/api/students', headers={'If-None-Match': etag})
+    assert resp.status_code == 304
+    assert len(statements) == 1 and 'table_revision' in statements[0]
+
+    # a different query string is a different representation
+    assert client.get('/user/api/students?year=1', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_writes_bump_revision_and_change_etag(client, app, seeded_db):
+    etag = client.get('/user/api/students').headers['ETag']
+    client.post(f"/user/students/delete/{seeded_db['student_id']}")
+    resp = client.get('/user/api/students', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['ETag'] != etag
+
+
+def test_bulk_statements_bump_revision(app, seeded_db):
+    with app.app_context():
+        before = current_revisions('student', 'program')
+        db.session.query(Student).filter_by(year=1).update({'year': 2})
+        db.session.commit()
+        after = current_revisions('student', 'program')
+    assert after['student'] == before['student'] + 1
+    assert after['program'] == before['program']
+
+
+def test_rollback_does_not_bump(app, seeded_db):
+    with app.app_context():
+        before = current_revisions('student')
+        db.session.query(Student).update({'year': 3})
+        db.session.rollback()
+        db.session.commit()
+        assert current_revisions('student') == before
+
+
+def test_html_page_conditional(client, seeded_db):
+    etag = client.get('/user/colleges').headers['ETag']
+    assert client.get('/user/colleges', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_html_etag_changes_with_the_user(app, client, seeded_db):
+    with app.app_context():
+        db.session.add_all([User(username='alice', email='alice@example.edu', password_hash='x'),
+                            User(username='bob', email='bob@example.edu', password_hash='x')])
+        db.session.commit()
+        alice, bob = (uid for (uid,) in db.session.query(User.id).order_by(User.username))
+
+    def login(user_id):
+        with client.session_transaction() as sess:
+            if user_id is None:
+                sess.pop('_user_id', None)
+            else:
+                sess['_user_id'] = str(user_id)
+
+    login(alice)
+    resp = client.get('/user/colleges')
+    assert b'alice' in resp.data
+    etag = resp.headers['ETag']
+    # same browser session, same CSRF secret: Bob and a logged-out visitor must not get Alice's page
+    for user_id in (bob, None):
+        login(user_id)
+        resp = client.get('/user/colleges', headers={'If-None-Match': etag})
+        assert resp.status_code == 200 and b'alice' not in resp.data
+    login(alice)
+    assert client.get('/user/colleges', headers={'If-None-Match': etag}).status_code == 304
+
+
+def test_counter_created_by_a_concurrent_writer_does_not_fail_the_commit(app):
+    # the counter rows are missing (create_all), and another transaction creates
+    # 'student' right after this one's UPDATE found nothing to bump
+    with app.app_context():
+        engine = db.engine
+        raced = []
+
+        def other_writer(conn, cursor, statement, *args):
+            if statement.lstrip().startswith('UPDATE table_revision') and not raced:
+                raced.append(True)
+                cursor.execute("INSERT INTO table_revision (table_name, revision) VALUES ('student', 5)")
+
+        event.listen(engine, 'after_cursor_execute', other_writer)
+        try:
+            bump(db.session, {'student', 'program'})
+            db.session.commit()
+        finally:
+            event.remove(engine, 'after_cursor_execute', other_writer)
+        revs = current_revisions('student', 'program')
+        assert revs['program'] == 1 and revs['student'] > 5
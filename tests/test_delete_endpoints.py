@@ -58,3 +58,56 @@ def test_delete_college_success_after_remove_program(client, seeded_db):
     r3 = client.post(f"/user/colleges/delete/{col_id}")
     assert r3.status_code == 200
     assert r3.get_json().get('success') is True
+
+
+def test_delete_guard_reports_blocking_count_without_loading_children(client, seeded_db, count_queries):
+    prog_id = seeded_db['program_id']
+    with count_queries() as statements:
+        resp = client.post(f"/user/programs/delete/{prog_id}")
+    assert resp.status_code == 400
+    data = resp.get_json()
+    assert data['blocking'] == 'students'
+    assert data['blocking_count'] == 1
+    # no statement selects student rows; the guard only probes EXISTS / COUNT
+    assert not any('student.first_name' in s for s in statements)
+
+
+def test_delete_program_cascade_removes_students(client, seeded_db):
+    from app.models import Program, Student
+    resp = client.post(f"/user/programs/delete/{seeded_db['program_id']}?mode=cascade")
+    assert resp.status_code == 200
+    assert resp.get_json()['affected'] == 1
+    with client.application.app_context():
+        assert Student.query.count() == 0
+        assert Program.query.count() == 0
+
+
+def test_delete_program_reassign_moves_students(client, seeded_db):
+    from app.database import db
+    from app.models import Program, Student
+    with client.application.app_context():
+        db.session.add(Program(code='P02', name='Other Program', college_id=seeded_db['college_id']))
+        db.session.commit()
+        other_id = db.session.query(Program.id).filter_by(code='P02').scalar()
+
+    resp = client.post(f"/user/programs/delete/{seeded_db['program_id']}",
+                       json={'mode': 'reassign', 'target': other_id})
+    assert resp.status_code == 200
+    with client.application.app_context():
+        assert db.session.get(Student, seeded_db['student_id']).program_id == other_id
+
+    bad = client.post(f"/user/programs/delete/{other_id}", json={'mode': 'reassign', 'target': 9999})
+    assert bad.status_code == 400 and bad.get_json()['success'] is False
+
+
+def test_delete_college_cascade_removes_programs_and_students(client, seeded_db):
+    from app.models import College, Program, Student
+    resp = client.post(f"/user/colleges/delete/{seeded_db['college_id']}", json={'mode': 'cascade'})
+    assert resp.status_code == 200
+    with client.application.app_context():
+        assert (College.query.count(), Program.query.count(), Student.query.count()) == (0, 0, 0)
+
+
+def test_delete_missing_program_is_404(client, seeded_db):
+    assert client.post('/user/programs/delete/9999').status_code == 404
+    assert client.post('/user/colleges/delete/9999?mode=cascade').status_code == 404
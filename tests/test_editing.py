@@ -0,0 +1,119 @@
+import json
+
+from app.database import db
+from app.models import College, Program, Student
+
+
+def _version(app, model, item_id):
+    with app.app_context():
+        return db.session.get(model, item_id).version
+
+
+def _touching(statements, table):
+    return [s for s in statements if f' {table} ' in f' {s} ' or f' {table}.' in s]
+
+
+def test_patch_is_one_conditional_update(client, app, seeded_db, count_queries):
+    sid = seeded_db['student_id']
+    with count_queries() as statements:
+        resp = client.patch(f'/user/api/students/{sid}', json={'version': 1, 'first_name': 'Jane'})
+    assert resp.status_code == 200
+    assert resp.get_json() == {'success': True, 'id': sid, 'version': 2, 'changed': {'first_name': 'Jane'}}
+    student_sql = _touching(statements, 'student')
+    assert len(student_sql) == 1 and student_sql[0].lstrip().startswith('UPDATE student SET')
+    # only the changed column (and the version) is written
+    assert 'first_name' in student_sql[0] and 'last_name' not in student_sql[0]
+    with app.app_context():
+        st = db.session.get(Student, sid)
+        assert (st.first_name, st.last_name, st.version) == ('Jane', 'Doe', 2)
+
+
+def test_stale_version_is_409(client, app, seeded_db):
+    sid = seeded_db['student_id']
+    assert client.patch(f'/user/api/students/{sid}', json={'version': 1, 'year': 2}).status_code == 200
+    resp = client.patch(f'/user/api/students/{sid}', json={'version': 1, 'last_name': 'Roe'})
+    assert resp.status_code == 409
+    assert resp.get_json()['current_version'] == 2
+    with app.app_context():
+        assert db.session.get(Student, sid).last_name == 'Doe'
+
+
+def test_patch_errors(client, seeded_db):
+    sid = seeded_db['student_id']
+    assert client.patch('/user/api/students/9999', json={'version': 1, 'year': 2}).status_code == 404
+    for body in [{'year': 2}, {'version': 1}, {'version': 1, 'year': 9}, {'version': 1, 'program_id': 9999},
+                 {'version': 1, 'id': 5}, {'version': 1, 'id_number': 'bad'}]:
+        assert client.patch(f'/user/api/students/{sid}', json=body).status_code == 400, body
+
+
+def test_patch_duplicate_code_is_400(client, app, seeded_db):
+    with app.app_context():
+        db.session.add(College(code='C02', name='Other'))
+        db.session.commit()
+    resp = client.patch(f"/user/api/colleges/{seeded_db['college_id']}", json={'version': 1, 'code': 'C02'})
+    assert resp.status_code == 400
+
+
+def test_patch_program_refreshes_reference_data(client, app, seeded_db):
+    pid = seeded_db['program_id']
+    client.get('/user/students')  # warm the cached program list
+    resp = client.patch(f'/user/api/programs/{pid}', json={'version': 1, 'name': 'Renamed'})
+    assert resp.get_json()['version'] == 2
+    assert b'Renamed' in client.get('/user/students').data
+
+
+def test_form_edit_with_stale_version_is_refused(client, app, seeded_db):
+    app.config['WTF_CSRF_ENABLED'] = False
+    cid = seeded_db['college_id']
+    form = {'id': cid, 'version': 1, 'code': 'C01', 'name': 'First'}
+    assert client.post('/user/colleges', data=form).status_code == 302
+    assert _version(app, College, cid) == 2
+    resp = client.post('/user/colleges', data={**form, 'name': 'Second'}, follow_redirects=True)
+    assert b'changed by someone else' in resp.data
+    with app.app_context():
+        assert db.session.get(College, cid).name == 'First'
+
+
+def test_orm_flush_and_set_based_writes_bump_version(client, app, seeded_db):
+    sid, pid = seeded_db['student_id'], seeded_db['program_id']
+    with app.app_context():
+        db.session.get(Student, sid).gender = 'F'
+        db.session.commit()
+    assert _version(app, Student, sid) == 2
+    client.post('/user/api/students/bulk-update', json={'ids': [sid], 'promote': True})
+    assert _version(app, Student, sid) == 3
+
+    with app.app_context():
+        other = Program(code='P02', name='Other', college_id=seeded_db['college_id'])
+        db.session.add(other)
+        db.session.commit()
+        target = other.id
+    client.post(f'/user/programs/delete/{pid}', data={'mode': 'reassign', 'target': target})
+    assert _version(app, Student, sid) == 4
+
+
+def test_form_edit_writes_only_changed_fields(client, app, seeded_db, count_queries):
+    app.config['WTF_CSRF_ENABLED'] = False
+    sid, pid = seeded_db['student_id'], seeded_db['program_id']
+    row = {'id_number': '2025-0001', 'first_name': 'John', 'last_name': 'Doe',
+           'program_id': pid, 'year': 1, 'gender': 'M'}
+    form = {'id': sid, 'version': 1, 'original': json.dumps(row), **row, 'first_name': 'Jane'}
+    with count_queries() as statements:
+        assert client.post('/user/students', data=form).status_code == 302
+    student_sql = _touching(statements, 'student')
+    updates = [s for s in student_sql if s.lstrip().startswith('UPDATE student SET')]
+    assert len(updates) == 1 and 'first_name' in updates[0] and 'program_id' not in updates[0]
+    # no stats column moved, so no grouped stats SELECT
+    assert not [s for s in student_sql if 'GROUP BY' in s]
+    assert _version(app, Student, sid) == 2
+
+
+def test_unchanged_form_writes_nothing(client, app, seeded_db, count_queries):
+    app.config['WTF_CSRF_ENABLED'] = False
+    cid = seeded_db['college_id']
+    row = {'code': 'C01', 'name': 'Test College'}
+    with count_queries() as statements:
+        resp = client.post('/user/colleges', data={'id': cid, 'version': 1, 'original': json.dumps(row), **row})
+    assert resp.status_code == 302
+    assert not [s for s in statements if s.lstrip().startswith(('UPDATE', 'INSERT'))]
+    assert _version(app, College, cid) == 1
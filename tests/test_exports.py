@@ -0,0 +1,71 @@
+import csv
+import io
+
+import pytest
+
+from app.database import db
+from app.models import Student
+
+
+@pytest.fixture
+def many_students(app, seeded_db, monkeypatch):
+    # small chunks so the export has to stream several pieces
+    monkeypatch.setattr('app.user.exporter.CSV_CHUNK_ROWS', 5)
+    monkeypatch.setattr('app.user.exporter.YIELD_PER', 4)
+    with app.app_context():
+        for i in range(12):
+            db.session.add(Student(id_number=f'2024-{i:04d}', first_name='F', last_name=f'L{i}',
+                                   program_id=seeded_db['program_id'], year=2 if i % 2 else 3, gender='F'))
+        db.session.commit()
+    return seeded_db
+
+
+def test_export_students_csv_streams_filtered_rows(client, many_students):
+    resp = client.get('/user/export/students.csv?year=2')
+    assert resp.is_streamed
+    assert resp.mimetype == 'text/csv'
+    rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True))))
+    assert rows[0] == ['ID Number', 'First Name', 'Last Name', 'Program', 'Year', 'Gender']
+    assert len(rows) == 7
+    assert {r[4] for r in rows[1:]} == {'2'}
+
+
+def test_export_programs_and_colleges_csv(client, seeded_db):
+    assert client.get('/user/export/programs.csv').get_data(as_text=True).splitlines()[1] == \
+        'P01,Test Program,Test College'
+    assert client.get('/user/export/colleges.csv?q=nomatch').get_data(as_text=True).splitlines() == ['Code,Name']
+    assert client.get('/user/export/users.csv').status_code == 404
+
+
+def test_export_xlsx(client, many_students):
+    openpyxl = pytest.importorskip('openpyxl')
+    resp = client.get('/user/export/students.xlsx?gender=F')
+    ws = openpyxl.load_workbook(io.BytesIO(resp.data)).active
+    assert ws.max_row == 13
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'xlsx'])
+def test_export_neutralizes_formulas(app, client, seeded_db, fmt):
+    names = ['=HYPERLINK("http://x")', '+1', '-2', '@SUM(A1)', '\tTab', '\rCR', 'Ann-Marie']
+    with app.app_context():
+        db.session.add_all([Student(id_number=f'2024-{i:04d}', first_name=name, last_name='L',
+                                    program_id=seeded_db['program_id'], year=1, gender='F')
+                            for i, name in enumerate(names)])
+        db.session.commit()
+    resp = client.get(f'/user/export/students.{fmt}?year=1')
+    if fmt == 'csv':
+        rows = list(csv.reader(io.StringIO(resp.get_data(as_text=True), newline='')))[1:]
+    else:
+        openpyxl = pytest.importorskip('openpyxl')
+        rows = list(openpyxl.load_workbook(io.BytesIO(resp.data)).active.values)[1:]
+    cells = [row[1] for row in rows if row[2] == 'L']
+    assert len(cells) == len(names) and 'Ann-Marie' in cells
+    assert all(cell.startswith("'") for cell in cells if cell != 'Ann-Marie')
+
+
+def test_export_cli(app, many_students, tmp_path):
+    out = tmp_path / 'students.csv'
+    result = app.test_cli_runner().invoke(args=['user', 'export', 'students', '-o', str(out),
+                                                '--filter', 'year=3'])
+    assert result.exit_code == 0, result.output
+    assert len(out.read_text().splitlines()) == 7
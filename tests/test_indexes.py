@@ -0,0 +1,27 @@
+"""Query plans for the listing and delete-guard queries use the indexes
+added by migration b7e3a1d95c42 (checked with SQLite EXPLAIN QUERY PLAN)."""
+import pytest
+from sqlalchemy import text
+
+from app.database import db
+
+
+def _plan(app, sql):
+    with app.app_context():
+        return ' ; '.join(row[3] for row in db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+
+
+@pytest.mark.parametrize('sql, index', [
+    ('SELECT count(*) FROM student WHERE program_id = 1', 'ix_student_program_id_year'),
+    ('SELECT id FROM student WHERE program_id = 1 AND year = 2', 'ix_student_program_id_year'),
+    ('SELECT count(*) FROM program WHERE college_id = 1', 'ix_program_college_id'),
+    ("SELECT id FROM student WHERE (last_name, id) > ('Reyes', 5) ORDER BY last_name, id LIMIT 9",
+     'ix_student_last_name_id'),
+    ('SELECT id FROM student ORDER BY first_name DESC, id DESC LIMIT 9', 'ix_student_first_name_id'),
+    ('SELECT id, name FROM program ORDER BY name', 'ix_program_name'),
+    ('SELECT id, name FROM college ORDER BY name', 'ix_college_name'),
+])
+def test_query_uses_index(app, sql, index):
+    plan = _plan(app, sql)
+    assert index in plan
+    assert 'TEMP B-TREE' not in plan
@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from app.database import db
+from app.instrumentation import init_instrumentation
+
+
+@pytest.fixture
+def instrumented(app):
+    return init_instrumentation(app)
+
+
+def test_request_metrics_and_server_timing(client, seeded_db, instrumented):
+    resp = client.get('/user/students')
+    assert 'db;dur=' in resp.headers['Server-Timing']
+    client.get('/user/api/students')
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'sis_request_duration_seconds_count{method="GET",route="/user/students",status="200"} 1' in body
+    assert 'sis_request_template_seconds_count{method="GET",route="/user/students",status="200"} 1' in body
+    assert 'sis_request_json_seconds_sum{method="GET",route="/user/api/students",status="200"}' in body
+    assert 'sis_pool_checkouts{engine="default"}' in body
+    assert 'sis_cache_misses' in body
+
+
+def test_sql_statements_counted_per_request(client, seeded_db, instrumented):
+    client.get('/user/api/students')
+    hist = instrumented.sql_statements
+    (counts, total, statements), = [v for k, v in hist._series.items() if k[1] == '/user/api/students']
+    assert total == 1 and statements >= 2  # revision lookup + listing query
+
+
+def test_slow_query_log(app, client, seeded_db, instrumented, caplog):
+    app.config['SLOW_QUERY_MS'] = 0
+    with caplog.at_level(logging.WARNING, logger='app.slow_query'):
+        client.get('/user/api/students')
+    assert any('SELECT' in r.getMessage() for r in caplog.records)
+    assert instrumented.slow_queries > 0
+
+
+def test_failed_statement_leaves_nothing_on_the_connection(app, instrumented):
+    with app.app_context():
+        with db.engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                conn.execute(text('SELECT * FROM no_such_table'))
+            conn.rollback()
+            conn.execute(text('SELECT 1'))
+            assert not [key for key in conn.info if key.startswith('perf')]
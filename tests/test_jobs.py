@@ -0,0 +1,158 @@
+import json
+import time
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app import jobs
+from app.database import db
+from app.models import Job, Student
+
+
+@pytest.fixture
+def job_app(app, tmp_path):
+    app.config['JOBS_DIR'] = str(tmp_path)
+    return app
+
+
+def _status(client, job_id):
+    return client.get(f'/user/api/jobs/{job_id}').get_json()
+
+
+def _drain(app):
+    with app.app_context():
+        return jobs.run_pending()
+
+
+def test_async_import_returns_job_and_reports_result(job_app, client, seeded_db):
+    rows = 'id_number,first_name,last_name,program_code,year,gender\n' + \
+           '\n'.join(f'2024-{i:04d},A,B,P01,1,F' for i in range(5))
+    resp = client.post('/user/api/students/import?format=csv&async=1', data=rows, content_type='text/csv')
+    assert resp.status_code == 202
+    job_id = resp.get_json()['job_id']
+    assert resp.headers['Location'] == f'/user/api/jobs/{job_id}'
+    assert _status(client, job_id)['status'] == 'queued'
+
+    assert _drain(job_app) == 1
+    status = _status(client, job_id)
+    assert status['status'] == 'done'
+    assert status['result']['inserted'] == 5
+    with job_app.app_context():
+        assert Student.query.count() == 6
+
+
+def test_async_export_can_be_downloaded(job_app, client, seeded_db):
+    resp = client.get('/user/export/students.csv?async=1&year=1')
+    job_id = resp.get_json()['job_id']
+    assert client.get(f'/user/api/jobs/{job_id}/download').status_code == 404
+    _drain(job_app)
+    download = client.get(f'/user/api/jobs/{job_id}/download')
+    assert download.status_code == 200
+    assert b'2025-0001' in download.data
+    assert 'students.csv' in download.headers['Content-Disposition']
+
+
+def test_async_bulk_update_is_validated_up_front(job_app, client, seeded_db):
+    bad = client.post('/user/api/students/bulk-update?async=1', json={'ids': [1]})
+    assert bad.status_code == 400
+    resp = client.post('/user/api/students/bulk-update?async=1',
+                       json={'ids': [seeded_db['student_id']], 'promote': True})
+    job_id = resp.get_json()['job_id']
+    _drain(job_app)
+    assert _status(client, job_id)['result'] == {'affected': 1}
+
+
+def test_failed_job_records_error(job_app, client):
+    job_id = client.post('/user/api/stats/rebuild').get_json()['job_id']
+    with job_app.app_context():
+        db.session.get(Job, job_id).kind = 'no_such_kind'
+        db.session.commit()
+    _drain(job_app)
+    status = _status(client, job_id)
+    assert status['status'] == 'failed'
+    assert 'no_such_kind' in status['error']
+
+
+def test_job_is_claimed_once_and_stale_jobs_are_reclaimed(job_app):
+    with job_app.app_context():
+        job_id = jobs.enqueue('rebuild_stats')
+        assert jobs.claim('w1') == job_id
+        assert jobs.claim('w2') is None
+        # the first worker died: its heartbeat goes stale
+        job = db.session.get(Job, job_id)
+        job.heartbeat_at -= timedelta(seconds=job_app.config['JOBS_STALE_SECONDS'] + 1)
+        db.session.commit()
+        assert jobs.claim('w2') == job_id
+        assert db.session.get(Job, job_id).attempts == 2
+
+
+def test_worker_threads_drain_the_queue(tmp_path):
+    # worker threads need their own connections, so use a file database
+    from flask import Flask
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/jobs.db', JOBS_DIR=str(tmp_path))
+    db.init_app(app)
+    jobs.init_jobs(app)
+    with app.app_context():
+        db.create_all()
+        ids = [jobs.enqueue('rebuild_stats') for _ in range(6)]
+    jobs.work(app, threads=3, once=True)
+    with app.app_context():
+        assert {job.status for job in Job.query.filter(Job.id.in_(ids))} == {'done'}
+        assert all(job.attempts == 1 for job in Job.query)
+
+
+@pytest.fixture
+def temporary_task():
+    added = []
+
+    def register(kind, fn):
+        jobs.task(kind)(fn)
+        added.append(kind)
+    yield register
+    for kind in added:
+        jobs._handlers.pop(kind, None)
+
+
+def test_run_reclaimed_meanwhile_does_not_overwrite_the_new_run(job_app, temporary_task):
+    def reclaimed(params, progress):
+        # the job went stale and another worker claimed it while this handler ran
+        db.session.execute(update(Job).values(worker='w2', attempts=Job.attempts + 1))
+        db.session.commit()
+        progress(1, force=True)
+
+    temporary_task('test_reclaimed', reclaimed)
+    with job_app.app_context():
+        job_id = jobs.enqueue('test_reclaimed')
+        assert jobs.claim('w1') == job_id
+        assert jobs.run(job_id) == 'lost'
+        job = db.session.get(Job, job_id)
+        assert (job.status, job.worker, job.progress_done, job.finished_at) == ('running', 'w2', 0, None)
+
+
+def test_heartbeat_runs_while_the_handler_cannot_report(tmp_path, temporary_task):
+    # the heartbeat uses its own connection, so use a file database
+    from flask import Flask
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/jobs.db', JOBS_DIR=str(tmp_path),
+                      JOBS_HEARTBEAT_SECONDS=0.05)
+    db.init_app(app)
+    jobs.init_jobs(app)
+    beats = []
+
+    def silent(params, progress):
+        started = db.session.get(Job, params['id']).heartbeat_at
+        db.session.commit()
+        time.sleep(0.3)
+        beats.append(db.session.get(Job, params['id']).heartbeat_at > started)
+
+    temporary_task('test_silent', silent)
+    with app.app_context():
+        db.create_all()
+        job_id = jobs.enqueue('test_silent')
+        db.session.get(Job, job_id).params = json.dumps({'id': job_id})
+        db.session.commit()
+        assert jobs.claim('w1') == job_id
+        assert jobs.run(job_id) == 'done'
+    assert beats == [True]
@@ -0,0 +1,37 @@
+import pytest
+
+from app.database import db
+from app.models import College, Program, Student
+
+
+@pytest.fixture
+def grow(app, seeded_db):
+    """Callable adding colleges, programs and students to the seeded database."""
+    def _grow(n=15):
+        with app.app_context():
+            for i in range(n):
+                col = College(code=f'GC{i:02d}', name=f'Grown College {i}')
+                prog = Program(code=f'GP{i:02d}', name=f'Grown Program {i}')
+                col.programs.append(prog)
+                db.session.add(col)
+                db.session.add(Student(id_number=f'2023-{i:04d}', first_name='Grown', last_name=f'S{i}',
+                                       program=prog, year=1, gender='F'))
+            db.session.commit()
+    return _grow
+
+
+@pytest.mark.parametrize('url', [
+    '/user/students',
+    '/user/programs',
+    '/user/colleges',
+    '/user/api/students?limit=50',
+])
+def test_list_pages_cost_constant_queries(client, url, grow, assert_constant_queries):
+    assert_constant_queries(client, url, grow)
+
+
+def test_programs_page_lists_college_names(client, grow):
+    grow(3)
+    resp = client.get('/user/programs')
+    assert resp.status_code == 200
+    assert b'Grown College 2' in resp.data
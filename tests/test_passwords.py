@@ -0,0 +1,125 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import passwords
+from app.database import db
+from app.instrumentation import init_instrumentation
+from app.models import User
+
+
+@pytest.fixture
+def login_app(app):
+    # cheap cost keeps the suite fast; the format and flow are the same
+    app.config.update(WTF_CSRF_ENABLED=False, PASSWORD_SCRYPT_N=2 ** 10, LOGIN_RATE_LIMIT=100)
+    yield app
+    app.extensions['passwords'].shutdown()
+
+
+@pytest.fixture
+def make_user(login_app):
+    def _make(password='s3cret', password_hash=None):
+        with login_app.app_context():
+            user = User(username='registrar', email='registrar@example.edu', password_hash='')
+            if password_hash is None:
+                passwords.set_password(user, password)
+            else:
+                user.password_hash = password_hash
+            db.session.add(user)
+            db.session.commit()
+            return user.id
+    return _make
+
+
+def _login(client, password='s3cret', username='registrar', **kwargs):
+    return client.post('/user/login', data={'username': username, 'password': password}, **kwargs)
+
+
+def _stored_hash(app, user_id):
+    with app.app_context():
+        return db.session.get(User, user_id).password_hash
+
+
+def test_hash_format_and_verify():
+    stored = passwords.hash_password('s3cret', 2 ** 10, 8, 1)
+    assert stored.startswith('scrypt$n=1024,r=8,p=1$') and len(stored) <= 128
+    assert passwords.verify_password('s3cret', stored)
+    assert not passwords.verify_password('wrong', stored)
+    assert not passwords.needs_rehash(stored, 2 ** 10, 8, 1)
+    assert passwords.needs_rehash(stored, 2 ** 11, 8, 1)
+    assert not passwords.verify_password('s3cret', 'scrypt$garbage')
+
+
+def test_login_success_sets_identity(login_app, client, make_user):
+    make_user()
+    resp = _login(client, query_string={'next': '/user/students'})
+    assert resp.status_code == 302 and resp.headers['Location'] == '/user/students'
+    assert b'registrar' in client.get('/user/').data
+
+    client.post('/user/logout')
+    assert b'registrar' not in client.get('/user/').data
+
+
+def test_offsite_next_is_ignored(login_app, client, make_user):
+    make_user()
+    resp = _login(client, query_string={'next': '//evil.example/'})
+    assert resp.headers['Location'] == '/'
+
+
+@pytest.mark.parametrize('username, password', [('registrar', 'wrong'), ('nobody', 's3cret')])
+def test_bad_credentials_are_rejected(login_app, client, make_user, username, password):
+    make_user()
+    resp = _login(client, password=password, username=username)
+    assert resp.status_code == 401
+    assert b'Invalid username or password.' in resp.data
+
+
+def test_rehash_when_cost_changes(login_app, client, make_user):
+    user_id = make_user()
+    login_app.config['PASSWORD_SCRYPT_N'] = 2 ** 11
+    assert _login(client).status_code == 302
+    stored = _stored_hash(login_app, user_id)
+    assert stored.startswith('scrypt$n=2048,')
+    assert passwords.verify_password('s3cret', stored)
+
+
+def test_werkzeug_hash_is_upgraded(login_app, client, make_user):
+    user_id = make_user(password_hash=generate_password_hash('s3cret', method='pbkdf2:sha256:1000'))
+    assert _login(client).status_code == 302
+    assert _stored_hash(login_app, user_id).startswith('scrypt$')
+
+
+def test_rate_limit_per_client(login_app, client, make_user):
+    make_user()
+    login_app.config['LOGIN_RATE_LIMIT'] = 2
+    assert _login(client, password='wrong').status_code == 401
+    assert _login(client, password='wrong').status_code == 401
+    resp = _login(client)
+    assert resp.status_code == 429 and int(resp.headers['Retry-After']) >= 1
+    # another address has its own budget
+    assert _login(client, environ_base={'REMOTE_ADDR': '10.0.0.9'}).status_code == 302
+
+
+def test_saturated_pool_answers_busy(login_app, client, make_user):
+    make_user()
+    login_app.config.update(PASSWORD_HASH_THREADS=1, PASSWORD_HASH_QUEUE=0)
+    service = login_app.extensions['passwords']
+    service.shutdown()
+    _, slots = service._pool()
+    slots.acquire()
+    try:
+        resp = _login(client)
+    finally:
+        slots.release()
+    assert resp.status_code == 503
+    assert _login(client).status_code == 302
+
+
+def test_login_latency_metrics(login_app, client, make_user):
+    init_instrumentation(login_app)
+    make_user()
+    _login(client)
+    _login(client, password='wrong')
+    body = client.get('/metrics').data.decode()
+    assert 'sis_login_duration_seconds_count{outcome="success"} 1' in body
+    assert 'sis_login_duration_seconds_count{outcome="failure"} 1' in body
+    assert 'sis_password_hash_seconds_count{operation="verify"} 2' in body
@@ -0,0 +1,57 @@
+import threading
+
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.database import engine_options_from_env, init_db, db
+from app.pool_metrics import InstrumentedQueuePool, instrument_engine
+
+
+def test_engine_options_from_env(monkeypatch):
+    monkeypatch.setenv('DB_POOL_SIZE', '12')
+    monkeypatch.setenv('DB_MAX_OVERFLOW', '3')
+    monkeypatch.setenv('DB_POOL_PRE_PING', 'false')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT', '5000')
+    opts = engine_options_from_env()
+    assert opts['poolclass'] is InstrumentedQueuePool
+    assert (opts['pool_size'], opts['max_overflow'], opts['pool_pre_ping']) == (12, 3, False)
+    assert opts['connect_args']['options'] == '-c statement_timeout=5000'
+
+
+def test_pgbouncer_mode_uses_nullpool(monkeypatch):
+    monkeypatch.setenv('DB_PGBOUNCER', '1')
+    monkeypatch.setenv('DB_STATEMENT_TIMEOUT', '5000')
+    opts = engine_options_from_env()
+    assert opts['poolclass'] is NullPool
+    assert 'options' not in opts['connect_args']
+
+
+def test_init_db_keeps_database_url_without_db_name(_setup_env):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    init_db(app)
+    with app.app_context():
+        assert db.engine.url.drivername == 'sqlite'
+    assert 'default' in app.extensions['pool_stats']
+
+
+def test_instrumented_pool_counts_checkouts_waits_and_overflow(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/pool.db', poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=1, pool_timeout=5)
+    stats = instrument_engine(engine)
+    first = engine.connect()
+    second = engine.connect()        # overflow connection
+    assert stats.snapshot()['overflow'] == 1
+
+    released = threading.Timer(0.05, lambda: (second.close(), first.close()))
+    released.start()
+    with engine.connect() as third:  # has to wait for a checkin
+        third.execute(text('SELECT 1'))
+    released.join()
+
+    snap = stats.snapshot()
+    assert snap['checkouts'] == 3 and snap['connects'] == 2
+    assert snap['waits'] >= 1 and snap['wait_seconds_max'] >= 0.04
+    engine.dispose()
+    assert engine.pool.stats is stats
@@ -0,0 +1,105 @@
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from app.cache import cache
+from app.database import db
+from app.models import College, Program, Student
+from app.replicas import configure_replicas
+from app.user import bp as user_bp
+
+
+def _replica_app(tmp_path, replicas):
+    """App whose primary and replicas are separate SQLite files."""
+    app = Flask(__name__)
+    app.config.update(TESTING=True, SECRET_KEY='test-secret',
+                      SQLALCHEMY_DATABASE_URI=f'sqlite:///{tmp_path}/primary.db')
+    configure_replicas(app, [f'sqlite:///{tmp_path}/replica{n}.db' for n in range(replicas)])
+    db.init_app(app)
+    cache.init_app(app)
+    app.register_blueprint(user_bp, url_prefix='/user')
+    with app.app_context():
+        engines = [db.engine] + [db.engines[key] for key in app.extensions['db_replicas']]
+        # same reference rows on every side, students only on the primary
+        for engine in engines:
+            db.metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(College.__table__.insert(), {'id': 1, 'code': 'C01', 'name': 'College'})
+                conn.execute(Program.__table__.insert(),
+                             {'id': 1, 'code': 'P01', 'name': 'Program', 'college_id': 1})
+        db.session.add(Student(id_number='2025-0001', first_name='Only', last_name='Primary',
+                               program_id=1, year=1, gender='F'))
+        db.session.commit()
+    return app
+
+
+def _teardown(app):
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # init_app() registers a (table-less) metadata per bind on the shared db object;
+    # drop it so create_all() in other tests' single-engine apps doesn't look for it
+    for key in app.extensions['db_replicas']:
+        db.metadatas.pop(key, None)
+
+
+@pytest.fixture
+def replica_app(tmp_path, _setup_env):
+    app = _replica_app(tmp_path, 1)
+    yield app
+    _teardown(app)
+
+
+@pytest.fixture
+def two_replica_app(tmp_path, _setup_env):
+    app = _replica_app(tmp_path, 2)
+    yield app
+    _teardown(app)
+
+
+def test_get_reads_from_replica(replica_app):
+    client = replica_app.test_client()
+    assert client.get('/user/api/students').get_json()['items'] == []
+
+
+def test_write_goes_to_primary_and_sticks(replica_app):
+    client = replica_app.test_client()
+    with replica_app.app_context():
+        student_id = db.session.query(Student.id).scalar()
+    resp = client.post(f'/user/students/delete/{student_id}')
+    assert resp.get_json()['success'] is True
+    with replica_app.app_context():
+        assert db.session.query(Student).count() == 0
+
+    # right after the write this browser reads the primary; another does not
+    with replica_app.app_context():
+        db.session.add(Student(id_number='2025-0002', first_name='New', last_name='Row',
+                               program_id=1, year=1, gender='F'))
+        db.session.commit()
+    assert len(client.get('/user/api/students').get_json()['items']) == 1
+    assert replica_app.test_client().get('/user/api/students').get_json()['items'] == []
+
+
+def test_sticky_window_expires(replica_app):
+    replica_app.config['DB_REPLICA_STICKY_SECONDS'] = -1
+    client = replica_app.test_client()
+    client.post('/user/students/delete/999')  # 404, not a successful write
+    client.post('/user/api/students/import', data=b'', content_type='text/csv')
+    assert client.get('/user/api/students').get_json()['items'] == []
+
+
+def test_one_replica_serves_the_whole_request(two_replica_app):
+    used = []
+    with two_replica_app.app_context():
+        for key in two_replica_app.extensions['db_replicas']:
+            event.listen(db.engines[key], 'before_cursor_execute',
+                         lambda *args, key=key: used.append(key))
+    client = two_replica_app.test_client()
+    seen = set()
+    for _ in range(2):
+        used.clear()
+        client.get('/user/api/students')
+        assert len(used) > 1 and len(set(used)) == 1, used
+        seen.update(used)
+    assert seen == {'replica_0', 'replica_1'}  # still round-robin across requests
@@ -0,0 +1,100 @@
+import fnmatch
+import time
+
+import pytest
+
+from app.cache import cache, RedisBackend, LRUBackend
+from app.database import db
+from app.models import Program
+
+
+class FakeRedis:
+    """Minimal stand-in for redis.Redis (get/set with ex/delete/scan_iter)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, name):
+        value, expires = self.data.get(name, (None, None))
+        if expires is not None and expires < time.monotonic():
+            return None
+        return value
+
+    def set(self, name, value, ex=None):
+        self.data[name] = (value.encode(), time.monotonic() + ex if ex else None)
+
+    def delete(self, *names):
+        for name in names:
+            self.data.pop(name, None)
+
+    def scan_iter(self, match='*', count=None):
+        return [name for name in list(self.data) if fnmatch.fnmatchcase(name, match)]
+
+
+def test_program_choices_cached_until_programs_change(client, app, seeded_db, count_queries):
+    client.get('/user/students')
+    with count_queries() as statements:
+        client.get('/user/students')
+    assert not any('FROM program' in s for s in statements)
+    stats = client.get('/user/api/cache').get_json()
+    assert stats['hits'] >= 1 and stats['misses'] >= 1
+
+    # deleting a program bumps its revision, so the next page load queries again
+    client.post(f"/user/students/delete/{seeded_db['student_id']}")
+    client.post(f"/user/programs/delete/{seeded_db['program_id']}")
+    with count_queries() as statements:
+        client.get('/user/students')
+    assert any('FROM program' in s for s in statements)
+
+
+def test_program_added_elsewhere_is_a_valid_choice_at_once(client, app, seeded_db):
+    # another worker's write: nothing is invalidated in this process
+    app.config['WTF_CSRF_ENABLED'] = False
+    client.get('/user/students')
+    with app.app_context():
+        program = Program(code='P02', name='Added Elsewhere', college_id=seeded_db['college_id'])
+        db.session.add(program)
+        db.session.commit()
+        new_id = program.id
+    resp = client.post('/user/students', data={'id_number': '2025-0002', 'first_name': 'New', 'last_name': 'Row',
+                                               'program_id': new_id, 'year': 1, 'gender': 'F'})
+    assert resp.status_code == 302
+    resp = client.patch(f"/user/api/students/{seeded_db['student_id']}", json={'version': 1, 'program_id': new_id})
+    assert resp.status_code == 200
+
+
+def test_lru_backend_evicts_and_expires():
+    backend = LRUBackend(maxsize=2)
+    backend.set('a', 1, ttl=60)
+    backend.set('b', 2, ttl=60)
+    backend.get('a')
+    backend.set('c', 3, ttl=60)
+    assert backend.get('b') is None and backend.get('a') == 1
+    backend.set('d', 4, ttl=-1)
+    assert backend.get('d') is None
+
+
+@pytest.mark.parametrize('backend', [LRUBackend(), RedisBackend(FakeRedis())])
+def test_get_or_set_with_pluggable_backends(app, backend):
+    cache.init_app(app, backend=backend)
+    calls = []
+    with app.app_context():
+        loader = lambda: calls.append(1) or [{'id': 1, 'name': 'X'}]  # noqa: E731
+        assert cache.get_or_set('colleges', loader) == [{'id': 1, 'name': 'X'}]
+        assert cache.get_or_set('colleges', loader) == [{'id': 1, 'name': 'X'}]
+        cache.invalidate('colleges')
+        cache.get_or_set('colleges', loader)
+        assert len(calls) == 2
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 2
+
+
+def test_redis_clear_removes_keys_written_by_other_processes():
+    client = FakeRedis()
+    ours, other_worker = RedisBackend(client, prefix='sis:'), RedisBackend(client, prefix='sis:')
+    for i in range(1200):
+        other_worker.set(f'colleges:{i}', [i], ttl=60)
+    ours.set('programs', [], ttl=60)
+    client.set('other-app:colleges', '[]')
+    ours.clear()
+    assert list(client.data) == ['other-app:colleges']
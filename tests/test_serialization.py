@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app import serialization
+from app.database import db
+from app.models import Program
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    payload = [{'id': 1, 'name': 'Café', 'college': None}, {'id': 2, 'name': 'B', 'college': 'C'}]
+    fast = serialization.dumps(payload)
+    monkeypatch.setattr(serialization, 'orjson', None)
+    assert serialization.dumps(payload) == fast
+    assert json.loads(fast) == payload
+
+
+def test_html_safe_escapes_script_breakers():
+    data = serialization.html_safe(serialization.dumps(["</script><b>&'"]))
+    assert b'<' not in data and b'>' not in data and b'&' not in data and b"'" not in data
+    assert json.loads(data) == ["</script><b>&'"]
+
+
+def test_encoded_list_skips_query_until_table_changes(app, client, seeded_db, count_queries):
+    assert b'"code":"P01"' in client.get('/user/programs').data
+    with count_queries() as statements:
+        assert client.get('/user/programs').status_code == 200
+    assert not any('FROM program' in s for s in statements)
+    # one revision lookup shared by the ETag and both encoded lists
+    assert sum('table_revision' in s for s in statements) == 1
+
+    with app.app_context():
+        db.session.add(Program(code='P02', name='Second Program', college_id=seeded_db['college_id']))
+        db.session.commit()
+    with count_queries() as statements:
+        body = client.get('/user/programs').data
+    assert b'"code":"P02"' in body
+    assert any('FROM program' in s for s in statements)
+
+
+@pytest.mark.parametrize('url, marker', [
+    ('/user/programs', b'window.INIT_PROGRAMS = [{"id":'),
+    ('/user/colleges', b'window.INIT_COLLEGES = [{"id":'),
+    ('/user/students', b'window.INIT_PROGRAMS = [{"id":'),
+])
+def test_pages_embed_encoded_lists(client, seeded_db, url, marker):
+    assert marker in client.get(url).data
@@ -0,0 +1,62 @@
+import pytest
+from flask import Flask, request
+
+from app import serve
+from app.database import db
+
+
+def test_settings_come_from_env(monkeypatch):
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    monkeypatch.setenv('SERVE_THREADS', '8')
+    monkeypatch.setenv('SERVE_MAX_REQUESTS', '0')
+    app = Flask(__name__)
+    serve.init_serve(app)
+    assert (app.config['SERVE_WORKERS'], app.config['SERVE_THREADS'], app.config['SERVE_MAX_REQUESTS']) == (3, 8, 0)
+    assert 'serve' in app.cli.commands
+
+
+def test_options_pick_worker_class_and_apply_overrides(app):
+    app.config.update(SERVE_WORKERS=2, SERVE_THREADS=4)
+    options = serve.gunicorn_options(app, workers=None, bind='0.0.0.0:9000')
+    assert (options['workers'], options['threads'], options['worker_class']) == (2, 4, 'gthread')
+    assert options['bind'] == '0.0.0.0:9000' and options['preload_app']
+    assert serve.gunicorn_options(app, threads=1)['worker_class'] == 'sync'
+
+
+def test_gunicorn_accepts_the_options(app):
+    config = pytest.importorskip('gunicorn.config')
+    cfg = config.Config()
+    for name, value in serve.gunicorn_options(app).items():
+        cfg.set(name, value)
+    assert cfg.worker_class_str == 'gthread' and cfg.keepalive == app.config['SERVE_KEEPALIVE']
+
+
+def test_after_fork_replaces_inherited_pools(app):
+    with app.app_context():
+        engine = db.engine
+        inherited = engine.pool
+    app.extensions['passwords'].hash('secret')  # starts the KDF thread pool
+    serve.after_fork(app)
+    assert engine.pool is not inherited
+    assert app.extensions['passwords']._executor is None
+
+
+def test_trusted_proxies_restore_the_client_address(monkeypatch):
+    monkeypatch.setenv('SERVE_TRUSTED_PROXIES', '1')
+    app = Flask(__name__)
+    serve.init_serve(app)
+
+    @app.route('/ip')
+    def ip():
+        return request.remote_addr
+
+    headers = {'X-Forwarded-For': '203.0.113.7'}
+    assert app.test_client().get('/ip', headers=headers, environ_base={'REMOTE_ADDR': '127.0.0.1'}).text == \
+        '203.0.113.7'
+    # without the setting the proxy's address is kept
+    monkeypatch.delenv('SERVE_TRUSTED_PROXIES')
+    plain = Flask(__name__)
+    serve.init_serve(plain)
+    plain.add_url_rule('/ip', 'ip', ip)
+    assert plain.test_client().get('/ip', headers=headers, environ_base={'REMOTE_ADDR': '127.0.0.1'}).text == \
+        '127.0.0.1'
@@ -0,0 +1,65 @@
+"""Cold-start checks for create_app(), each in a fresh interpreter.
+
+Measured on the development machine (SQLite URL): importing `app` took
+about 0.66 s and create_app() about 0.07 s. Before Flask-Migrate was made
+lazy, the import took about 0.80 s. The budget leaves room for slower CI
+machines. Set STARTUP_BUDGET_SECONDS to tighten it.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.startup import measure
+
+STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', 1.5))
+ENV = {'DATABASE_URL': 'sqlite://', 'DB_NAME': ''}
+
+
+@pytest.fixture(scope='module')
+def cold_start():
+    return measure(env=ENV)
+
+
+def test_migration_tooling_is_not_imported(cold_start):
+    loaded = set(cold_start['modules'])
+    assert not loaded & {'flask_migrate', 'alembic', 'mako'}
+
+
+def test_startup_within_budget(cold_start):
+    total = cold_start['import_seconds'] + cold_start['create_app_seconds']
+    assert total < STARTUP_BUDGET_SECONDS, (
+        f'cold start took {total:.2f} s (budget {STARTUP_BUDGET_SECONDS} s); '
+        f'run `flask startup-profile` for the breakdown')
+
+
+def test_init_phases_are_recorded(cold_start):
+    assert {'import app', 'database', 'extensions', 'auth', 'blueprints'} <= set(cold_start['phases'])
+
+
+def test_flask_db_loads_migrate_on_demand(monkeypatch):
+    for name, value in ENV.items():
+        monkeypatch.setenv(name, value)
+    from app import create_app
+    app = create_app()
+    assert 'migrate' not in app.extensions
+    result = app.test_cli_runner().invoke(args=['db', '--help'])
+    assert result.exit_code == 0, result.output
+    assert 'upgrade' in result.output
+    assert 'migrate' in app.extensions
+
+
+def test_flask_db_subcommands_run(tmp_path):
+    # the real `flask db` group callback must run: it sets the migrations directory for upgrade/current
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'DATABASE_URL': f"sqlite:///{tmp_path / 'migrate.db'}", 'DB_NAME': '', 'FLASK_APP': 'app'}
+
+    def flask_db(*args):
+        proc = subprocess.run([sys.executable, '-m', 'flask', 'db', *args], cwd=root, env=env,
+                              capture_output=True, text=True)
+        assert proc.returncode == 0, proc.stderr
+        return proc.stdout
+
+    flask_db('upgrade')
+    assert '(head)' in flask_db('current')
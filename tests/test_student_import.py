@@ -0,0 +1,72 @@
+import io
+import json
+
+from app.database import db
+from app.models import Student
+from app.user.importer import iter_json_rows
+
+CSV_BODY = (
+    'id_number,first_name,last_name,program_code,year,gender\n'
+    '2024-0001,Ana,Reyes,P01,1,F\n'
+    '2024-0002,Ben,Cruz,P01,5,M\n'        # bad year
+    '2024-0003,Cara,Lim,NOPE,2,F\n'       # unknown program
+    '2025-0001,Dup,Existing,P01,1,M\n'    # id already in seeded_db
+    '2024-0001,Ana,Again,P01,1,F\n'       # duplicate within file
+    '24-1,Bad,Id,P01,1,M\n'
+    '2024-0004,Dan,Tan,P01,4,m\n'
+)
+
+
+def test_import_csv_reports_row_errors_and_keeps_good_rows(client, app, seeded_db):
+    resp = client.post('/user/api/students/import',
+                       data={'file': (io.BytesIO(CSV_BODY.encode()), 'students.csv')})
+    data = resp.get_json()
+    assert data['inserted'] == 2
+    assert data['failed'] == 5
+    assert sorted(e['row'] for e in data['errors']) == [3, 4, 5, 6, 7]
+    assert data['errors'][0] == {'row': 3, 'errors': ['year: Not a valid choice.']}
+    with app.app_context():
+        assert db.session.query(Student).filter_by(id_number='2024-0004').one().gender == 'M'
+
+
+def test_import_json_array_in_small_batches(client, app, seeded_db):
+    rows = [{'id_number': f'2024-{i:04d}', 'first_name': 'A', 'last_name': f'B{i}',
+             'program_code': 'P01', 'year': 2, 'gender': 'O'} for i in range(25)]
+    resp = client.post('/user/api/students/import?format=json', data=json.dumps(rows),
+                       content_type='application/json')
+    assert resp.get_json() == {'success': True, 'inserted': 25, 'failed': 0, 'errors': []}
+    with app.app_context():
+        assert db.session.query(Student).count() == 26
+
+
+def test_iter_json_rows_handles_ndjson_split_across_reads(monkeypatch):
+    monkeypatch.setattr('app.user.importer.READ_SIZE', 7)
+    body = b'{"id_number": "2024-0001"}\n{"id_number": "2024-0002"}\n'
+    assert [n for n, _ in iter_json_rows(io.BytesIO(body))] == [1, 2]
+
+
+def test_import_cli(app, seeded_db, tmp_path):
+    path = tmp_path / 'students.csv'
+    path.write_text(CSV_BODY)
+    result = app.test_cli_runner().invoke(args=['user', 'import-students', str(path), '--batch-size', '1'])
+    assert 'Imported 2 students, 5 rows rejected.' in result.output
+
+
+def test_dry_run_reports_the_same_errors_without_writing(client, app, seeded_db):
+    resp = client.post('/user/api/students/import?format=csv&dry_run=1', data=CSV_BODY,
+                       content_type='text/csv')
+    data = resp.get_json()
+    assert (data['valid'], data['inserted'], data['failed']) == (2, 0, 5)
+    assert {'row': 5, 'errors': ['id_number: A student with this id_number already exists.']} in data['errors']
+    with app.app_context():
+        assert db.session.query(Student).count() == 1
+
+
+def test_existing_ids_are_skipped_by_the_batch_insert(client, seeded_db, count_queries):
+    body = CSV_BODY.splitlines()[0] + '\n2025-0001,Dup,Existing,P01,1,M\n2024-0009,New,Row,P01,1,F\n'
+    with count_queries() as statements:
+        data = client.post('/user/api/students/import?format=csv', data=body, content_type='text/csv').get_json()
+    assert (data['inserted'], data['failed']) == (1, 1)
+    assert data['errors'][0]['errors'] == ['id_number: A student with this id_number already exists.']
+    student_sql = [s for s in statements if 'student.id_number' in s or 'INTO student ' in s]
+    assert len(student_sql) == 1 and 'ON CONFLICT' in student_sql[0]
@@ -0,0 +1,65 @@
+import re
+
+from app.database import db
+from app.models import Student
+from app.user.search import _trigrams, similarity, word_similarity
+
+
+def _add(app, program_id, *names):
+    with app.app_context():
+        for i, (first, last) in enumerate(names):
+            db.session.add(Student(id_number=f'2024-{i:04d}', first_name=first, last_name=last,
+                                   program_id=program_id, year=2, gender='F'))
+        db.session.commit()
+
+
+def test_trigram_similarity_matches_pg_trgm_semantics():
+    assert similarity('word', 'word') == 1.0
+    assert similarity('word', 'two words') > 0
+    assert similarity('', 'word') == 0.0
+    assert word_similarity('smith', '2024-0001 Anna Smith') == 1.0
+
+
+def test_memoized_trigrams_match_the_plain_definition():
+    def plain(text):
+        grams = set()
+        for word in re.findall(r'[0-9a-z]+', (text or '').lower()):
+            padded = f'  {word} '
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+        return grams
+
+    for text in ['', None, 'Anna', 'anna smith', 'Smith, Anna-Marie 2024-0001', 'anna anna']:
+        for _ in range(2):  # second pass is served from the cache
+            assert _trigrams(text) == plain(text)
+
+
+def test_search_prefix_and_typo(client, app, seeded_db):
+    _add(app, seeded_db['program_id'], ('Anna', 'Smith'), ('Maria', 'Santos'), ('Robert', 'Smithers'))
+
+    data = client.get('/user/api/students/search?q=smi').get_json()
+    assert {i['last_name'] for i in data['items']} == {'Smith', 'Smithers'}
+
+    # transposed letters still find the student through trigram similarity
+    data = client.get('/user/api/students/search?q=santso').get_json()
+    assert data['items'][0]['last_name'] == 'Santos'
+
+
+def test_search_ranks_exact_before_fuzzy(client, app, seeded_db):
+    _add(app, seeded_db['program_id'], ('Anna', 'Smith'), ('Robert', 'Smyth'))
+    items = client.get('/user/api/students/search?q=smith').get_json()['items']
+    assert items[0]['last_name'] == 'Smith'
+    assert items[0]['score'] >= items[-1]['score']
+
+
+def test_search_matches_program_name_and_id(client, seeded_db):
+    assert client.get('/user/api/students/search?q=test progrm').get_json()['items'][0]['id_number'] == '2025-0001'
+    assert client.get('/user/api/students/search?q=2025-00').get_json()['items'][0]['first_name'] == 'John'
+    assert client.get('/user/api/students/search?q=').get_json()['items'] == []
+
+
+def test_like_wildcards_in_the_term_are_literal(client, app, seeded_db):
+    _add(app, seeded_db['program_id'], ('Anna', 'O_Neil'))
+    for term in ('%', '_', 'J%', '\\'):
+        assert client.get('/user/api/students/search', query_string={'q': term}).get_json()['items'] == [], term
+    items = client.get('/user/api/students/search', query_string={'q': 'o_n'}).get_json()['items']
+    assert [i['last_name'] for i in items] == ['O_Neil']
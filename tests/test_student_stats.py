@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from app import stats
+from app.database import db
+from app.models import College, Program, Student, StudentStat
+
+
+@pytest.fixture
+def programs(app):
+    with app.app_context():
+        db.session.add_all([College(code='C01', name='Engineering'), College(code='C02', name='Science')])
+        db.session.flush()
+        c1, c2 = (cid for (cid,) in db.session.query(College.id).order_by(College.code))
+        db.session.add_all([Program(code='P01', name='Civil', college_id=c1),
+                            Program(code='P02', name='Biology', college_id=c2)])
+        db.session.commit()
+        p1, p2 = (pid for (pid,) in db.session.query(Program.id).order_by(Program.code))
+        return {'c1': c1, 'c2': c2, 'p1': p1, 'p2': p2}
+
+
+def _table(app):
+    with app.app_context():
+        # keys that dropped to zero keep their row
+        return sorted(db.session.query(StudentStat.program_id, StudentStat.year, StudentStat.gender,
+                                       StudentStat.student_count).filter(StudentStat.student_count > 0))
+
+
+def _ok(resp):
+    assert resp.status_code == 200, resp.get_json()
+
+
+def assert_matches_rebuild(app):
+    incremental = _table(app)
+    with app.app_context():
+        stats.rebuild(db.session)
+        db.session.commit()
+    assert incremental == _table(app)
+
+
+def test_orm_writes_maintain_counts(app, client, programs):
+    app.config['WTF_CSRF_ENABLED'] = False
+    for i, (year, gender) in enumerate([(1, 'M'), (1, 'M'), (2, 'F')]):
+        client.post('/user/students', data={'id_number': f'2024-000{i}', 'first_name': 'A', 'last_name': 'B',
+                                            'program_id': programs['p1'], 'year': year, 'gender': gender})
+    assert _table(app) == [(programs['p1'], 1, 'M', 2), (programs['p1'], 2, 'F', 1)]
+
+    with app.app_context():
+        sid = db.session.query(Student.id).filter_by(id_number='2024-0000').scalar()
+    client.post('/user/students', data={'id': sid, 'id_number': '2024-0000', 'first_name': 'A', 'last_name': 'B',
+                                        'program_id': programs['p2'], 'year': 3, 'gender': 'M'})
+    client.post(f'/user/students/delete/{sid + 2}')
+    assert _table(app) == [(programs['p1'], 1, 'M', 1), (programs['p2'], 3, 'M', 1)]
+    assert_matches_rebuild(app)
+
+
+def test_set_based_writes_maintain_counts(app, client, programs):
+    rows = '\n'.join(['id_number,first_name,last_name,program_code,year,gender'] +
+                     [f'2024-{i:04d},A,B,P0{i % 2 + 1},{i % 4 + 1},{"MF"[i % 2]}' for i in range(20)])
+    _ok(client.post('/user/api/students/import?format=csv', data=rows, content_type='text/csv'))
+    assert_matches_rebuild(app)
+
+    _ok(client.post('/user/api/students/bulk-update', json={'filter': {'year': 1}, 'promote': True}))
+    assert_matches_rebuild(app)
+    _ok(client.post('/user/api/students/bulk-update', json={'filter': {'program_id': programs['p2']},
+                                                            'set': {'gender': 'O'}}))
+    assert_matches_rebuild(app)
+    _ok(client.post('/user/api/students/bulk-delete', json={'filter': {'year': 4}}))
+    assert_matches_rebuild(app)
+    _ok(client.post(f"/user/programs/delete/{programs['p1']}", json={'mode': 'reassign', 'target': programs['p2']}))
+    assert_matches_rebuild(app)
+    _ok(client.post(f"/user/colleges/delete/{programs['c2']}", json={'mode': 'cascade'}))
+    assert _table(app) == []
+
+
+def test_overlapping_bulk_updates_count_each_move(tmp_path):
+    # two sessions on one file database: a second promotion starts while the first is between statements
+    engine = create_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    db.metadata.create_all(engine)
+    with Session(engine) as session:
+        program = Program(code='P01', name='Civil', college=College(code='C01', name='Engineering'))
+        session.add_all([Student(id_number=f'2024-000{i}', first_name='A', last_name='B', program=program,
+                                 year=1, gender='M') for i in range(3)])
+        session.commit()
+        program_id = program.id
+
+    def promote():
+        with Session(engine) as session:
+            stats.update_students(session, [Student.year < 4], {'year': Student.year + 1})
+            session.commit()
+
+    other = threading.Thread(target=promote)
+    started = threading.Event()
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def interleave(conn, cursor, statement, parameters, context, executemany):
+        if threading.current_thread() is other:
+            started.set()
+        elif 'student.year +' in statement and not other.is_alive() and not started.is_set():
+            other.start()
+            started.wait(5)
+            time.sleep(0.2)  # let it reach the database
+
+    try:
+        promote()
+        other.join(10)
+    finally:
+        event.remove(engine, 'before_cursor_execute', interleave)
+    with Session(engine) as session:
+        assert session.query(Student.year).distinct().all() == [(3,)]
+        counted = session.query(StudentStat.program_id, StudentStat.year, StudentStat.student_count) \
+            .filter(StudentStat.student_count > 0).all()
+    assert counted == [(program_id, 3, 3)]
+    engine.dispose()
+
+
+def test_stats_api_reads_summary_table_only(app, client, programs, count_queries):
+    with app.app_context():
+        db.session.add_all([Student(id_number=f'2024-{i:04d}', first_name='A', last_name='B',
+                                    program_id=programs['p1' if i < 3 else 'p2'], year=1 + i % 2, gender='F')
+                            for i in range(5)])
+        db.session.commit()
+
+    with count_queries() as statements:
+        resp = client.get('/user/api/stats')
+    data = resp.get_json()
+    assert data['total'] == 5
+    assert data['by_year'] == {'1': 3, '2': 2}
+    assert data['by_gender'] == {'F': 5}
+    assert [(p['code'], p['count']) for p in data['by_program']] == [('P02', 2), ('P01', 3)]
+    assert [(c['code'], c['count']) for c in data['by_college']] == [('C01', 3), ('C02', 2)]
+    assert not any('FROM student ' in s or 'FROM student\n' in s for s in statements)
+
+    narrowed = client.get(f"/user/api/stats?college_id={programs['c2']}").get_json()
+    assert narrowed['total'] == 2 and [p['code'] for p in narrowed['by_program']] == ['P02']
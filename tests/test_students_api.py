@@ -0,0 +1,53 @@
+from app.database import db
+from app.models import Student
+
+
+def _add_students(app, program_id, count, year=1, gender='M'):
+    with app.app_context():
+        for i in range(count):
+            db.session.add(Student(id_number=f'2024-{i:04d}', first_name=f'First{i:02d}',
+                                   last_name=f'Last{count - i:02d}', program_id=program_id,
+                                   year=year, gender=gender))
+        db.session.commit()
+
+
+def test_api_students_returns_page_and_cursor(client, app, seeded_db):
+    _add_students(app, seeded_db['program_id'], 10)
+    resp = client.get('/user/api/students?limit=4')
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert len(data['items']) == 4
+    assert data['next_cursor']
+    assert data['items'][0]['program'] == 'Test Program'
+
+
+def test_api_students_cursor_walks_all_rows_once(client, app, seeded_db):
+    _add_students(app, seeded_db['program_id'], 10)
+    seen = []
+    cursor = None
+    while True:
+        url = '/user/api/students?limit=3&sort=last_name&order=desc'
+        if cursor:
+            url += f'&cursor={cursor}'
+        data = client.get(url).get_json()
+        seen.extend(item['id_number'] for item in data['items'])
+        cursor = data['next_cursor']
+        if not cursor:
+            break
+    assert len(seen) == 11
+    assert len(set(seen)) == 11
+
+
+def test_api_students_filters(client, app, seeded_db):
+    _add_students(app, seeded_db['program_id'], 3, year=2, gender='F')
+    data = client.get('/user/api/students?year=2&gender=F').get_json()
+    assert len(data['items']) == 3
+    assert all(item['year'] == 2 and item['gender'] == 'F' for item in data['items'])
+
+    data = client.get('/user/api/students?q=doe').get_json()
+    assert [item['id_number'] for item in data['items']] == ['2025-0001']
+
+
+def test_api_students_rejects_bad_params(client, seeded_db):
+    assert client.get('/user/api/students?sort=password').status_code == 400
+    assert client.get('/user/api/students?cursor=not-a-cursor').status_code == 400
@@ -0,0 +1,62 @@
+from app.database import db
+from app.models import College, Program, Student
+from app.user import uniqueness
+
+
+def _inserts(statements, table):
+    return [s for s in statements if s.lstrip().startswith(f'INSERT INTO {table} ')]
+
+
+def test_existing_checks_many_values_per_query(app, seeded_db, count_queries, monkeypatch):
+    monkeypatch.setattr(uniqueness, 'LOOKUP_CHUNK', 3)
+    ids = ['2025-0001'] + [f'2030-{i:04d}' for i in range(5)]
+    with app.app_context(), count_queries() as statements:
+        assert uniqueness.existing(Student.id_number, ids) == {'2025-0001'}
+        assert uniqueness.existing(Student.id_number, ids, exclude_id=seeded_db['student_id']) == set()
+    assert len(statements) == 4
+
+
+def test_insert_new_skips_taken_keys(app, seeded_db):
+    with app.app_context():
+        inserted = uniqueness.insert_new(College, [{'code': 'C01', 'name': 'Again'},
+                                                   {'code': 'C02', 'name': 'New'}])
+        db.session.commit()
+        assert list(inserted) == ['C02'] and inserted['C02'] > seeded_db['college_id']
+        assert db.session.query(College.name).filter_by(code='C01').scalar() == 'Test College'
+
+
+def test_duplicate_student_id_is_a_form_error(client, app, seeded_db, count_queries):
+    app.config['WTF_CSRF_ENABLED'] = False
+    form = {'id_number': '2025-0001', 'first_name': 'Copy', 'last_name': 'Cat',
+            'program_id': seeded_db['program_id'], 'year': 1, 'gender': 'F'}
+    with count_queries() as statements:
+        resp = client.post('/user/students', data=form)
+    assert resp.status_code == 200
+    assert b'Student ID must be unique.' in resp.data
+    assert not _inserts(statements, 'student')
+    with app.app_context():
+        assert db.session.query(Student).count() == 1
+
+
+def test_duplicate_program_code_is_a_form_error(client, app, seeded_db):
+    app.config['WTF_CSRF_ENABLED'] = False
+    form = {'code': 'P01', 'name': 'Clone', 'college_id': seeded_db['college_id']}
+    resp = client.post('/user/programs', data=form)
+    assert b'Program code must be unique.' in resp.data
+    # keeping its own code while editing is fine
+    resp = client.post('/user/programs', data={**form, 'id': seeded_db['program_id'], 'version': 1})
+    assert resp.status_code == 302
+    with app.app_context():
+        assert db.session.get(Program, seeded_db['program_id']).name == 'Clone'
+
+
+def test_create_losing_a_race_is_skipped_not_rolled_back(client, app, seeded_db, monkeypatch):
+    # the validator sees a free code, then a concurrent writer takes it
+    app.config['WTF_CSRF_ENABLED'] = False
+    monkeypatch.setattr(uniqueness.Unique, '__call__', lambda self, form, field: None)
+    resp = client.post('/user/colleges', data={'code': 'C01', 'name': 'Late'})
+    assert resp.status_code == 200 and b'College code must be unique.' in resp.data
+    resp = client.post('/user/colleges', data={'code': 'C09', 'name': 'Fresh'})
+    assert resp.status_code == 302
+    with app.app_context():
+        assert db.session.query(College).count() == 2